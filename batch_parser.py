@@ -0,0 +1,235 @@
+# batch_parser.py
+"""
+Пакетный парсинг без GUI (можно запускать на сервере без PySide6)
+
+Пример:
+    python batch_parser.py "templates/Рецепты с Рамблера.json" urls.xlsx -o result.xlsx --workers 16
+    python batch_parser.py "templates/Рецепты с Рамблера.json" urls.xlsx -o result.parquet   # без Excel
+
+Прогресс сохраняется в jobs.sqlite; прерванное задание продолжается с места остановки:
+    python batch_parser.py resume            # список незавершённых заданий
+    python batch_parser.py resume <id>
+"""
+import argparse
+import sys
+import time
+
+from core.batch_engine import BatchEngine
+from core.metrics import JsonExporter, Metrics, PrometheusExporter
+from core.rate_limiter import HostRateLimiter
+from storage.fingerprint_store import FingerprintStore
+from storage.job_store import JobStore
+from storage.response_cache import ResponseCache
+
+
+def build_arg_parser():
+    parser = argparse.ArgumentParser(description="Пакетный парсинг списка URL по шаблону")
+    parser.add_argument("template", help="JSON шаблон, сохранённый конструктором")
+    parser.add_argument("urls", help="Источник ссылок: .xlsx, .csv или .txt (одна ссылка на строку)")
+    parser.add_argument("-o", "--output", required=True,
+                        help="Куда сохранить результат: .xlsx, .csv(.gz), .jsonl(.gz) или .parquet")
+    parser.add_argument("--column", default=None, help="Колонка с ссылками (по умолчанию - первая)")
+    parser.add_argument("--sheet", default="Рецепты", help="Имя листа в результате (для .xlsx)")
+    parser.add_argument("--buffer-rows", type=int, default=None,
+                        help="Строк в порции записи (для .parquet - размер record batch)")
+    parser.add_argument("--workers", type=int, default=8, help="Сколько страниц загружать одновременно")
+    parser.add_argument("--retries", type=int, default=3, help="Количество попыток загрузки")
+    parser.add_argument("--delay", type=float, default=1, help="Задержка перед запросом (секунды)")
+    parser.add_argument("--processes", type=int, default=0,
+                        help="Процессов для разбора HTML (0 - разбирать в потоках загрузки)")
+    parser.add_argument("--async", dest="use_async", action="store_true",
+                        help="Загружать через asyncio (нужен aiohttp)")
+    parser.add_argument("--per-host", type=int, default=8,
+                        help="Одновременных запросов к одному сайту (для --async)")
+    parser.add_argument("--parser", default=None, choices=["auto", "lxml", "html.parser", "selectolax"],
+                        help="Движок разбора HTML (по умолчанию - из шаблона или auto)")
+    parser.add_argument("--prune", action="store_true",
+                        help="Строить только нужные селекторам части страницы (быстрее, меньше памяти)")
+    parser.add_argument("--verify-prune", action="store_true",
+                        help="Проверять --prune: разбирать страницу ещё и целиком и сравнивать результат")
+    parser.add_argument("--adaptive", action="store_true",
+                        help="Адаптивное ограничение скорости по сайтам вместо фиксированной задержки")
+    parser.add_argument("--rate", type=float, default=2.0,
+                        help="Начальная скорость для --adaptive (запросов в секунду на сайт)")
+    parser.add_argument("--max-rate", type=float, default=20.0,
+                        help="Предельная скорость для --adaptive (запросов в секунду на сайт)")
+    parser.add_argument("--robots", action="store_true", help="Соблюдать Crawl-delay из robots.txt")
+    parser.add_argument("--cache", default=None, help="Папка кэша ответов (повторные прогоны без скачивания)")
+    parser.add_argument("--cache-ttl", type=float, default=24 * 3600,
+                        help="Сколько секунд ответ в кэше считается свежим")
+    parser.add_argument("--cache-size", type=int, default=1024,
+                        help="Предельный размер кэша (МБ)")
+    parser.add_argument("--offline", action="store_true", help="Брать страницы только из кэша")
+    parser.add_argument("--selenium", action="store_true", help="Загружать страницы через Selenium")
+    parser.add_argument("--fingerprints", default=None,
+                        help="Файл отпечатков страниц: неизменившиеся страницы не разбираются повторно")
+    parser.add_argument("--metrics-json", default=None,
+                        help="Сохранить метрики прогона (время этапов, попадания полей) в JSON")
+    parser.add_argument("--metrics-prom", default=None,
+                        help="Сохранить метрики в текстовом формате Prometheus (для node_exporter)")
+    parser.add_argument("--jobs", default="jobs.sqlite",
+                        help="Файл хранилища заданий (прогресс по каждому URL, см. resume)")
+    parser.add_argument("--no-jobs", action="store_true",
+                        help="Не сохранять прогресс (прерванный прогон придётся начинать заново)")
+    parser.add_argument("--max-attempts", type=int, default=3,
+                        help="Сколько раз resume повторяет упавший URL")
+    return parser
+
+
+def build_resume_parser():
+    parser = argparse.ArgumentParser(prog="batch_parser.py resume",
+                                     description="Продолжить прерванное задание")
+    parser.add_argument("job", nargs="?", default=None,
+                        help="id задания (без него - список незавершённых заданий)")
+    parser.add_argument("--jobs", default="jobs.sqlite", help="Файл хранилища заданий")
+    parser.add_argument("--max-attempts", type=int, default=3,
+                        help="Упавшие URL повторяются, пока попыток меньше этого числа")
+    return parser
+
+
+def make_engine(args, template):
+    """BatchEngine по аргументам командной строки"""
+    cache = None
+    if args.cache or args.offline:
+        cache = ResponseCache(args.cache or "cache", ttl=args.cache_ttl,
+                              max_size=args.cache_size * 1024 * 1024, offline=args.offline)
+
+    rate_limiter = None
+    if args.adaptive or args.robots:
+        rate_limiter = HostRateLimiter(rate=args.rate, max_rate=args.max_rate,
+                                       max_concurrency=args.workers, respect_robots=args.robots)
+
+    metrics = None
+    if args.metrics_json or args.metrics_prom:
+        exporters = []
+        if args.metrics_json:
+            exporters.append(JsonExporter(args.metrics_json))
+        if args.metrics_prom:
+            exporters.append(PrometheusExporter(args.metrics_prom))
+        metrics = Metrics(exporters)
+
+    return BatchEngine(
+        template,
+        workers=args.workers,
+        use_selenium=args.selenium,
+        retries=args.retries,
+        delay=args.delay,
+        use_async=args.use_async,
+        per_host=args.per_host,
+        parser=args.parser,
+        cache=cache,
+        processes=args.processes,
+        rate_limiter=rate_limiter,
+        prune=args.prune,
+        verify_prune=args.verify_prune,
+        fingerprints=FingerprintStore(args.fingerprints) if args.fingerprints else None,
+        metrics=metrics,
+        buffer_size=args.buffer_rows
+    )
+
+
+def progress(done, total, url, ok):
+    mark = "✅" if ok else "❌"
+    print(f"{mark} {done}/{total}: {url[:80]}")
+
+
+def print_summary(stats, output, elapsed):
+    print(f"Готово! Обработано {stats['success']} из {stats['total']} за {elapsed:.1f} с")
+    if stats['unchanged']:
+        print(f"Не изменились с прошлого прогона: {stats['unchanged']} (взяты без разбора)")
+    if stats['encodings']:
+        methods = ", ".join(f"{method}: {count}" for method, count in stats['encodings'].items())
+        print(f"Кодировки определены ({methods})")
+    print_metrics(stats['metrics'])
+    print(f"Результат в {output}")
+
+
+def print_metrics(summary):
+    """Где ушло время (этапы) и какие поля чаще всего не находятся"""
+    if not summary['stages']:
+        return
+    print("⏱️ Этапы (всего / среднее / p99):")
+    for stage, stats in sorted(summary['stages'].items(), key=lambda item: -item[1]['total_s']):
+        print(f"   {stage:10s} {stats['total_s']:9.2f} с {stats['mean_ms']:9.2f} мс {stats['p99_ms']:9.2f} мс")
+    # Время CSS полей не делится по полям: все селекторы проверяются за один обход (этап match)
+    missed = [(name, stats) for name, stats in summary['fields'].items() if stats['misses']]
+    for name, stats in sorted(missed, key=lambda item: (-item[1]['misses'], item[0]))[:5]:
+        print(f"   поле {name}: не найдено на {stats['misses']} из {stats['hits'] + stats['misses']} страниц")
+
+
+def run_job(store, job_id, args, template, max_attempts):
+    """Прогнать задание из хранилища и вывести итог"""
+    engine = make_engine(args, template)
+    job = store.get_job(job_id)
+
+    started = time.time()
+    stats = engine.run_job(store, job_id, max_attempts, progress=progress)
+    elapsed = time.time() - started
+
+    print_summary(stats, job['output'], elapsed)
+    counts = stats['job']
+    print(f"Задание {job_id}: готово {counts['done']} из {counts['total']}, с ошибками {counts['failed']}")
+    if store.remaining(job_id, max_attempts):
+        print(f"Продолжить: python batch_parser.py resume {job_id}")
+    return 0 if counts['done'] else 1
+
+
+def resume(argv):
+    args = build_resume_parser().parse_args(argv)
+    store = JobStore(args.jobs)
+    try:
+        if args.job is None:
+            jobs = [job for job in store.list_jobs(args.max_attempts) if job['remaining']]
+            if not jobs:
+                print("Незавершённых заданий нет")
+            for job in jobs:
+                print(f"{job['id']}: {job['source']} -> {job['output']} "
+                      f"(готово {job['done']} из {job['total']}, с ошибками {job['failed']})")
+            return 0
+
+        job = store.get_job(args.job)
+        if job is None:
+            print(f"❌ Задание {args.job} не найдено в {args.jobs}")
+            return 1
+
+        # Те же параметры, что при первом запуске; шаблон - сохранённый в задании
+        job_args = build_arg_parser().parse_args(job['options'].get('argv', []))
+        print(f"🗂️ Продолжаем задание {args.job}: осталось {store.remaining(args.job, args.max_attempts)} URL")
+        return run_job(store, args.job, job_args, job['template'], args.max_attempts)
+    finally:
+        store.close()
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else list(argv)
+    if argv and argv[0] == "resume":
+        return resume(argv[1:])
+
+    args = build_arg_parser().parse_args(argv)
+
+    template = BatchEngine.load_template(args.template)
+    urls = BatchEngine.load_urls(args.urls, args.column)
+    if not urls:
+        print("❌ Ссылки не найдены")
+        return 1
+
+    if args.no_jobs:
+        engine = make_engine(args, template)
+        started = time.time()
+        stats = engine.run(urls, args.output, args.sheet, progress=progress)
+        print_summary(stats, args.output, time.time() - started)
+        return 0 if stats['success'] else 1
+
+    # Задание в хранилище: после падения можно продолжить командой resume
+    store = JobStore(args.jobs)
+    try:
+        job_id = store.create_job(urls, template, args.output, args.sheet,
+                                  source=args.urls, options={'argv': argv})
+        print(f"🗂️ Задание {job_id} ({len(urls)} URL), хранилище {args.jobs}")
+        return run_job(store, job_id, args, template, args.max_attempts)
+    finally:
+        store.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,204 @@
+# benchmarks/corpus.py
+"""
+Корпус страниц для бенчмарков
+
+    python benchmarks/corpus.py                    # пересоздать страницы rambler/ (синтетические)
+    python benchmarks/corpus.py --record URL ...   # сохранить настоящие страницы в rambler/
+
+Страницы rambler/ повторяют разметку рецептов eda.rambler.ru, на которую
+рассчитан шаблон "Рецепты с Рамблера" (Next.js, css-* классы, itemprop,
+__NEXT_DATA__, JSON-LD, большие встроенные скрипты и SVG). Большие
+страницы генерируются на лету (large_page) - в репозиторий не кладутся.
+"""
+import argparse
+import hashlib
+import json
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+CORPUS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "corpus")
+RAMBLER_DIR = os.path.join(CORPUS_DIR, "rambler")
+
+DISHES = [
+    ("Салат Цезарь", "salaty", "Итальянская кухня"),
+    ("Борщ классический", "supy", "Украинская кухня"),
+    ("Плов с бараниной", "osnovnye-blyuda", "Узбекская кухня"),
+    ("Сырники из творога", "zavtraki", "Русская кухня"),
+    ("Паста карбонара", "pasta-picca", "Итальянская кухня"),
+    ("Хачапури по-аджарски", "vypechka-deserty", "Грузинская кухня"),
+]
+INGREDIENTS = [
+    ("Куриное филе", "300 г"), ("Салат романо", "1 кочан"), ("Сыр пармезан", "50 г"),
+    ("Чеснок", "2 зубчика"), ("Оливковое масло", "3 ст. л."), ("Батон", "4 ломтика"),
+    ("Яйцо куриное", "2 шт."), ("Лимонный сок", "1 ч. л."), ("Соль", "по вкусу"),
+    ("Перец черный молотый", "по вкусу"), ("Картофель", "3 шт."), ("Свекла", "1 шт."),
+    ("Морковь", "1 шт."), ("Лук репчатый", "1 шт."), ("Творог", "400 г"), ("Мука", "100 г"),
+]
+STEP_TEXT = [
+    "Подготовьте все ингредиенты: промойте и обсушите овощи.",
+    "Нарежьте филе небольшими кусочками и обжарьте на сильном огне до золотистой корочки.",
+    "Смешайте соус в отдельной миске, добавьте специи и хорошо перемешайте.",
+    "Выложите всё на блюдо, полейте соусом и подавайте сразу же.",
+    "Доведите до кипения, убавьте огонь и варите под крышкой 20 минут.",
+    "Дайте блюду настояться 10 минут перед подачей.",
+]
+
+
+def _svg_icon(rng) -> str:
+    points = " ".join(f"L{rng.randint(0, 24)} {rng.randint(0, 24)}" for _ in range(12))
+    return f'<svg width="24" height="24" viewBox="0 0 24 24"><path d="M0 0{points}Z" fill="#333"/></svg>'
+
+
+def rambler_page(n: int) -> str:
+    """Страница рецепта в разметке eda.rambler.ru (детерминированная по n)"""
+    rng = random.Random(n)
+    title, category, cuisine = DISHES[n % len(DISHES)]
+    title = f"{title} №{n + 1}"
+    ingredients = rng.sample(INGREDIENTS, rng.randint(6, 12))
+    steps = [rng.choice(STEP_TEXT) for _ in range(rng.randint(4, 9))]
+    kcal, protein, fat, carbs = rng.randint(120, 700), rng.randint(5, 40), rng.randint(3, 35), rng.randint(10, 90)
+    minutes = rng.choice([15, 20, 30, 45, 60, 90])
+
+    ingredient_html = "".join(
+        f'<div class="css-1oyy8lz emjulz10"><div class="css-1xdhyk6"><span class="css-1w6jg5q">'
+        f'<span itemprop="recipeIngredient">{name}</span></span>{_svg_icon(rng)}'
+        f'<span class="css-bsdd3p">{amount}</span></div></div>'
+        for name, amount in ingredients
+    )
+    step_html = "".join(
+        f'<li class="css-1gqgq3p emyl4ns0"><div class="css-1v9fwg2"><div class="css-0">'
+        f'<span class="css-1rbnm0i">Шаг {i + 1}</span></div>'
+        f'<span itemprop="text" class="css-1kcyq31">{text}</span></div></li>'
+        for i, text in enumerate(steps)
+    )
+    related = "".join(
+        f'<div class="css-1x3ub0v"><a href="/recepty/{category}/recept-{rng.randint(1000, 99999)}">'
+        f'{_svg_icon(rng)}<span class="css-xf7qpl">{rng.choice(DISHES)[0]}</span></a>'
+        f'<div class="css-9e0zn5"><span>{rng.randint(1, 500)} лайков</span></div></div>'
+        for _ in range(40)
+    )
+    footer = "".join(
+        f'<li class="css-qf8n3m"><a href="/section/{i}">Раздел {i}</a>{_svg_icon(rng)}</li>' for i in range(60)
+    )
+    inline_script = "".join(
+        f'window.__chunk{i}=function(e,t,n){{"use strict";var r=n({rng.randint(1, 99999)});'
+        f'e.exports=r.default||r;}};' for i in range(800)
+    )
+    style = "".join(f'.css-{i:x}{{margin:{i % 17}px;padding:{i % 11}px;color:#{i % 4096:03x}}}' for i in range(1200))
+
+    next_data = {
+        "props": {"pageProps": {"initialState": {"recipe": {
+            "id": 114535 + n, "title": title, "category": category, "cuisine": cuisine,
+            "cookingTime": minutes, "nutrition": {"kcal": kcal, "protein": protein, "fat": fat, "carbs": carbs},
+            "ingredients": [{"name": name, "amount": amount} for name, amount in ingredients],
+            "steps": [{"text": text} for text in steps],
+        }}}},
+        "page": "/recepty/[category]/[recipe]", "buildId": "bench",
+    }
+    json_ld = {
+        "@context": "https://schema.org", "@type": "Recipe", "name": title,
+        "recipeCuisine": cuisine, "recipeIngredient": [name for name, _ in ingredients],
+        "nutrition": {"@type": "NutritionInformation", "calories": f"{kcal} ккал"},
+    }
+
+    return f'''<!DOCTYPE html><html lang="ru"><head><meta charset="utf-8">
+<title>{title} - рецепт с фото на Еде</title>
+<style data-emotion="css">{style}</style>
+<script>{inline_script}</script>
+<script type="application/ld+json">{json.dumps(json_ld, ensure_ascii=False)}</script>
+</head><body>
+<div id="__next"><main><div><div><div>
+<div class="css-19rdt1j"><div class="css-ifgo2i ev25qvo0">
+<div class="css-1h7uuyv"><span><h1 class="css-15fh4nt">{title}</h1></span></div>
+<div class="css-fj09nl"><div class="css-1n7zanv"><span class="css-1ipy7jx">Время приготовления</span><span><div class="css-my9yfq">{minutes} минут</div></span></div></div>
+<div class="css-13pa6yw"><div><nav><ul><li><a href="/"><span>Главная</span></a></li><li><a href="/recepty"><span>Рецепты</span></a></li><li><a href="/kuhni"><span>{cuisine}</span></a></li></ul></nav></div></div>
+</div></div>
+<div class="css-1509vkh"><div class="css-1ik2huf"><div class="css-1bpeio7"><span><div>
+<div><span>{kcal} ккал</span></div><div>Белки {protein} г</div><div>Жиры {fat} г</div><div>Углеводы {carbs} г</div>
+</div></span></div></div>
+<div class="css-1b6o7ru">{ingredient_html}</div>
+<ol class="css-0">{step_html}</ol>
+</div>
+<div class="css-1pe3qyv">{related}</div>
+</div></div></div></main>
+<footer class="css-1w0kycy"><ul>{footer}</ul></footer></div>
+<script id="__NEXT_DATA__" type="application/json">{json.dumps(next_data, ensure_ascii=False)}</script>
+</body></html>'''
+
+
+def large_page(target_bytes: int = 2 * 1024 * 1024, seed: int = 0) -> str:
+    """
+    Большая страница (~target_bytes): рецепт в окружении огромных скриптов,
+    SVG и длинных списков, как у тяжёлых страниц каталога
+    """
+    rng = random.Random(seed)
+    page = rambler_page(seed)
+    head, tail = page.split('<div class="css-1pe3qyv">', 1)
+
+    blocks = []
+    size = len(page)
+    i = 0
+    while size < target_bytes:
+        block = (
+            f'<section class="css-feed{i % 50}"><h3>Подборка {i}</h3><ul>'
+            + "".join(f'<li class="css-it{j}"><a href="/r/{rng.randint(1, 10 ** 6)}">Рецепт {j}</a>'
+                      f'{_svg_icon(rng)}<p>Описание рецепта {i}-{j} с подробностями</p></li>' for j in range(20))
+            + f'</ul><script>window.__feed{i}={json.dumps([rng.random() for _ in range(50)])};</script></section>'
+        )
+        blocks.append(block)
+        size += len(block)
+        i += 1
+
+    return head + '<div class="css-1pe3qyv">' + "".join(blocks) + tail
+
+
+def load_corpus(directory: str = RAMBLER_DIR):
+    """[(имя файла, bytes)] сохранённых страниц"""
+    pages = []
+    for name in sorted(os.listdir(directory)):
+        if name.endswith(".html"):
+            with open(os.path.join(directory, name), "rb") as f:
+                pages.append((name, f.read()))
+    return pages
+
+
+def record(urls, directory: str = RAMBLER_DIR):
+    """Сохранить настоящие страницы в корпус"""
+    from core.parser_engine import ParserEngine
+
+    engine = ParserEngine()
+    os.makedirs(directory, exist_ok=True)
+    for url in urls:
+        content = engine.fetch_bytes(url)
+        if content is None:
+            continue
+        name = "recorded_" + hashlib.sha1(url.encode("utf-8")).hexdigest()[:10] + ".html"
+        with open(os.path.join(directory, name), "wb") as f:
+            f.write(content)
+        print(f"💾 {url} -> {name}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Корпус страниц для бенчмарков")
+    parser.add_argument("--pages", type=int, default=6, help="Сколько синтетических страниц создать")
+    parser.add_argument("--record", nargs="+", metavar="URL", help="Сохранить настоящие страницы")
+    args = parser.parse_args(argv)
+
+    if args.record:
+        record(args.record)
+        return 0
+
+    os.makedirs(RAMBLER_DIR, exist_ok=True)
+    for n in range(args.pages):
+        path = os.path.join(RAMBLER_DIR, f"recipe_{n:02d}.html")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(rambler_page(n))
+        print(f"💾 {path}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
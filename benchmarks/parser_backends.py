@@ -0,0 +1,84 @@
+# benchmarks/parser_backends.py
+"""
+Сравнение движков разбора HTML на страницах шаблона
+
+Пример:
+    python benchmarks/parser_backends.py "templates/Рецепты с Рамблера.json" page1.html page2.html
+Если страницы не указаны - загружается URL из шаблона.
+Проверяет, что все движки извлекают одинаковые данные, и печатает ускорение
+относительно html.parser.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.html_backends import available_backends
+from core.parser_engine import ParserEngine
+
+
+def extract_fields(engine, soup, fields):
+    """Все поля шаблона (как CSS селекторы) со всех элементов"""
+    return {
+        name: engine.extract_css(soup, config['selector'])
+        for name, config in fields.items()
+        if config.get('selector')
+    }
+
+
+def bench_backend(backend, pages, fields, repeat):
+    """Время разбора+извлечения одной страницы (мс) и результат извлечения"""
+    engine = ParserEngine(parser=backend)
+    results = []
+    started = time.perf_counter()
+    for _ in range(repeat):
+        results = [extract_fields(engine, engine.load_from_html(html), fields) for html in pages]
+    elapsed = time.perf_counter() - started
+    return elapsed * 1000 / (repeat * len(pages)), results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Сравнение движков разбора HTML")
+    parser.add_argument("template", help="JSON шаблон конструктора")
+    parser.add_argument("pages", nargs="*", help="Сохранённые HTML страницы")
+    parser.add_argument("--repeat", type=int, default=5, help="Сколько раз повторить прогон")
+    args = parser.parse_args(argv)
+
+    with open(args.template, "r", encoding="utf-8") as f:
+        template = json.load(f)
+    fields = template.get('fields', {})
+
+    pages = []
+    for path in args.pages:
+        with open(path, "rb") as f:
+            pages.append(ParserEngine()._decode_content(f.read()))
+
+    if not pages:
+        soup = ParserEngine(parser="html.parser").load_from_url(template['url'])
+        if soup is None:
+            print("❌ Нет страниц для замера")
+            return 1
+        pages.append(str(soup))
+
+    timings = {}
+    reference = None
+    for backend in available_backends():
+        ms, results = bench_backend(backend, pages, fields, args.repeat)
+        timings[backend] = ms
+        if reference is None:
+            reference = results
+        mark = "✅" if results == reference else "❌ результаты отличаются"
+        print(f"{backend:12s} {ms:8.2f} мс/стр {mark}")
+
+    base = timings.get("html.parser")
+    if base:
+        for backend, ms in timings.items():
+            print(f"{backend:12s} ускорение x{base / ms:.1f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,291 @@
+# benchmarks/suite.py
+"""
+Бенчмарки на сохранённом корпусе страниц (без сети)
+
+    python benchmarks/suite.py                          # замер и сравнение с benchmarks/baseline.json
+    python benchmarks/suite.py --save-baseline          # записать текущие результаты как эталон
+    python benchmarks/suite.py --quick --strict         # быстрый прогон, код 1 при замедлении
+
+Этапы: decode (ParserEngine._decode_content), load_from_html, extract (BatchEngine.extract_row),
+apply_schema (SchemaEngine), apply_format (TransformEngine), export (MappingEngine в .xlsx).
+Для каждого этапа - перцентили задержки; для корпуса - страниц в секунду и пик памяти.
+Извлечённые данные тоже сравниваются с эталоном (отпечаток результатов).
+"""
+import argparse
+import hashlib
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+from collections import defaultdict
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, ROOT)
+sys.path.insert(0, BENCH_DIR)
+
+from corpus import large_page, load_corpus
+from core.batch_engine import BatchEngine
+from core.mapping_engine import MappingEngine
+from core.models import FieldSchema, FormatConfig, Schema, SourceConfig
+from core.parser_engine import ParserEngine
+from core.schema_engine import SchemaEngine
+from core.transform_engine import TransformEngine
+
+TEMPLATES = {
+    "rambler": os.path.join(ROOT, "templates", "Рецепты с Рамблера.json"),
+    "eda_rambler": os.path.join(ROOT, "eda_rambler_template.json"),
+}
+BASELINE = os.path.join(BENCH_DIR, "baseline.json")
+
+# Форматирование, на котором меряется apply_format
+FORMATS = [
+    FormatConfig(normalize_whitespace=True),
+    FormatConfig(remove_text=["ккал", " г"], convert_to_number=True),
+    FormatConfig(regex_pattern=r"(\d+)", regex_group=1, convert_to_number=True, multiply_by=2, round_to=1),
+]
+
+
+def schema_from_template(name, template):
+    """Схема из шаблона конструктора: CSS поля, числа - с преобразованием"""
+    schema = Schema(name=name)
+    for field_name, config in template.get('fields', {}).items():
+        if not config.get('selector'):
+            continue
+        data_type = config.get('type', 'text')
+        schema.fields[field_name] = FieldSchema(
+            name=field_name,
+            data_type=data_type,
+            source=SourceConfig(type="css", selector=config['selector']),
+            format=FormatConfig(
+                normalize_whitespace=True,
+                convert_to_number=data_type == 'number',
+                separator=config.get('separator')
+            )
+        )
+    return schema
+
+
+def percentile(values, q):
+    """Перцентиль q (0..100) по ближайшему рангу"""
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, int(round(q / 100 * len(ordered) + 0.5)) - 1))
+    return ordered[index]
+
+
+class Recorder:
+    """Задержки по этапам"""
+
+    def __init__(self):
+        self.samples = defaultdict(list)
+
+    def measure(self, stage, func, *args):
+        started = time.perf_counter()
+        result = func(*args)
+        self.samples[stage].append((time.perf_counter() - started) * 1000)
+        return result
+
+    def summary(self):
+        return {
+            stage: {
+                "count": len(values),
+                "mean_ms": round(sum(values) / len(values), 3),
+                "p50_ms": round(percentile(values, 50), 3),
+                "p90_ms": round(percentile(values, 90), 3),
+                "p99_ms": round(percentile(values, 99), 3),
+            }
+            for stage, values in sorted(self.samples.items())
+        }
+
+
+def pipeline(recorder, prefix, engine, batch, content):
+    """decode -> load_from_html -> extract для одной страницы"""
+    text = recorder.measure(f"{prefix}.decode", engine._decode_content, content)
+    soup = recorder.measure(f"{prefix}.load_from_html", engine.load_from_html, text)
+    row = recorder.measure(f"{prefix}.extract", batch.extract_row, soup)
+    return soup, row
+
+
+def digest(rows):
+    data = json.dumps(rows, ensure_ascii=False, sort_keys=True)
+    return hashlib.sha1(data.encode("utf-8")).hexdigest()[:16]
+
+
+def peak_memory_mb(func):
+    """Пик выделенной Python памяти за вызов (МБ)"""
+    tracemalloc.start()
+    try:
+        func()
+        return round(tracemalloc.get_traced_memory()[1] / 1024 / 1024, 2)
+    finally:
+        tracemalloc.stop()
+
+
+def run(repeat, large_pages, export_rows):
+    corpus = load_corpus()
+    if not corpus:
+        raise SystemExit("❌ Корпус пуст: запустите python benchmarks/corpus.py")
+
+    recorder = Recorder()
+    engine = ParserEngine(parser="lxml")
+    schema_engine = SchemaEngine()
+    transformer = TransformEngine()
+    results = {"pages_per_sec": {}, "peak_memory_mb": {}, "results_digest": {}}
+
+    for name, path in TEMPLATES.items():
+        with open(path, "r", encoding="utf-8") as f:
+            template = json.load(f)
+        batch = BatchEngine(template, parser="lxml")
+        schema = schema_engine.compile(schema_from_template(name, template))
+
+        rows = []
+        started = time.perf_counter()
+        for _ in range(repeat):
+            rows = []
+            for _, content in corpus:
+                soup, row = pipeline(recorder, name, engine, batch, content)
+                rows.append(row)
+                recorder.measure(f"{name}.apply_schema", schema_engine.apply_schema, soup, schema, engine)
+        elapsed = time.perf_counter() - started
+        results["pages_per_sec"][name] = round(repeat * len(corpus) / elapsed, 2)
+        results["results_digest"][name] = digest(rows)
+        results["peak_memory_mb"][name] = peak_memory_mb(
+            lambda: [pipeline(Recorder(), name, engine, batch, content) for _, content in corpus]
+        )
+
+        # Форматирование всех извлечённых значений (x50, чтобы замер не тонул в шуме)
+        values = [value for row in rows for value in row.values()] * 50
+        for _ in range(repeat):
+            for config in FORMATS:
+                recorder.measure("apply_format", lambda: [transformer.apply_format(v, config) for v in values])
+
+        # Экспорт в Excel (потоковая запись)
+        export_data = (rows * (export_rows // len(rows) + 1))[:export_rows]
+        with tempfile.TemporaryDirectory() as folder:
+            path = os.path.join(folder, "bench.xlsx")
+
+            def export():
+                with MappingEngine().open_writer(path, "Рецепты", batch.columns) as writer:
+                    writer.write_rows(export_data)
+
+            recorder.measure("export", export)
+
+    # Большие синтетические страницы
+    with open(TEMPLATES["rambler"], "r", encoding="utf-8") as f:
+        batch = BatchEngine(json.load(f), parser="lxml")
+    pages = [large_page(seed=seed).encode("utf-8") for seed in range(large_pages)]
+    started = time.perf_counter()
+    for content in pages:
+        pipeline(recorder, "large", engine, batch, content)
+    results["pages_per_sec"]["large"] = round(len(pages) / (time.perf_counter() - started), 2)
+    results["peak_memory_mb"]["large"] = peak_memory_mb(
+        lambda: pipeline(Recorder(), "large", engine, batch, pages[0])
+    )
+
+    results["stages"] = recorder.summary()
+    results["meta"] = {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "corpus_pages": len(corpus),
+        "repeat": repeat,
+        "export_rows": export_rows,
+    }
+    return results
+
+
+def print_results(results):
+    print(f"{'этап':32s} {'p50':>9s} {'p90':>9s} {'p99':>9s}  (мс)")
+    for stage, stats in results["stages"].items():
+        print(f"{stage:32s} {stats['p50_ms']:9.2f} {stats['p90_ms']:9.2f} {stats['p99_ms']:9.2f}")
+    for name, value in results["pages_per_sec"].items():
+        print(f"📄 {name}: {value} стр/с, пик памяти {results['peak_memory_mb'][name]} МБ")
+
+
+def compare(results, baseline, threshold):
+    """Сравнить с эталоном; вернуть список замедлений/расхождений"""
+    problems = []
+
+    settings = ("repeat", "export_rows")
+    if any(results["meta"].get(key) != baseline.get("meta", {}).get(key) for key in settings):
+        print("⚠️ Параметры прогона отличаются от эталона - сравнение приблизительное")
+
+    for name, value in results["results_digest"].items():
+        expected = baseline.get("results_digest", {}).get(name)
+        if expected and expected != value:
+            problems.append(f"{name}: извлечённые данные отличаются от эталона")
+
+    for stage, stats in results["stages"].items():
+        base = baseline.get("stages", {}).get(stage)
+        if not base:
+            continue
+        ratio = stats["p50_ms"] / base["p50_ms"] if base["p50_ms"] else 1.0
+        mark = "🔺" if ratio > 1 + threshold else ("🔻" if ratio < 1 - threshold else "  ")
+        print(f"{mark} {stage:32s} p50 {base['p50_ms']:8.2f} -> {stats['p50_ms']:8.2f} мс ({ratio - 1:+.0%})")
+        if ratio > 1 + threshold:
+            problems.append(f"{stage}: медленнее на {ratio - 1:.0%}")
+
+    for name, value in results["pages_per_sec"].items():
+        base = baseline.get("pages_per_sec", {}).get(name)
+        if base and value < base * (1 - threshold):
+            problems.append(f"{name}: {value} стр/с вместо {base}")
+
+    for name, value in results["peak_memory_mb"].items():
+        base = baseline.get("peak_memory_mb", {}).get(name)
+        if base and value > base * (1 + threshold):
+            problems.append(f"{name}: пик памяти {value} МБ вместо {base}")
+
+    return problems
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Бенчмарки на сохранённом корпусе страниц")
+    parser.add_argument("--repeat", type=int, default=5, help="Сколько раз прогнать корпус")
+    parser.add_argument("--large-pages", type=int, default=3, help="Сколько больших страниц (~2 МБ)")
+    parser.add_argument("--export-rows", type=int, default=5000, help="Строк в замере экспорта")
+    parser.add_argument("--quick", action="store_true", help="Быстрый прогон (repeat=1, 1 большая страница)")
+    parser.add_argument("--baseline", default=BASELINE, help="Файл эталона")
+    parser.add_argument("--save-baseline", action="store_true", help="Записать результаты как эталон")
+    parser.add_argument("--output", default=None, help="Сохранить результаты в JSON")
+    parser.add_argument("--threshold", type=float, default=0.15,
+                        help="Допустимое отклонение от эталона (0.15 = 15%%)")
+    parser.add_argument("--strict", action="store_true", help="Код возврата 1 при замедлении")
+    args = parser.parse_args(argv)
+
+    if args.quick:
+        args.repeat, args.large_pages, args.export_rows = 1, 1, 1000
+
+    results = run(args.repeat, args.large_pages, args.export_rows)
+    print_results(results)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+
+    if args.save_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+        print(f"💾 Эталон сохранён: {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print("⚠️ Эталона нет - запустите с --save-baseline")
+        return 0
+
+    with open(args.baseline, "r", encoding="utf-8") as f:
+        baseline = json.load(f)
+    problems = compare(results, baseline, args.threshold)
+    if problems:
+        print("❌ Отличия от эталона:")
+        for problem in problems:
+            print(f"   {problem}")
+        return 1 if args.strict else 0
+
+    print("✅ В пределах эталона")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,471 @@
+# core/batch_engine.py
+import asyncio
+import json
+import os
+import threading
+from collections import deque
+from contextlib import closing, contextmanager
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Tuple
+
+from core.driver_pool import DriverPool
+from core.encoding_detector import EncodingDetector
+from core.parser_engine import DEFAULT_HEADERS, ParserEngine
+from core.mapping_engine import MappingEngine
+from core.metrics import NULL_METRICS, Metrics
+from core.parse_filter import ParseFilter
+from core.schema_engine import SchemaEngine
+from core.template_compiler import compile_template
+from core.transform_engine import join_values  # noqa: F401 - раньше жила здесь
+
+# Состояние процесса-разборщика (см. BatchEngine processes)
+_process_engine = None
+
+
+def _init_process_worker(template: Dict, parser_backend: Optional[str], prune: bool, verify_prune: bool,
+                         collect_metrics: bool = False):
+    """Инициализация процесса: шаблон и ParserEngine создаются один раз на процесс"""
+    global _process_engine
+    _process_engine = BatchEngine(template, workers=1, parser=parser_backend,
+                                  prune=prune, verify_prune=verify_prune,
+                                  metrics=Metrics() if collect_metrics else None)
+
+
+def _extract_in_process(content: bytes, url: str, charset: Optional[str]) -> Tuple[Optional[Dict], Optional[Dict]]:
+    """
+    Разобрать скачанную страницу в процессе-разборщике
+    Возвращает (строка, замеры процесса для Metrics.merge)
+    """
+    try:
+        row = _process_engine.parse_row(content, url, charset)
+    except Exception as e:
+        print(f"❌ Ошибка разбора страницы: {e}")
+        row = None
+    return row, _process_engine.metrics.drain()
+
+
+class BatchEngine:
+    """Пакетный парсинг списка URL по шаблону конструктора (без GUI)"""
+
+    def __init__(self, template: Dict, workers: int = 8, use_selenium: bool = False,
+                 retries: int = 3, delay: float = 1, use_async: bool = False, per_host: int = 8,
+                 parser: Optional[str] = None, cache=None, processes: int = 0, rate_limiter=None,
+                 prune: bool = False, verify_prune: bool = False, fingerprints=None, metrics=None,
+                 buffer_size: Optional[int] = None):
+        """
+        template: шаблон в формате конструктора ({'url': ..., 'fields': {...}})
+        workers: сколько страниц загружать одновременно
+        retries, delay: передаются в ParserEngine.load_from_url
+        use_async: загружать через asyncio (ParserEngine.afetch_bytes) вместо потоков
+        per_host: ограничение одновременных запросов к одному сайту (для use_async)
+        parser: движок разбора HTML; если не указан - берётся из шаблона ('parser'), иначе 'auto'
+        cache: общий для всех потоков кэш ответов (storage.response_cache.ResponseCache)
+        processes: сколько процессов разбирают HTML (0 - разбор в потоках загрузки);
+                   потоки только скачивают, разбор и извлечение идут на всех ядрах
+        rate_limiter: общий для всех потоков HostRateLimiter (вместо фиксированной задержки delay)
+        prune: строить только части дерева, нужные селекторам шаблона (core.parse_filter)
+        verify_prune: разбирать каждую страницу ещё и целиком и сравнивать результат
+                      (проверка фильтра; при расхождении берётся полный результат)
+        fingerprints: storage.fingerprint_store.FingerprintStore - если тело страницы
+                      не изменилось с прошлого прогона, строка берётся оттуда без разбора
+        metrics: core.metrics.Metrics - время этапов и попадания полей;
+                 экспортируется в конце run / run_job
+        buffer_size: строк в порции записи результата (для .parquet - размер record batch);
+                     формат результата выбирается по расширению файла (см. core.sinks)
+        """
+        self.template = template
+        self.fields = template.get('fields', {})
+        self.workers = max(1, int(workers))
+        self.use_selenium = use_selenium
+        self.retries = retries
+        self.delay = delay
+        self.use_async = use_async
+        self.per_host = per_host
+        self.parser_backend = parser or template.get('parser')
+        self.cache = cache
+        self.rate_limiter = rate_limiter
+        self.driver_pool = None
+        self.processes = max(0, int(processes))
+        self.prune = prune or verify_prune
+        self.verify_prune = verify_prune
+        self.parse_filter = ParseFilter.from_template(template) if self.prune else None
+        self.encoding_detector = EncodingDetector()
+        self.errors: Dict[str, str] = {}  # url -> текст последней ошибки (для JobStore)
+        self.fingerprints = fingerprints
+        self.metrics = metrics or NULL_METRICS
+        self.buffer_size = buffer_size
+        # Поля шаблона извлекаются тем же движком, что и схемы (SchemaEngine)
+        self.schema_engine = SchemaEngine(self.metrics)
+        self.schema = self.schema_engine.compile(compile_template(template))
+        self._local = threading.local()
+
+    @staticmethod
+    def load_template(filepath: str) -> Dict:
+        """Загрузить шаблон, сохранённый конструктором"""
+        with open(filepath, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    @staticmethod
+    def load_urls(source: str, column: Optional[str] = None) -> List[str]:
+        """
+        Загрузить список URL
+        source: .xlsx/.xls, .csv или текстовый файл (одна ссылка на строку)
+        column: колонка с ссылками (по умолчанию - первая)
+        """
+        ext = os.path.splitext(source)[1].lower()
+
+        if ext in ('.xlsx', '.xls', '.csv'):
+            import pandas as pd
+            df = pd.read_csv(source) if ext == '.csv' else pd.read_excel(source)
+            if column is None:
+                column = df.columns[0]
+            values = df[column].tolist()
+        else:
+            with open(source, "r", encoding="utf-8") as f:
+                values = f.read().splitlines()
+
+        urls = []
+        for value in values:
+            if isinstance(value, str) and value.strip():
+                urls.append(value.strip())
+        return urls
+
+    @property
+    def columns(self) -> List[str]:
+        """Колонки результата (поля с селекторами)"""
+        return [name for name, config in self.fields.items() if config.get('selector')]
+
+    @property
+    def column_types(self) -> Dict[str, str]:
+        """
+        Типы колонок для Parquet: поля конструктора всегда дают текст
+        (число - тоже строка цифр), поэтому схема файла не зависит от первой порции
+        """
+        return {name: "string" for name in self.columns}
+
+    @property
+    def unchanged(self) -> int:
+        """Сколько страниц не изменились (строка из fingerprints, без разбора)"""
+        return self.schema_engine.unchanged
+
+    def _get_parser(self) -> ParserEngine:
+        """Свой ParserEngine на каждый поток (requests.Session не потокобезопасна)"""
+        parser = getattr(self._local, 'parser', None)
+        if parser is None:
+            parser = ParserEngine(use_selenium=self.use_selenium, parser=self.parser_backend,
+                                  cache=self.cache, driver_pool=self.driver_pool,
+                                  rate_limiter=self.rate_limiter, parse_filter=self.parse_filter,
+                                  encoding_detector=self.encoding_detector, metrics=self.metrics)
+            self._local.parser = parser
+        return parser
+
+    def extract_row(self, soup) -> Dict:
+        """Извлечь строку по полям шаблона (как в конструкторе)"""
+        return self._pop_errors(self.schema_engine.apply_schema(soup, self.schema, self._get_parser()))
+
+    def parse_row(self, content: bytes, url: str = "", charset: Optional[str] = None) -> Dict:
+        """
+        Разобрать скачанную страницу и извлечь строку (SchemaEngine.apply_to_bytes):
+        без дерева, если все поля из JSON; из fingerprints, если страница не изменилась;
+        с проверкой фильтра, если verify_prune
+        charset: кодировка из заголовка ответа (если страница скачана в другом процессе)
+        """
+        parser = self._get_parser()
+        if charset is None and url:
+            charset = parser.header_charset(url)
+
+        row = self.schema_engine.apply_to_bytes(content, self.schema, parser, url=url or None,
+                                                fingerprints=self.fingerprints, charset=charset,
+                                                verify_filter=self.verify_prune)
+        return self._pop_errors(row)
+
+    @staticmethod
+    def _pop_errors(row: Dict) -> Dict:
+        errors = row.pop('_errors', None)
+        if errors:
+            print(f"⚠️ {'; '.join(errors)}")
+        return row
+
+    def process_url(self, url: str) -> Optional[Dict]:
+        """Загрузить одну страницу и извлечь данные (вызывается из рабочих потоков)"""
+        try:
+            if not self.use_selenium:
+                # Через байты: для шаблонов только из JSON дерево не строится (parse_row)
+                content = self._get_parser().fetch_bytes(url, retries=self.retries, delay=self.delay)
+                return self.parse_row(content, url) if content is not None else None
+
+            soup = self._get_parser().load_from_url(url, retries=self.retries, delay=self.delay)
+            if soup is None:
+                return None
+            return self.extract_row(soup)
+        except Exception as e:
+            print(f"❌ Ошибка обработки {url}: {e}")
+            self.errors[url] = str(e)
+            return None
+
+    def _parse_safely(self, url: str, content: Optional[bytes], charset: Optional[str] = None) -> Optional[Dict]:
+        """parse_row с перехватом ошибок (None - страница не загрузилась или не разобралась)"""
+        if content is None:
+            return None
+        try:
+            return self.parse_row(content, url, charset)
+        except Exception as e:
+            print(f"❌ Ошибка обработки {url}: {e}")
+            self.errors[url] = str(e)
+            return None
+
+    def fetch_url(self, url: str) -> Tuple[Optional[bytes], Optional[str]]:
+        """
+        Только скачать страницу (вызывается из рабочих потоков)
+        Возвращает (тело, кодировка из заголовка ответа)
+        """
+        try:
+            parser = self._get_parser()
+            content = parser.fetch_bytes(url, retries=self.retries, delay=self.delay)
+            return content, parser.header_charset(url)
+        except Exception as e:
+            print(f"❌ Ошибка загрузки {url}: {e}")
+            self.errors[url] = str(e)
+            return None, None
+
+    def _iter_rows_multiprocess(self, urls: List[str]):
+        """
+        Потоки скачивают страницы, процессы разбирают их и извлекают строки
+        В памяти одновременно не больше window страниц
+        """
+        window = max(self.workers, self.processes) * 2
+
+        with ThreadPoolExecutor(max_workers=self.workers) as fetchers, \
+                ProcessPoolExecutor(max_workers=self.processes, initializer=_init_process_worker,
+                                    initargs=(self.template, self.parser_backend, self.prune,
+                                              self.verify_prune, self.metrics.enabled)) as parsers:
+
+            def start(url: str) -> Future:
+                row_future = Future()
+
+                body_hash = None
+
+                def on_parsed(parse_future):
+                    error = parse_future.exception()
+                    if error is not None:
+                        print(f"❌ Ошибка разбора {url}: {error}")
+                        self.errors[url] = str(error)
+                    row = None
+                    if error is None:
+                        row, process_metrics = parse_future.result()
+                        self.metrics.merge(process_metrics)
+                    if row is not None:
+                        self.schema_engine.remember_result(url, body_hash, self.schema, row, self.fingerprints)
+                    row_future.set_result(row)
+
+                def on_fetched(fetch_future):
+                    nonlocal body_hash
+                    content, charset = fetch_future.result()
+                    if content is None:
+                        row_future.set_result(None)
+                        return
+                    # Страница не изменилась - в процесс-разборщик не отправляем
+                    body_hash, previous = self.schema_engine.previous_result(content, self.schema, url,
+                                                                             self.fingerprints)
+                    if previous is not None:
+                        row_future.set_result(previous)
+                        return
+                    try:
+                        parsers.submit(_extract_in_process, content, url, charset).add_done_callback(on_parsed)
+                    except Exception as e:
+                        print(f"❌ Ошибка разбора {url}: {e}")
+                        self.errors[url] = str(e)
+                        row_future.set_result(None)
+
+                fetchers.submit(self.fetch_url, url).add_done_callback(on_fetched)
+                return row_future
+
+            pending = deque()
+            for url in urls:
+                pending.append(start(url))
+                if len(pending) >= window:
+                    yield pending.popleft().result()
+            while pending:
+                yield pending.popleft().result()
+
+    def _iter_rows_async(self, urls: List[str]):
+        """
+        Загрузка через asyncio: одна петля и одна сессия aiohttp на весь прогон
+        (в отдельном потоке), разбор - в пуле потоков, пока идут следующие загрузки
+        В полёте и в памяти одновременно не больше window страниц
+        """
+        fetcher = ParserEngine(parser=self.parser_backend, cache=self.cache,
+                               rate_limiter=self.rate_limiter, parse_filter=self.parse_filter,
+                               encoding_detector=self.encoding_detector, metrics=self.metrics)
+        pool = fetcher.async_pool(concurrency=self.workers, per_host=self.per_host)
+        window = self.workers * 4
+
+        loop = asyncio.new_event_loop()
+        loop_thread = threading.Thread(target=loop.run_forever, name="batch-async", daemon=True)
+        loop_thread.start()
+
+        def run_in_loop(coroutine):
+            return asyncio.run_coroutine_threadsafe(coroutine, loop).result()
+
+        try:
+            with ThreadPoolExecutor(max_workers=self.workers) as parsers:
+                session, semaphore, host_semaphores = run_in_loop(pool.__aenter__())
+
+                async def fetch_and_parse(url: str) -> Optional[Dict]:
+                    try:
+                        content = await fetcher.afetch_bytes(url, session, self.retries, self.delay,
+                                                             semaphore, host_semaphores)
+                        charset = fetcher.header_charset(url)
+                    except Exception as e:
+                        print(f"❌ Ошибка загрузки {url}: {e}")
+                        self.errors[url] = str(e)
+                        return None
+                    return await loop.run_in_executor(parsers, self._parse_safely, url, content, charset)
+
+                async def shutdown():
+                    # Отменённые загрузки должны завершиться до закрытия сессии
+                    tasks = [task for task in asyncio.all_tasks() if task is not asyncio.current_task()]
+                    await asyncio.gather(*tasks, return_exceptions=True)
+                    await pool.__aexit__(None, None, None)
+
+                pending = deque()
+                try:
+                    for url in urls:
+                        pending.append(asyncio.run_coroutine_threadsafe(fetch_and_parse(url), loop))
+                        if len(pending) >= window:
+                            yield pending.popleft().result()
+                    while pending:
+                        yield pending.popleft().result()
+                finally:
+                    for future in pending:
+                        future.cancel()
+                    run_in_loop(shutdown())
+        finally:
+            loop.call_soon_threadsafe(loop.stop)
+            loop_thread.join()
+            loop.close()
+
+    def _iter_rows(self, urls: List[str]):
+        """Строки (или None) в порядке urls"""
+        if self.processes and not self.use_selenium:
+            yield from self._iter_rows_multiprocess(urls)
+            return
+
+        if self.use_async:
+            yield from self._iter_rows_async(urls)
+            return
+
+        # Окно задач, а не executor.map: при остановке (cancel) не ждём весь список
+        window = self.workers * 2
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            pending = deque()
+            try:
+                for url in urls:
+                    pending.append(executor.submit(self.process_url, url))
+                    if len(pending) >= window:
+                        yield pending.popleft().result()
+                while pending:
+                    yield pending.popleft().result()
+            finally:
+                for future in pending:
+                    future.cancel()
+
+    @contextmanager
+    def _browsers(self):
+        """Пул браузеров на время прогона (для use_selenium)"""
+        if self.use_selenium and self.driver_pool is None:
+            # Один запущенный браузер на рабочий поток, а не новый Chrome на каждый URL
+            self.driver_pool = DriverPool(size=self.workers, user_agent=DEFAULT_HEADERS['User-Agent'])
+        try:
+            yield
+        finally:
+            if self.driver_pool is not None:
+                self.driver_pool.close()
+                self.driver_pool = None
+
+    def run(self, urls: List[str], result_file: str, sheet_name: str = "Рецепты",
+            progress: Optional[Callable[[int, int, str, bool], None]] = None,
+            cancel: Optional[threading.Event] = None) -> Dict:
+        """
+        Обработать список URL и записать результат (Excel, CSV, JSONL или Parquet - по расширению)
+        progress: функция (готово, всего, url, успех) для отображения прогресса
+        cancel: threading.Event - если установлен, прогон останавливается (уже
+                обработанные строки записываются)
+        Строки записываются в порядке исходного списка
+        """
+        total = len(urls)
+        success = 0
+        failed = []
+        cancelled = False
+
+        mapping = MappingEngine(self.metrics)
+        with self._browsers(), closing(self._iter_rows(urls)) as rows, \
+                mapping.open_writer(result_file, sheet_name, self.columns, self.buffer_size,
+                                    types=self.column_types) as writer:
+            for i, (url, row) in enumerate(zip(urls, rows)):
+                if row is not None:
+                    writer.write_row(row)
+                    success += 1
+                else:
+                    failed.append(url)
+
+                if progress:
+                    progress(i + 1, total, url, row is not None)
+                # Остановка - после записи уже полученной строки, не дожидаясь следующей
+                if cancel is not None and cancel.is_set() and i + 1 < total:
+                    cancelled = True
+                    break
+
+        self.metrics.count("pages_failed", len(failed))
+        self.metrics.export()
+        return {'total': total, 'success': success, 'failed': failed,
+                'encodings': dict(self.encoding_detector.methods), 'unchanged': self.unchanged,
+                'metrics': self.metrics.summary(), 'cancelled': cancelled}
+
+    def run_job(self, job_store, job_id: str, max_attempts: int = 3,
+                progress: Optional[Callable[[int, int, str, bool], None]] = None,
+                cancel: Optional[threading.Event] = None) -> Dict:
+        """
+        Обработать задание из storage.job_store.JobStore
+        Берутся только необработанные URL и упавшие, у которых попыток меньше max_attempts;
+        результат каждого URL сразу сохраняется в хранилище, поэтому прерванный
+        прогон можно продолжить. В конце файл результата собирается из всех
+        обработанных строк задания (в исходном порядке)
+        cancel: threading.Event - остановить прогон; задание можно продолжить позже
+        """
+        todo = job_store.pending(job_id, max_attempts)
+        urls = [url for _, url in todo]
+        success = 0
+        failed = []
+        cancelled = False
+
+        with self._browsers(), closing(self._iter_rows(urls)) as rows:
+            for i, ((position, url), row) in enumerate(zip(todo, rows)):
+                # Строка уже скачана и разобрана - сохраняем её и при остановке
+                if row is not None:
+                    job_store.mark_done(job_id, position, row)
+                    success += 1
+                else:
+                    job_store.mark_failed(job_id, position, self.errors.pop(url, "Страница не загружена"))
+                    failed.append(url)
+
+                if progress:
+                    progress(i + 1, len(todo), url, row is not None)
+                if cancel is not None and cancel.is_set() and i + 1 < len(todo):
+                    cancelled = True
+                    break
+
+        self.export_job(job_store, job_id)
+        self.metrics.count("pages_failed", len(failed))
+        self.metrics.export()
+        return {'total': len(todo), 'success': success, 'failed': failed,
+                'encodings': dict(self.encoding_detector.methods), 'unchanged': self.unchanged,
+                'job': job_store.counts(job_id), 'metrics': self.metrics.summary(),
+                'cancelled': cancelled}
+
+    def export_job(self, job_store, job_id: str):
+        """Записать все обработанные строки задания в его файл результата"""
+        job = job_store.get_job(job_id)
+        with MappingEngine(self.metrics).open_writer(job['output'], job['sheet'], self.columns,
+                                                     self.buffer_size, types=self.column_types) as writer:
+            writer.write_rows(job_store.rows(job_id))
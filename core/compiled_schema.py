@@ -0,0 +1,129 @@
+# core/compiled_schema.py
+from dataclasses import dataclass, field
+from functools import cached_property
+from typing import Any, Callable, Dict, Optional, Set
+
+from core.formula_compiler import CompiledFormula, compile_formula
+from core.json_path import JsonPath, JsonPathTrie, compile_json_path
+from core.models import Schema, FieldSchema
+from core.selector_matcher import SelectorMatcher
+from core.transform_engine import TransformEngine
+from storage.fingerprint_store import schema_version
+
+# Источники, которые читаются из JSON блоков страницы, а не из дерева
+JSON_SOURCES = {"json", "json-ld"}
+
+
+@dataclass
+class CompiledField:
+    """Поле схемы, подготовленное к быстрому применению"""
+    name: str
+    schema_field: FieldSchema
+    source_type: Optional[str] = None               # css | xpath | json | json-ld
+    selector: Optional[str] = None                  # исходная строка селектора
+    attribute: Optional[str] = None
+    limit: Optional[int] = None                     # сколько элементов брать (None - все)
+    css: Any = None                                 # скомпилированный soupsieve селектор
+    json_path: Optional[JsonPath] = None            # скомпилированный путь JSON
+    formula: Optional[CompiledFormula] = None       # для вычисляемых полей
+    transform: Optional[Callable[[Any], Any]] = None
+
+    @property
+    def data_type(self) -> str:
+        return self.schema_field.data_type
+
+    @property
+    def required(self) -> bool:
+        return self.schema_field.required
+
+    @property
+    def default_value(self) -> Any:
+        fmt = self.schema_field.format
+        return fmt.default_value if fmt else None
+
+
+@dataclass
+class CompiledSchema:
+    """
+    Схема, скомпилированная один раз:
+    CSS селекторы, регулярки и JSON пути разбираются заранее,
+    на каждой странице остаётся только их применение
+    """
+    schema: Schema
+    fields: Dict[str, CompiledField] = field(default_factory=dict)
+    json_paths: JsonPathTrie = field(default_factory=JsonPathTrie)  # все JSON пути схемы
+    css_matcher: SelectorMatcher = field(default_factory=SelectorMatcher)  # все CSS селекторы схемы
+
+    @property
+    def name(self) -> str:
+        return self.schema.name
+
+    @cached_property
+    def version(self) -> str:
+        """Версия схемы (хэш содержимого) - для FingerprintStore"""
+        return schema_version(self.schema)
+
+    @property
+    def source_types(self) -> Set[str]:
+        """Какие источники данных использует схема"""
+        return {item.source_type for item in self.fields.values() if item.source_type}
+
+    @property
+    def needs_dom(self) -> bool:
+        """Нужно ли дерево страницы (False - все поля берутся из JSON блоков)"""
+        return bool(self.source_types - JSON_SOURCES)
+
+    @classmethod
+    def from_schema(cls, schema: Schema, transformer: Optional[TransformEngine] = None) -> "CompiledSchema":
+        """
+        Скомпилировать схему
+        Ошибки в селекторах и формулах обнаруживаются здесь (ValueError), а не на каждой странице
+        """
+        import soupsieve
+
+        transformer = transformer or TransformEngine()
+        compiled = cls(schema=schema)
+
+        for field_name, schema_field in schema.fields.items():
+            item = CompiledField(
+                name=field_name,
+                schema_field=schema_field,
+                transform=transformer.compile_format(schema_field.format)
+            )
+
+            if schema_field.data_type == "computed" and schema_field.formula:
+                try:
+                    item.formula = compile_formula(schema_field.formula)
+                except ValueError as e:
+                    raise ValueError(f"Поле {field_name}: {e}")
+
+                # Поля вычисляются по порядку - формула видит только поля выше
+                unknown = [name for name in item.formula.fields if name not in compiled.fields]
+                if unknown:
+                    raise ValueError(
+                        f"Поле {field_name}: формула использует неизвестные поля: {', '.join(unknown)}"
+                    )
+
+            source = schema_field.source
+            if source is not None and schema_field.data_type != "computed":
+                item.source_type = source.type
+                item.selector = source.selector
+                item.attribute = source.attribute
+                item.limit = source.limit
+
+                if source.type == "css":
+                    try:
+                        item.css = soupsieve.compile(source.selector)
+                    except Exception as e:
+                        raise ValueError(f"Поле {field_name}: неверный CSS селектор '{source.selector}' - {e}")
+                    compiled.css_matcher.add(field_name, item.css, item.limit)
+                elif source.type == "json":
+                    try:
+                        item.json_path = compile_json_path(source.selector)
+                    except ValueError as e:
+                        raise ValueError(f"Поле {field_name}: {e}")
+                    compiled.json_paths.add(field_name, item.json_path)
+
+            compiled.fields[field_name] = item
+
+        return compiled
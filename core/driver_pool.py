@@ -0,0 +1,176 @@
+# core/driver_pool.py
+import queue
+import threading
+import time
+from contextlib import contextmanager
+from typing import Optional
+
+# Сколько ждать возврата браузера, прежде чем снова проверить, не освободилось ли место
+WAIT_SLICE = 1.0
+
+# Путь к chromedriver определяется один раз на процесс
+_driver_path = None
+_driver_path_lock = threading.Lock()
+
+
+def get_driver_path() -> str:
+    """Установить/найти chromedriver (ChromeDriverManager вызывается один раз)"""
+    global _driver_path
+    with _driver_path_lock:
+        if _driver_path is None:
+            from webdriver_manager.chrome import ChromeDriverManager
+            _driver_path = ChromeDriverManager().install()
+        return _driver_path
+
+
+class DriverPool:
+    """Пул запущенных браузеров Chrome для Selenium"""
+
+    def __init__(self, size=2, headless=True, user_agent=None, max_pages=50):
+        """
+        size: сколько браузеров держать запущенными
+        headless: без окна браузера
+        user_agent: подставляемый User-Agent
+        max_pages: после скольких страниц браузер перезапускается (утечки памяти Chrome)
+        """
+        self.size = max(1, size)
+        self.headless = headless
+        self.user_agent = user_agent
+        self.max_pages = max_pages
+
+        self._idle = queue.Queue()  # свободные браузеры; None - место освободилось (см. _discard)
+        self._pages = {}      # id(driver) -> сколько страниц загружено
+        self._created = 0
+        self._lock = threading.Lock()
+        self._closed = False
+
+    def _create_driver(self):
+        """Запустить новый браузер"""
+        from selenium import webdriver
+        from selenium.webdriver.chrome.options import Options
+        from selenium.webdriver.chrome.service import Service
+
+        options = Options()
+        if self.headless:
+            options.add_argument('--headless')
+
+        # Маскируем Selenium
+        options.add_argument('--disable-blink-features=AutomationControlled')
+        options.add_experimental_option("excludeSwitches", ["enable-automation"])
+        options.add_experimental_option('useAutomationExtension', False)
+
+        # Добавляем реальный user-agent
+        if self.user_agent:
+            options.add_argument(f'user-agent={self.user_agent}')
+
+        # Отключаем автоматизацию
+        options.add_argument('--disable-dev-shm-usage')
+        options.add_argument('--no-sandbox')
+
+        print("🔄 Запускаем браузер...")
+        driver = webdriver.Chrome(service=Service(get_driver_path()), options=options)
+
+        # Маскируем WebDriver
+        driver.execute_script("Object.defineProperty(navigator, 'webdriver', {get: () => undefined})")
+        return driver
+
+    def acquire(self, timeout: Optional[float] = None):
+        """
+        Взять браузер из пула (запускается при необходимости)
+        timeout: сколько ждать свободного браузера (queue.Empty, если не дождались)
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            if self._closed:
+                raise RuntimeError("Пул браузеров закрыт")
+
+            try:
+                driver = self._idle.get_nowait()
+            except queue.Empty:
+                driver = None
+            if driver is not None:
+                return driver
+
+            with self._lock:
+                can_create = self._created < self.size
+                if can_create:
+                    self._created += 1
+
+            if can_create:
+                try:
+                    driver = self._create_driver()
+                except Exception:
+                    self._free_slot()
+                    raise
+                self._pages[id(driver)] = 0
+                return driver
+
+            # Все браузеры заняты - ждём возврата или освободившегося места (браузер
+            # закрыли - _discard кладёт None); ждём порциями, чтобы заметить close()
+            wait = WAIT_SLICE
+            if deadline is not None:
+                left = deadline - time.monotonic()
+                if left <= 0:
+                    raise queue.Empty
+                wait = min(wait, left)
+            try:
+                driver = self._idle.get(timeout=wait)
+            except queue.Empty:
+                continue
+            if driver is not None:
+                return driver
+
+    def release(self, driver, broken=False):
+        """
+        Вернуть браузер в пул
+        broken: браузер упал или завис - он будет закрыт и заменён новым
+        """
+        pages = self._pages.get(id(driver), 0) + 1
+        self._pages[id(driver)] = pages
+
+        if broken or self._closed or (self.max_pages and pages >= self.max_pages):
+            self._discard(driver)
+            if broken:
+                print("⚠️ Браузер перезапускается после ошибки")
+            return
+
+        self._idle.put(driver)
+
+    @contextmanager
+    def driver(self, timeout: Optional[float] = None):
+        """with pool.driver() as driver: ... - браузер вернётся в пул автоматически"""
+        driver = self.acquire(timeout)
+        broken = False
+        try:
+            yield driver
+        except Exception:
+            broken = True
+            raise
+        finally:
+            self.release(driver, broken)
+
+    def close(self):
+        """Закрыть все свободные браузеры (занятые закроются при возврате)"""
+        self._closed = True
+        while True:
+            try:
+                driver = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            if driver is not None:
+                self._discard(driver)
+
+    def _discard(self, driver):
+        self._pages.pop(id(driver), None)
+        self._free_slot()
+        try:
+            driver.quit()
+        except Exception:
+            pass
+
+    def _free_slot(self):
+        """Браузер закрыт или не запустился - можно запустить новый; будим ждущий acquire"""
+        with self._lock:
+            self._created -= 1
+        if not self._closed:
+            self._idle.put(None)
@@ -0,0 +1,141 @@
+# core/encoding_detector.py
+import codecs
+import re
+import threading
+from collections import Counter
+from typing import Dict, Optional, Tuple
+from urllib.parse import urlparse
+
+# <meta charset="..."> / <meta http-equiv=... content="text/html; charset=..."> / <?xml encoding="..."?>
+_META_CHARSET_RE = re.compile(
+    rb"""<meta[^>]+?charset\s*=\s*["']?\s*([\w.:-]+)|<\?xml[^>]+encoding\s*=\s*["']([\w.:-]+)""",
+    re.IGNORECASE
+)
+_HEADER_CHARSET_RE = re.compile(r"""charset\s*=\s*["']?([\w.:-]+)""", re.IGNORECASE)
+
+_BOMS = (
+    (codecs.BOM_UTF8, "utf-8-sig"),
+    (codecs.BOM_UTF32_LE, "utf-32"),
+    (codecs.BOM_UTF32_BE, "utf-32"),
+    (codecs.BOM_UTF16_LE, "utf-16"),
+    (codecs.BOM_UTF16_BE, "utf-16"),
+)
+
+# Если кодировка не объявлена - пробуем по очереди
+FALLBACK_ENCODINGS = ('utf-8', 'windows-1251', 'koi8-r', 'cp866')
+
+
+def charset_from_content_type(content_type: Optional[str]) -> Optional[str]:
+    """Кодировка из заголовка Content-Type (или None)"""
+    if not content_type:
+        return None
+    match = _HEADER_CHARSET_RE.search(content_type)
+    return _normalize(match.group(1)) if match else None
+
+
+def _normalize(name) -> Optional[str]:
+    """Каноническое имя кодировки или None, если Python её не знает"""
+    if isinstance(name, bytes):
+        name = name.decode("ascii", "ignore")
+    try:
+        return codecs.lookup(name.strip()).name
+    except (LookupError, AttributeError):
+        return None
+
+
+class EncodingDetector:
+    """
+    Определение кодировки страницы без лишних декодирований:
+    заголовок Content-Type -> BOM -> <meta charset> -> кодировка, уже найденная
+    для этого сайта -> перебор FALLBACK_ENCODINGS
+    Тело декодируется один раз (перебор - только если ничего не объявлено
+    или объявленная кодировка не подошла)
+    Общий на все потоки
+    """
+
+    def __init__(self, meta_scan_bytes=5000):
+        """meta_scan_bytes: в скольких первых байтах искать <meta charset>"""
+        self.meta_scan_bytes = meta_scan_bytes
+        self.methods = Counter()           # каким способом определялась кодировка (для статистики)
+        self._hosts: Dict[str, str] = {}   # сайт -> кодировка
+        self._lock = threading.Lock()
+
+    def detect(self, content: bytes, url: Optional[str] = None,
+               header_charset: Optional[str] = None) -> Tuple[Optional[str], str]:
+        """
+        Объявленная кодировка без декодирования тела
+        Возвращает (кодировка или None, способ: header | bom | meta | host | none)
+        """
+        encoding = _normalize(header_charset) if header_charset else None
+        if encoding:
+            return encoding, "header"
+
+        for bom, name in _BOMS:
+            if content.startswith(bom):
+                return name, "bom"
+
+        match = _META_CHARSET_RE.search(content[:self.meta_scan_bytes])
+        if match:
+            encoding = _normalize(match.group(1) or match.group(2))
+            if encoding:
+                return encoding, "meta"
+
+        host = urlparse(url).netloc if url else None
+        if host and host in self._hosts:
+            return self._hosts[host], "host"
+
+        return None, "none"
+
+    def decode(self, content: bytes, url: Optional[str] = None,
+               header_charset: Optional[str] = None) -> Tuple[str, str, str]:
+        """
+        Декодировать тело страницы
+        Возвращает (текст, кодировка, способ определения)
+        способ: header | bom | meta | host | guess (перебор) | ignore (с потерей символов)
+        """
+        encoding, method = self.detect(content, url, header_charset)
+
+        text = None
+        if method == "host" and encoding != "utf-8":
+            # Кодировка сайта - не объявление этой страницы: сначала строгий utf-8
+            try:
+                text = content.decode("utf-8")
+                encoding, method = "utf-8", "guess"
+            except UnicodeDecodeError:
+                text = None
+
+        if encoding and text is None:
+            try:
+                text = content.decode(encoding)
+            except UnicodeDecodeError:
+                # Объявленная кодировка не подошла - перебираем
+                text = None
+
+        if text is None:
+            method = "guess"
+            for candidate in FALLBACK_ENCODINGS:
+                if candidate == encoding:
+                    continue
+                try:
+                    text = content.decode(candidate)
+                    encoding = candidate
+                    break
+                except UnicodeDecodeError:
+                    continue
+
+        if text is None:
+            text = content.decode("utf-8", errors="ignore")
+            encoding, method = "utf-8", "ignore"
+
+        with self._lock:
+            self.methods[method] += 1
+            # Запоминаем только объявленные кодировки: cp1251 / koi8-r декодируют любые байты,
+            # и одна неудачная догадка испортила бы все следующие страницы сайта
+            if url and method in ("header", "bom", "meta"):
+                self._hosts[urlparse(url).netloc] = encoding
+
+        return text, encoding, method
+
+    def host_encoding(self, url: str) -> Optional[str]:
+        """Кодировка, запомненная для сайта"""
+        return self._hosts.get(urlparse(url).netloc)
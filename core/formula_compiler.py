@@ -0,0 +1,65 @@
+# core/formula_compiler.py
+import ast
+from dataclasses import dataclass
+from typing import Any, Dict, Tuple
+
+# Функции, доступные в формулах вычисляемых полей
+SAFE_FUNCTIONS = {
+    'int': int,
+    'float': float,
+    'str': str,
+    'len': len,
+    'sum': sum,
+    'round': round,
+    'abs': abs,
+    'max': max,
+    'min': min
+}
+
+# Разрешённые конструкции: арифметика, сравнения, условия, вызовы безопасных функций
+_ALLOWED_NODES = (
+    ast.Expression, ast.BinOp, ast.UnaryOp, ast.BoolOp, ast.Compare, ast.IfExp,
+    ast.Call, ast.keyword, ast.Name, ast.Load, ast.Constant,
+    ast.Subscript, ast.Slice, ast.List, ast.Tuple,
+    ast.operator, ast.unaryop, ast.boolop, ast.cmpop,
+)
+
+_GLOBALS = {"__builtins__": {}, **SAFE_FUNCTIONS}
+
+
+@dataclass(frozen=True)
+class CompiledFormula:
+    """Формула, разобранная и скомпилированная один раз"""
+    source: str
+    code: Any                   # объект кода для eval
+    fields: Tuple[str, ...]     # какие поля читает формула
+
+    def evaluate(self, data: Dict) -> Any:
+        """Вычислить по уже извлечённым полям"""
+        namespace = {name: data[name] for name in self.fields if name in data}
+        return eval(self.code, _GLOBALS, namespace)
+
+
+def compile_formula(formula: str) -> CompiledFormula:
+    """
+    Разобрать формулу в AST, проверить и скомпилировать
+    Ошибки (синтаксис, запрещённые конструкции) - ValueError
+    """
+    try:
+        tree = ast.parse(formula.strip(), mode="eval")
+    except SyntaxError as e:
+        raise ValueError(f"Ошибка в формуле '{formula}': {e.msg}")
+
+    fields = []
+    for node in ast.walk(tree):
+        if not isinstance(node, _ALLOWED_NODES):
+            raise ValueError(f"Недопустимая конструкция в формуле '{formula}': {type(node).__name__}")
+
+        if isinstance(node, ast.Call):
+            if not isinstance(node.func, ast.Name) or node.func.id not in SAFE_FUNCTIONS:
+                raise ValueError(f"Недопустимая функция в формуле '{formula}'")
+        elif isinstance(node, ast.Name) and node.id not in SAFE_FUNCTIONS and node.id not in fields:
+            fields.append(node.id)
+
+    code = compile(tree, f"<formula: {formula}>", "eval")
+    return CompiledFormula(source=formula, code=code, fields=tuple(fields))
@@ -0,0 +1,178 @@
+# core/html_backends.py
+"""
+Движки разбора HTML для ParserEngine
+
+lxml и html.parser строят обычное дерево BeautifulSoup.
+selectolax (lexbor) строит своё дерево - для него есть обёртка
+SelectolaxDocument с тем же интерфейсом, что использует парсер
+(select / find / find_all / get_text / get), поэтому extract_css,
+extract_xpath и JSON-методы работают без изменений.
+"""
+from typing import List, Optional
+
+# От быстрого к медленному
+PARSER_BACKENDS = ("selectolax", "lxml", "html.parser")
+
+# Теги, текст которых BeautifulSoup не включает в get_text()
+_SKIP_TEXT_TAGS = {"script", "style", "template"}
+
+# Атрибуты, которые BeautifulSoup возвращает списком
+_MULTI_VALUED_ATTRIBUTES = {"class", "rel", "rev", "accept-charset", "headers", "accesskey"}
+
+
+def is_backend_available(name: str) -> bool:
+    """Установлен ли движок"""
+    try:
+        if name == "selectolax":
+            import selectolax.lexbor  # noqa: F401
+        elif name == "lxml":
+            import lxml  # noqa: F401
+        elif name != "html.parser":
+            return False
+        return True
+    except ImportError:
+        return False
+
+
+def available_backends() -> List[str]:
+    """Список установленных движков"""
+    return [name for name in PARSER_BACKENDS if is_backend_available(name)]
+
+
+def detect_parser_backend(preferred: Optional[str] = None) -> str:
+    """
+    Выбрать движок разбора
+    preferred: 'auto' / None - самый быстрый из движков BeautifulSoup (lxml, иначе html.parser);
+               selectolax выбирается только явно, т.к. даёт не BeautifulSoup-дерево
+    """
+    if preferred in (None, "", "auto"):
+        return "lxml" if is_backend_available("lxml") else "html.parser"
+
+    if preferred not in PARSER_BACKENDS:
+        raise ValueError(f"Неизвестный движок разбора: {preferred} (доступны: {', '.join(PARSER_BACKENDS)})")
+
+    if not is_backend_available(preferred):
+        fallback = detect_parser_backend("auto")
+        print(f"⚠️ Движок {preferred} не установлен, используем {fallback}")
+        return fallback
+
+    return preferred
+
+
+class SelectolaxNode:
+    """Элемент selectolax с интерфейсом элемента BeautifulSoup"""
+
+    __slots__ = ("_node",)
+
+    def __init__(self, node):
+        self._node = node
+
+    @property
+    def name(self) -> str:
+        return self._node.tag
+
+    @property
+    def attrs(self) -> dict:
+        return {key: self.get(key) for key in self._node.attributes}
+
+    @property
+    def string(self) -> Optional[str]:
+        return self._node.text(deep=True)
+
+    @property
+    def text(self) -> str:
+        return self.get_text()
+
+    def get(self, attribute: str, default=None):
+        value = self._node.attributes.get(attribute, default)
+        if value is None:
+            return default
+        if attribute in _MULTI_VALUED_ATTRIBUTES:
+            return value.split()
+        return value
+
+    def __getitem__(self, attribute: str):
+        value = self.get(attribute)
+        if value is None:
+            raise KeyError(attribute)
+        return value
+
+    def get_text(self, separator: str = "", strip: bool = False) -> str:
+        """Текст как в BeautifulSoup: без содержимого script/style"""
+        node = self._node
+        if node.css_first("script, style, template") is None:
+            return node.text(separator=separator, strip=strip)
+
+        parts = []
+        for child in node.traverse(include_text=True):
+            if child.tag != "-text" or child.parent.tag in _SKIP_TEXT_TAGS:
+                continue
+            text = child.text(deep=False)
+            if strip:
+                text = text.strip()
+                if not text:
+                    continue
+            parts.append(text)
+        return separator.join(parts)
+
+    def select(self, selector: str, limit: int = None) -> List["SelectolaxNode"]:
+        nodes = self._node.css(selector)
+        if limit:
+            nodes = nodes[:limit]
+        return [SelectolaxNode(node) for node in nodes]
+
+    def select_one(self, selector: str) -> Optional["SelectolaxNode"]:
+        node = self._node.css_first(selector)
+        return SelectolaxNode(node) if node is not None else None
+
+    def find_all(self, name: str = None, attrs: dict = None, limit: int = None, **kwargs) -> List["SelectolaxNode"]:
+        return self.select(_to_css(name, attrs, kwargs), limit=limit)
+
+    def find(self, name: str = None, attrs: dict = None, **kwargs) -> Optional["SelectolaxNode"]:
+        return self.select_one(_to_css(name, attrs, kwargs))
+
+    def __str__(self) -> str:
+        return self._node.html or ""
+
+
+class SelectolaxDocument(SelectolaxNode):
+    """Документ selectolax (lexbor) - замена BeautifulSoup для быстрого движка"""
+
+    __slots__ = ("tree",)
+
+    def __init__(self, html: str):
+        from selectolax.lexbor import LexborHTMLParser
+
+        self.tree = LexborHTMLParser(html)
+        super().__init__(self.tree.root)
+
+    def select(self, selector: str, limit: int = None) -> List[SelectolaxNode]:
+        # Поиск от документа, чтобы находился и сам <html>
+        nodes = self.tree.css(selector)
+        if limit:
+            nodes = nodes[:limit]
+        return [SelectolaxNode(node) for node in nodes]
+
+    def select_one(self, selector: str) -> Optional[SelectolaxNode]:
+        node = self.tree.css_first(selector)
+        return SelectolaxNode(node) if node is not None else None
+
+    def __str__(self) -> str:
+        return self.tree.html or ""
+
+
+def _to_css(name: Optional[str], attrs: Optional[dict], kwargs: dict) -> str:
+    """find/find_all в стиле BeautifulSoup -> CSS селектор"""
+    conditions = dict(attrs or {})
+    conditions.update({key.rstrip("_"): value for key, value in kwargs.items()})
+
+    selector = name or "*"
+    for key, value in conditions.items():
+        if value is True:
+            selector += f"[{key}]"
+        elif key == "class":
+            selector += f'[class~="{value}"]'
+        else:
+            escaped = str(value).replace("\\", "\\\\").replace('"', '\\"')
+            selector += f'[{key}="{escaped}"]'
+    return selector
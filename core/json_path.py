@@ -0,0 +1,200 @@
+# core/json_path.py
+import re
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+# Части пути: имя, [индекс], [*], [?ключ=значение]
+_TOKEN_RE = re.compile(r"\[\?([^=\]]+)=([^\]]*)\]|\[(-?\d+|\*)\]|([^.\[\]]+)|(\.)")
+
+
+@dataclass(frozen=True)
+class Step:
+    """
+    Один шаг пути
+    kind: key | index | wildcard | filter
+    """
+    kind: str
+    key: Optional[str] = None       # имя поля (для filter - по какому ключу фильтровать)
+    index: Optional[int] = None
+    value: Optional[str] = None     # для filter - с чем сравнивать
+
+    def apply(self, node) -> Tuple[List[Any], bool]:
+        """
+        Применить шаг к значению
+        Возвращает (список результатов, раскрылся ли шаг в несколько значений)
+        """
+        if self.kind == "index":
+            if isinstance(node, list):
+                if -len(node) <= self.index < len(node):
+                    return [node[self.index]], False
+                return [], False
+            if isinstance(node, dict):
+                # Цифры в пути могут быть и ключом словаря
+                return self._get(node, self.key), False
+            return [], False
+
+        if self.kind == "key":
+            if isinstance(node, dict):
+                return self._get(node, self.key), False
+            if isinstance(node, list):
+                # Имя поля у массива - берём его из каждого элемента
+                return [item[self.key] for item in node if isinstance(item, dict) and self.key in item], True
+            return [], False
+
+        if self.kind == "wildcard":
+            if isinstance(node, dict):
+                return list(node.values()), True
+            if isinstance(node, list):
+                return list(node), True
+            return [], True
+
+        # filter
+        items = node if isinstance(node, list) else [node]
+        return [
+            item for item in items
+            if isinstance(item, dict) and self.key in item and str(item[self.key]) == self.value
+        ], True
+
+    @staticmethod
+    def _get(node: Dict, key: str) -> List[Any]:
+        value = node.get(key)
+        return [] if value is None else [value]
+
+
+@dataclass(frozen=True)
+class JsonPath:
+    """Путь в JSON, разобранный один раз"""
+    source: str
+    steps: Tuple[Step, ...]
+
+    def evaluate(self, data) -> Any:
+        """
+        Значение по пути
+        Если путь прошёл через * / фильтр / имя поля у массива - список значений,
+        иначе одно значение (или None)
+        """
+        values, multi = [data], False
+        for step in self.steps:
+            values, multi = _advance(values, multi, step)
+            if not values and not multi:
+                return None
+        return _result(values, multi)
+
+
+def _advance(values: List[Any], multi: bool, step: Step) -> Tuple[List[Any], bool]:
+    """Применить шаг ко всем текущим значениям"""
+    result = []
+    for node in values:
+        found, fanned = step.apply(node)
+        result.extend(found)
+        multi = multi or fanned
+    return result, multi
+
+
+def _result(values: List[Any], multi: bool) -> Any:
+    if multi:
+        return values
+    return values[0] if values else None
+
+
+@lru_cache(maxsize=1024)
+def compile_json_path(path: str) -> JsonPath:
+    """
+    Разобрать путь вида:
+    props.pageProps.recipes.0.title
+    props.pageProps.recipes[-1].title
+    props.pageProps.recipes.*.title
+    props.pageProps.recipes[?type=main].title
+    Ошибки синтаксиса - ValueError
+    """
+    steps = []
+    position = 0
+    path = path.strip()
+
+    while position < len(path):
+        match = _TOKEN_RE.match(path, position)
+        if not match:
+            raise ValueError(f"Ошибка в JSON пути '{path}' (позиция {position})")
+        position = match.end()
+
+        filter_key, filter_value, bracket, name, dot = match.groups()
+        if dot:
+            continue
+        if filter_key is not None:
+            steps.append(Step("filter", key=filter_key.strip(), value=filter_value.strip()))
+        else:
+            steps.append(_make_step(bracket if bracket is not None else name.strip()))
+
+    if not steps:
+        raise ValueError(f"Пустой JSON путь '{path}'")
+    return JsonPath(source=path, steps=tuple(steps))
+
+
+def json_path_from_parts(parts) -> JsonPath:
+    """Путь из уже разбитых частей (как раньше: split('.'))"""
+    return JsonPath(source=".".join(parts), steps=tuple(_make_step(part) for part in parts))
+
+
+def _make_step(part: str) -> Step:
+    if part == "*":
+        return Step("wildcard")
+    try:
+        return Step("index", key=part, index=int(part))
+    except ValueError:
+        return Step("key", key=part)
+
+
+class _TrieNode:
+    __slots__ = ("children", "fields")
+
+    def __init__(self):
+        self.children: Dict[Step, "_TrieNode"] = {}
+        self.fields: List[str] = []
+
+
+class JsonPathTrie:
+    """
+    Набор путей для всех JSON полей схемы
+    Общие начала путей (props.pageProps.initialState...) проходятся один раз на страницу
+    """
+
+    def __init__(self, paths: Optional[Dict[str, JsonPath]] = None):
+        self._root = _TrieNode()
+        self.paths: Dict[str, JsonPath] = {}
+        for name, path in (paths or {}).items():
+            self.add(name, path)
+
+    def add(self, name: str, path: Union[JsonPath, str]):
+        if isinstance(path, str):
+            path = compile_json_path(path)
+        self.paths[name] = path
+
+        node = self._root
+        for step in path.steps:
+            node = node.children.setdefault(step, _TrieNode())
+        node.fields.append(name)
+
+    def __len__(self):
+        return len(self.paths)
+
+    def evaluate(self, data) -> Dict[str, Any]:
+        """Значения всех путей: {имя поля: значение}"""
+        result = {name: None for name in self.paths}
+        if data is None:
+            return result
+
+        stack = [(self._root, [data], False)]
+        while stack:
+            node, values, multi = stack.pop()
+            for step, child in node.children.items():
+                found, found_multi = _advance(values, multi, step)
+                if not found and not found_multi:
+                    # Дальше по этой ветке ничего нет - все поля ниже остаются None
+                    continue
+                for name in child.fields:
+                    result[name] = _result(found, found_multi)
+                if child.children:
+                    stack.append((child, found, found_multi))
+
+        return result
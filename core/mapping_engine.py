@@ -1,35 +1,149 @@
 # core/mapping_engine.py
-import pandas as pd
 import os
 
+from core.metrics import NULL_METRICS
+from core.sinks import open_sink, sink_format
+
 class MappingEngine:
     """Движок для работы с Excel"""
     
-    def create_excel(self, filepath, sheet_name, columns):
-        """Создать новый Excel файл с указанными колонками"""
-        df = pd.DataFrame(columns=columns)
-        df.to_excel(filepath, sheet_name=sheet_name, index=False)
-        print(f"Создан файл: {filepath}")
-    
-    def append_row(self, filepath, sheet_name, data_dict):
-        """Добавить строку в Excel"""
-        try:
-            # Читаем существующий файл
-            df = pd.read_excel(filepath, sheet_name=sheet_name)
-            
-            # Создаём новую строку в правильном порядке колонок
-            new_row = {}
-            for col in df.columns:
-                new_row[col] = data_dict.get(col, "")
-            
-            # Добавляем строку
-            df = pd.concat([df, pd.DataFrame([new_row])], ignore_index=True)
-            
-            # Сохраняем
-            with pd.ExcelWriter(filepath, engine="openpyxl", mode="a", if_sheet_exists="replace") as writer:
-                df.to_excel(writer, sheet_name=sheet_name, index=False)
-            
-            print(f"Строка добавлена в {filepath}")
-            
-        except Exception as e:
-            print(f"Ошибка добавления в Excel: {e}")
+    def __init__(self, metrics=None):
+        """metrics: core.metrics.Metrics - время записи и число записанных строк"""
+        self.metrics = metrics or NULL_METRICS
+    
+    def open_writer(self, filepath, sheet_name, columns, buffer_size=None,
+                    rows_per_sheet=None, sheets_per_file=None, types=None):
+        """
+        Открыть потоковую запись результата (использовать через with)
+        Файл не перечитывается на каждую строку - строки сбрасываются порциями
+        Формат - по расширению: .xlsx, .csv(.gz), .jsonl(.gz), .parquet (см. core.sinks);
+        sheet_name, rows_per_sheet, sheets_per_file относятся только к Excel,
+        types (типы колонок) - только к Parquet
+        """
+        if sink_format(filepath) != "xlsx":
+            return open_sink(filepath, columns, buffer_size, self.metrics, types)
+        return ExcelStreamWriter(filepath, sheet_name, columns, buffer_size or 1000,
+                                 rows_per_sheet, sheets_per_file, self.metrics)
+
+
+# Ограничения Excel: строк на листе (вместе с заголовком), длина имени листа
+EXCEL_MAX_ROWS = 1048576
+EXCEL_MAX_SHEET_NAME = 31
+
+
+class ExcelStreamWriter:
+    """Потоковая запись строк в Excel с постоянным расходом памяти"""
+    
+    def __init__(self, filepath, sheet_name, columns, buffer_size=1000,
+                 rows_per_sheet=None, sheets_per_file=None, metrics=None):
+        """
+        buffer_size: сколько строк копить перед сбросом на диск
+        rows_per_sheet: строк данных на лист (по умолчанию - предел Excel)
+        sheets_per_file: сколько листов в файле, дальше - новый файл (по умолчанию - без ограничения)
+        """
+        self.filepath = filepath
+        self.sheet_name = sheet_name
+        self.columns = list(columns)
+        self.buffer_size = max(1, buffer_size)
+        self.rows_per_sheet = min(rows_per_sheet or EXCEL_MAX_ROWS - 1, EXCEL_MAX_ROWS - 1)
+        self.sheets_per_file = sheets_per_file
+        self.metrics = metrics or NULL_METRICS
+        
+        self.files = []            # все созданные файлы
+        self.rows_written = 0
+        self._buffer = []
+        self._workbook = None
+        self._workbook_path = None
+        self._sheet = None
+        self._sheet_rows = 0
+        self._sheet_count = 0
+        self._file_count = 0
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+    
+    def write_row(self, data_dict):
+        """Добавить строку (словарь колонка -> значение)"""
+        self._buffer.append([self._clean(data_dict.get(col, "")) for col in self.columns])
+        if len(self._buffer) >= self.buffer_size:
+            self.flush()
+    
+    def write_rows(self, rows):
+        """Добавить несколько строк"""
+        for row in rows:
+            self.write_row(row)
+    
+    def flush(self):
+        """Сбросить накопленные строки в лист"""
+        if not self._buffer:
+            return
+        with self.metrics.time("write"):
+            for values in self._buffer:
+                if self._sheet is None or self._sheet_rows >= self.rows_per_sheet:
+                    self._next_sheet()
+                self._sheet.append(values)
+                self._sheet_rows += 1
+                self.rows_written += 1
+        self.metrics.count("rows_written", len(self._buffer))
+        self._buffer = []
+    
+    def close(self):
+        """Дописать остаток и сохранить файл"""
+        self.flush()
+        if self._sheet is None:
+            # Пустой результат - всё равно создаём файл с заголовком
+            self._next_sheet()
+        self._save()
+    
+    def _next_sheet(self):
+        """Начать новый лист (и новый файл, если лист не помещается)"""
+        if self._workbook is None or (self.sheets_per_file and self._sheet_count >= self.sheets_per_file):
+            self._save()
+            self._open_workbook()
+        
+        self._sheet_count += 1
+        # Суффикс номера не должен обрезаться - иначе листы получат одинаковые имена
+        suffix = "" if self._sheet_count == 1 else f"_{self._sheet_count}"
+        title = self.sheet_name[:EXCEL_MAX_SHEET_NAME - len(suffix)] + suffix
+        self._sheet = self._workbook.create_sheet(title=title)
+        self._sheet.append(self.columns)
+        self._sheet_rows = 0
+    
+    def _open_workbook(self):
+        from openpyxl import Workbook
+        
+        self._file_count += 1
+        path = self.filepath
+        if self._file_count > 1:
+            root, ext = os.path.splitext(self.filepath)
+            path = f"{root}_{self._file_count}{ext}"
+        
+        # write_only: строки уходят во временный файл, а не в память
+        self._workbook = Workbook(write_only=True)
+        self._workbook_path = path
+        self._sheet_count = 0
+        self._sheet = None
+    
+    def _save(self):
+        if self._workbook is None:
+            return
+        with self.metrics.time("write"):
+            self._workbook.save(self._workbook_path)
+        self.files.append(self._workbook_path)
+        print(f"Сохранено строк: {self.rows_written} в {self._workbook_path}")
+        self._workbook = None
+        self._sheet = None
+    
+    @staticmethod
+    def _clean(value):
+        """Убрать символы, которые openpyxl не может записать"""
+        if isinstance(value, str):
+            from openpyxl.cell.cell import ILLEGAL_CHARACTERS_RE
+            return ILLEGAL_CHARACTERS_RE.sub("", value)
+        if isinstance(value, (list, tuple)):
+            return " | ".join(str(v) for v in value)
+        return value
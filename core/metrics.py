@@ -0,0 +1,307 @@
+# core/metrics.py
+"""
+Метрики парсинга: время этапов, счётчики и попадания полей
+
+    metrics = Metrics(exporters=[JsonExporter("metrics.json"),
+                                 PrometheusExporter("parser.prom"),
+                                 lambda summary: print(summary["stages"])])
+    engine = BatchEngine(template, metrics=metrics)
+    engine.run(urls, "result.xlsx")        # в конце прогона вызывается metrics.export()
+
+Этапы: fetch, decode, parse, match, transform, write.
+Счётчики: pages, bytes_downloaded, retries, fetch_errors, cache_hits, ...
+Поля: попадания (селектор что-то нашёл) и промахи. Времени по полю нет: CSS поля
+сопоставляются за один проход по дереву (этап match), их время не делится на поля.
+
+По умолчанию движки используют NULL_METRICS - ничего не собирается.
+"""
+import bisect
+import json
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager, nullcontext
+from typing import Callable, Dict, List, Optional
+
+# Границы корзин гистограммы (секунды) - для Prometheus
+BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+# Сколько последних замеров этапа хранить для перцентилей
+SAMPLES_LIMIT = 10000
+
+
+class StageStats:
+    """Замеры одного этапа"""
+
+    __slots__ = ("count", "total", "max", "buckets", "samples")
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.buckets = [0] * (len(BUCKETS) + 1)
+        self.samples = deque(maxlen=SAMPLES_LIMIT)
+
+    def add(self, seconds: float):
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+        self.buckets[bisect.bisect_left(BUCKETS, seconds)] += 1
+        self.samples.append(seconds)
+
+    def merge(self, state: Dict):
+        self.count += state["count"]
+        self.total += state["total"]
+        self.max = max(self.max, state["max"])
+        self.buckets = [a + b for a, b in zip(self.buckets, state["buckets"])]
+        self.samples.extend(state["samples"])
+
+    def state(self) -> Dict:
+        return {"count": self.count, "total": self.total, "max": self.max,
+                "buckets": list(self.buckets), "samples": list(self.samples)}
+
+    def summary(self) -> Dict:
+        ordered = sorted(self.samples)
+
+        def percentile(q):
+            if not ordered:
+                return 0.0
+            return ordered[min(len(ordered) - 1, int(q * len(ordered)))] * 1000
+
+        return {
+            "count": self.count,
+            "total_s": round(self.total, 4),
+            "mean_ms": round(self.total / self.count * 1000, 3) if self.count else 0.0,
+            "p50_ms": round(percentile(0.5), 3),
+            "p90_ms": round(percentile(0.9), 3),
+            "p99_ms": round(percentile(0.99), 3),
+            "max_ms": round(self.max * 1000, 3),
+            "buckets": list(self.buckets),  # по границам BUCKETS (+ последняя - больше всех)
+        }
+
+
+class FieldStats:
+    """Попадания одного поля"""
+
+    __slots__ = ("hits", "misses")
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+
+    def summary(self) -> Dict:
+        count = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / count, 4) if count else 0.0,
+        }
+
+
+class Metrics:
+    """
+    Сбор метрик (общий на все потоки)
+    exporters: куда отдать итог при export() - JsonExporter, PrometheusExporter
+               или любая функция, принимающая словарь summary()
+    """
+
+    enabled = True
+
+    def __init__(self, exporters: Optional[List[Callable[[Dict], None]]] = None):
+        self.exporters = list(exporters or [])
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        """Начать сбор заново"""
+        with self._lock:
+            self.stages: Dict[str, StageStats] = {}
+            self.counters: Dict[str, float] = {}
+            self.fields: Dict[str, FieldStats] = {}
+            self.started = time.time()
+
+    @contextmanager
+    def time(self, stage: str):
+        """Засечь время этапа: with metrics.time("parse"): ..."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(stage, time.perf_counter() - started)
+
+    def observe(self, stage: str, seconds: float):
+        """Добавить замер этапа (секунды)"""
+        with self._lock:
+            stats = self.stages.get(stage)
+            if stats is None:
+                stats = self.stages[stage] = StageStats()
+            stats.add(seconds)
+
+    def count(self, name: str, value: float = 1):
+        """Увеличить счётчик"""
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def field(self, name: str, hit: bool):
+        """Результат поля: hit - селектор/путь что-то нашёл"""
+        with self._lock:
+            stats = self.fields.get(name)
+            if stats is None:
+                stats = self.fields[name] = FieldStats()
+            if hit:
+                stats.hits += 1
+            else:
+                stats.misses += 1
+
+    def drain(self) -> Dict:
+        """
+        Забрать накопленное и начать заново
+        (процесс-разборщик отдаёт это родителю вместе со строкой, см. merge)
+        """
+        with self._lock:
+            state = {
+                "stages": {name: stats.state() for name, stats in self.stages.items()},
+                "counters": dict(self.counters),
+                "fields": {name: (s.hits, s.misses) for name, s in self.fields.items()},
+            }
+        self.reset()
+        return state
+
+    def merge(self, state: Optional[Dict]):
+        """Добавить замеры из drain() другого экземпляра"""
+        if not state:
+            return
+        with self._lock:
+            for name, stage_state in state["stages"].items():
+                self.stages.setdefault(name, StageStats()).merge(stage_state)
+            for name, value in state["counters"].items():
+                self.counters[name] = self.counters.get(name, 0) + value
+            for name, (hits, misses) in state["fields"].items():
+                stats = self.fields.setdefault(name, FieldStats())
+                stats.hits += hits
+                stats.misses += misses
+
+    def summary(self) -> Dict:
+        """Итог: этапы (перцентили), счётчики, поля"""
+        with self._lock:
+            return {
+                "elapsed_s": round(time.time() - self.started, 3),
+                "stages": {name: stats.summary() for name, stats in sorted(self.stages.items())},
+                "counters": dict(sorted(self.counters.items())),
+                "fields": {name: stats.summary() for name, stats in self.fields.items()},
+            }
+
+    def export(self):
+        """Отдать итог всем экспортёрам"""
+        if not self.exporters:
+            return
+        summary = self.summary()
+        for exporter in self.exporters:
+            try:
+                exporter(summary)
+            except Exception as e:
+                print(f"⚠️ Ошибка экспорта метрик: {e}")
+
+
+class NullMetrics(Metrics):
+    """Метрики выключены: все вызовы ничего не делают"""
+
+    enabled = False
+
+    def __init__(self):
+        self.exporters = []
+        self.stages, self.counters, self.fields = {}, {}, {}
+        self.started = time.time()
+
+    def reset(self):
+        pass
+
+    def time(self, stage: str):
+        return nullcontext()
+
+    def observe(self, stage: str, seconds: float):
+        pass
+
+    def count(self, name: str, value: float = 1):
+        pass
+
+    def field(self, name: str, hit: bool):
+        pass
+
+    def drain(self):
+        return None
+
+    def merge(self, state):
+        pass
+
+    def summary(self) -> Dict:
+        return {"elapsed_s": 0.0, "stages": {}, "counters": {}, "fields": {}}
+
+    def export(self):
+        pass
+
+
+NULL_METRICS = NullMetrics()
+
+
+def _write_atomic(path: str, text: str):
+    """Записать файл целиком (читатель никогда не видит половину)"""
+    folder = os.path.dirname(os.path.abspath(path))
+    os.makedirs(folder, exist_ok=True)
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(text)
+    os.replace(tmp, path)
+
+
+class JsonExporter:
+    """Итог прогона в JSON файл"""
+
+    def __init__(self, path: str):
+        self.path = path
+
+    def __call__(self, summary: Dict):
+        _write_atomic(self.path, json.dumps(summary, ensure_ascii=False, indent=2))
+        print(f"📊 Метрики сохранены: {self.path}")
+
+
+def prometheus_text(summary: Dict, prefix: str = "parser") -> str:
+    """Итог Metrics.summary() в текстовом формате Prometheus"""
+    lines = [
+        f"# HELP {prefix}_stage_seconds Время этапов парсинга",
+        f"# TYPE {prefix}_stage_seconds histogram",
+    ]
+    for name, stats in summary["stages"].items():
+        cumulative = 0
+        for bound, count in zip(BUCKETS + (float("inf"),), stats["buckets"]):
+            cumulative += count
+            le = "+Inf" if bound == float("inf") else repr(bound)
+            lines.append(f'{prefix}_stage_seconds_bucket{{stage="{name}",le="{le}"}} {cumulative}')
+        lines.append(f'{prefix}_stage_seconds_sum{{stage="{name}"}} {stats["total_s"]}')
+        lines.append(f'{prefix}_stage_seconds_count{{stage="{name}"}} {stats["count"]}')
+
+    for name, value in summary["counters"].items():
+        lines.append(f"# TYPE {prefix}_{name}_total counter")
+        lines.append(f"{prefix}_{name}_total {value}")
+
+    if summary["fields"]:
+        for metric, key in (("field_hits", "hits"), ("field_misses", "misses")):
+            lines.append(f"# TYPE {prefix}_{metric}_total counter")
+            for name, stats in summary["fields"].items():
+                label = name.replace("\\", "\\\\").replace('"', '\\"')
+                lines.append(f'{prefix}_{metric}_total{{field="{label}"}} {stats[key]}')
+
+    return "\n".join(lines) + "\n"
+
+
+class PrometheusExporter:
+    """Метрики в текстовом формате Prometheus (файл для textfile collector node_exporter)"""
+
+    def __init__(self, path: str, prefix: str = "parser"):
+        self.path = path
+        self.prefix = prefix
+
+    def __call__(self, summary: Dict):
+        _write_atomic(self.path, prometheus_text(summary, self.prefix))
+        print(f"📊 Метрики Prometheus сохранены: {self.path}")
@@ -8,6 +8,7 @@ class SourceConfig:
     type: str  # css | xpath | json | regex | iframe
     selector: str
     attribute: Optional[str] = None  # для извлечения атрибутов (href, src)
+    limit: Optional[int] = None      # сколько элементов брать (None - все)
 
 @dataclass
 class FormatConfig:
@@ -23,6 +24,7 @@ class FormatConfig:
     date_format: Optional[str] = None            # формат даты
     default_value: Optional[Any] = None          # значение по умолчанию
     normalize_whitespace: bool = False           # нормализовать пробелы
+    skip_empty: bool = False                     # пропускать пустые элементы списка
 
 @dataclass
 class FieldSchema:
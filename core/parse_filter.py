@@ -0,0 +1,239 @@
+# core/parse_filter.py
+import re
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from bs4 import SoupStrainer
+
+# Тела <script>/<style>: теги остаются (нумерация :nth-child не меняется), содержимое выбрасывается
+_RAW_TEXT_RE = re.compile(r"(<(script|style)\b[^>]*>)(.*?)(</\2\s*>)", re.IGNORECASE | re.DOTALL)
+
+# Скрипты с данными, которые читают extract_json_next_data / extract_json_ld
+_JSON_SCRIPT_RE = re.compile(r"__NEXT_DATA__|application/ld\+json", re.IGNORECASE)
+
+# Простой составной селектор: тег, #id, .класс, [атрибут], [атрибут=значение]
+_COMPOUND_RE = re.compile(r"^(?P<tag>[a-zA-Z][\w-]*)?(?P<rest>(?:#[\w-]+|\.[\w-]+|\[[^\]]+\])*)$")
+_PART_RE = re.compile(r"#([\w-]+)|\.([\w-]+)|\[\s*([\w-]+)\s*(?:([~^$*]?=)\s*(\"[^\"]*\"|'[^']*'|[^\]\s]*)\s*)?\]")
+
+# Селекторы, которым нужен текст скриптов/стилей
+_NEEDS_RAW_TEXT_RE = re.compile(r"\b(script|style)\b|contains", re.IGNORECASE)
+
+JSON_SCRIPT_SELECTORS = ('script#__NEXT_DATA__', 'script[type="application/ld+json"]')
+
+# Атрибуты, которые BeautifulSoup делит по пробелам: soupsieve сравнивает их значение,
+# собранное обратно через один пробел
+_MULTI_VALUED_ATTRS = {"class", "rel", "rev", "accept-charset", "headers", "accesskey", "dropzone"}
+
+# Значение сравнивается без учёта регистра (как в soupsieve для HTML)
+_CASE_INSENSITIVE_ATTRS = {"type"}
+
+
+@dataclass
+class RootRule:
+    """
+    Корень поддерева, которое нужно сохранить (самый левый составной селектор)
+    Имена атрибутов - в нижнем регистре, как их отдаёт разбор HTML
+    """
+    tag: Optional[str] = None
+    id: Optional[str] = None
+    classes: Tuple[str, ...] = ()
+    attrs: List[Tuple[str, Optional[str], Optional[str]]] = field(default_factory=list)  # (имя, оператор, значение)
+
+    def matches(self, name: str, attrs: Dict) -> bool:
+        """Проверка по имени тега и сырым атрибутам (до построения Tag)"""
+        if self.tag and name.lower() != self.tag:
+            return False
+        if self.id is not None and _attr_text(attrs.get("id")) != self.id:
+            return False
+        if self.classes:
+            classes = _attr_text(attrs.get("class")).split()
+            if any(cls not in classes for cls in self.classes):
+                return False
+        for attr, op, value in self.attrs:
+            actual = attrs.get(attr)
+            if actual is None:
+                return False
+            if op is None:
+                continue
+            actual = _attr_text(actual)
+            if attr in _MULTI_VALUED_ATTRS:
+                actual = " ".join(actual.split())
+            if attr in _CASE_INSENSITIVE_ATTRS:
+                actual, value = actual.lower(), value.lower()
+            if op == "=" and actual != value:
+                return False
+            if op == "~=" and value not in actual.split():
+                return False
+            if op == "^=" and not (value and actual.startswith(value)):
+                return False
+            if op == "$=" and not (value and actual.endswith(value)):
+                return False
+            if op == "*=" and not (value and value in actual):
+                return False
+        return True
+
+
+def _attr_text(value) -> str:
+    if value is None:
+        return ""
+    if isinstance(value, (list, tuple)):
+        return " ".join(value)
+    return value
+
+
+class _RootStrainer(SoupStrainer):
+    """SoupStrainer, сохраняющий поддеревья элементов, совпавших с любым из RootRule"""
+
+    def __init__(self, rules: List[RootRule]):
+        super().__init__()
+        self.rules = rules
+
+    def _match(self, name, attrs) -> bool:
+        attrs = attrs or {}
+        return any(rule.matches(name, attrs) for rule in self.rules)
+
+    # BeautifulSoup 4.13+
+    def allow_tag_creation(self, nsprefix, name, attrs) -> bool:
+        return self._match(name, attrs)
+
+    # BeautifulSoup до 4.13
+    def search_tag(self, markup_name=None, markup_attrs={}):
+        if hasattr(markup_name, "name"):
+            return markup_name if self._match(markup_name.name, markup_name.attrs) else None
+        return self._match(markup_name, markup_attrs)
+
+
+class ParseFilter:
+    """
+    Фильтр разбора страницы, выведенный из селекторов полей
+
+    1. Тела <script>/<style> вырезаются до разбора (если никакое поле их не читает)
+    2. Если все селекторы простые (см. root_rule) - строятся только поддеревья
+       элементов, с которых начинаются селекторы (SoupStrainer); скрипты,
+       SVG, подвалы и прочее в дерево не попадают
+    XPath поля выполняются по всему дереву - с ними остаётся только шаг 1
+    """
+
+    def __init__(self, selectors: Iterable[str], xpaths: Iterable[str] = (), keep_json: bool = False):
+        """
+        selectors: CSS селекторы полей
+        xpaths: XPath выражения полей
+        keep_json: сохранить __NEXT_DATA__ и JSON-LD (поля json / json-ld читают их из дерева)
+        """
+        self.selectors = [s for s in selectors if s]
+        self.xpaths = [x for x in xpaths if x]
+        self.keep_json = keep_json
+        self.keep_raw_text = any(_NEEDS_RAW_TEXT_RE.search(s) for s in self.selectors + self.xpaths)
+
+        self.rules: Optional[List[RootRule]] = None
+        if self.selectors and not self.xpaths:
+            selectors = self.selectors + (list(JSON_SCRIPT_SELECTORS) if keep_json else [])
+            rules = [root_rule(s) for s in _split_selector_list(selectors)]
+            if all(rule is not None for rule in rules):
+                self.rules = rules
+
+    @classmethod
+    def from_template(cls, template: Dict) -> "ParseFilter":
+        """Фильтр для шаблона конструктора ({'fields': {имя: {'selector': ...}}})"""
+        return cls(config.get('selector') for config in template.get('fields', {}).values())
+
+    @classmethod
+    def from_schema(cls, compiled) -> "ParseFilter":
+        """Фильтр для CompiledSchema"""
+        fields = compiled.fields.values()
+        return cls(
+            selectors=[f.selector for f in fields if f.source_type == "css"],
+            xpaths=[f.selector for f in fields if f.source_type == "xpath"],
+            keep_json=bool(compiled.source_types & {"json", "json-ld"})
+        )
+
+    @property
+    def prunes_tree(self) -> bool:
+        """Строится ли только часть дерева"""
+        return self.rules is not None
+
+    def prepare(self, text: str) -> str:
+        """Вырезать тела скриптов и стилей, которые не нужны полям"""
+        if self.keep_raw_text:
+            return text
+
+        def strip_body(match):
+            if self.keep_json and _JSON_SCRIPT_RE.search(match.group(1)):
+                return match.group(0)
+            return match.group(1) + match.group(4)
+
+        return _RAW_TEXT_RE.sub(strip_body, text)
+
+    def strainer(self) -> Optional[SoupStrainer]:
+        """SoupStrainer для BeautifulSoup(parse_only=...) или None (строить всё дерево)"""
+        return _RootStrainer(self.rules) if self.rules is not None else None
+
+
+def _split_selector_list(selectors: Iterable[str]) -> List[str]:
+    """Разбить 'a, b' на отдельные селекторы (запятые внутри () и [] не считаются)"""
+    result = []
+    for selector in selectors:
+        depth = 0
+        start = 0
+        for i, char in enumerate(selector):
+            if char in "([":
+                depth += 1
+            elif char in ")]":
+                depth -= 1
+            elif char == "," and depth == 0:
+                result.append(selector[start:i].strip())
+                start = i + 1
+        result.append(selector[start:].strip())
+    return [s for s in result if s]
+
+
+def root_rule(selector: str) -> Optional[RootRule]:
+    """
+    Правило для самого левого составного селектора или None, если отсечь дерево нельзя:
+    левая часть не простая (псевдоклассы, *), следом идёт + или ~ (нужны соседи),
+    экранирование или :root / :scope
+    """
+    if "\\" in selector or re.search(r":(root|scope)\b", selector):
+        return None
+
+    # Самый левый составной селектор - до первого комбинатора вне скобок
+    depth = 0
+    end = len(selector)
+    for i, char in enumerate(selector):
+        if char in "([":
+            depth += 1
+        elif char in ")]":
+            depth -= 1
+        elif depth == 0 and (char.isspace() or char in ">+~"):
+            end = i
+            break
+
+    compound = selector[:end]
+    combinator = selector[end:].lstrip()[:1]
+    if combinator in ("+", "~"):
+        return None
+
+    match = _COMPOUND_RE.match(compound)
+    if not compound or not match:
+        return None
+
+    rest = match.group("rest")
+    parts = list(_PART_RE.finditer(rest))
+    if "".join(part.group(0) for part in parts) != rest:
+        # Часть селектора не распознана (например [lang|=en])
+        return None
+
+    rule = RootRule(tag=match.group("tag").lower() if match.group("tag") else None)
+    classes = []
+    for part in parts:
+        id_, cls, attr, op, value = part.groups()
+        if id_:
+            rule.id = id_
+        elif cls:
+            classes.append(cls)
+        else:
+            if value and value[:1] in ("'", '"'):
+                value = value[1:-1]
+            rule.attrs.append((attr.lower(), op, value if op else None))
+    rule.classes = tuple(classes)
+    return rule
@@ -1,31 +1,95 @@
 # core/parser_engine.py
 import requests
 from bs4 import BeautifulSoup
+import asyncio
+import contextlib
 import json
+import re
 import time
 import random
+from collections import defaultdict
+from functools import lru_cache
 from typing import Optional, List, Union, Dict
+from urllib.parse import urlparse
+
+from core.driver_pool import DriverPool
+from core.encoding_detector import EncodingDetector, charset_from_content_type
+from core.html_backends import SelectolaxDocument, SelectolaxNode, detect_parser_backend
+from core.json_path import JsonPath, compile_json_path, json_path_from_parts
+from core.metrics import NULL_METRICS
+
+
+# Заголовки реального браузера
+DEFAULT_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
+    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
+    'Accept-Language': 'ru-RU,ru;q=0.9,en-US;q=0.8,en;q=0.7',
+    'Connection': 'keep-alive',
+}
+
+
+@lru_cache(maxsize=1024)
+def _compile_xpath(xpath: str):
+    """Скомпилированное XPath выражение (кэш на процесс)"""
+    from lxml import etree
+    return etree.XPath(xpath)
+
+
+# JSON блоки страницы ищутся прямо в байтах ответа, без построения дерева
+_NEXT_DATA_RE = re.compile(
+    rb"""<script\b[^>]*?\bid\s*=\s*["']?__NEXT_DATA__\b[^>]*>(.*?)</script\s*>""",
+    re.IGNORECASE | re.DOTALL
+)
+_JSON_LD_RE = re.compile(
+    rb"""<script\b[^>]*?\btype\s*=\s*["']?application/ld\+json\b[^>]*>(.*?)</script\s*>""",
+    re.IGNORECASE | re.DOTALL
+)
+
+# Сколько кодировок из заголовков держать до разбора страницы
+_HEADER_CHARSETS_LIMIT = 1024
+
+
+def _optional(semaphore):
+    """Семафор или пустой контекст, если ограничение не задано"""
+    return semaphore if semaphore is not None else contextlib.nullcontext()
 
 class ParserEngine:
     """Мощный движок для загрузки и парсинга любых страниц"""
     
-    def __init__(self, use_selenium=False, headless=True):
+    def __init__(self, use_selenium=False, headless=True, parser=None, cache=None, driver_pool=None,
+                 rate_limiter=None, parse_filter=None, encoding_detector=None, metrics=None):
         """
         use_selenium: использовать ли Selenium для JavaScript
         headless: показывать ли окно браузера
+        parser: движок разбора HTML - 'auto' (по умолчанию), 'lxml', 'html.parser' или 'selectolax'
+        cache: кэш ответов на диске (storage.response_cache.ResponseCache), необязательно
+        driver_pool: общий пул браузеров (core.driver_pool.DriverPool) для use_selenium
+        rate_limiter: общий адаптивный ограничитель (core.rate_limiter.HostRateLimiter)
+                      вместо фиксированной случайной задержки перед запросом
+        parse_filter: фильтр разбора (core.parse_filter.ParseFilter) - строить только
+                      нужные полям части дерева
+        encoding_detector: общий определитель кодировок (core.encoding_detector.EncodingDetector);
+                           помнит кодировку каждого сайта
+        metrics: core.metrics.Metrics - время загрузки/декодирования/разбора, повторы, байты
         """
         self.use_selenium = use_selenium
         self.headless = headless
+        self.parser_backend = detect_parser_backend(parser)
+        self.cache = cache
+        self.rate_limiter = rate_limiter
+        self.parse_filter = parse_filter
+        self.encoding_detector = encoding_detector or EncodingDetector()
+        self.metrics = metrics or NULL_METRICS
+        self.last_encoding = None  # (кодировка, способ определения) последней разобранной страницы
+        self._header_charsets = {}  # url -> charset из Content-Type (до разбора страницы)
         self.driver = None
+        self.driver_pool = driver_pool
+        self._own_driver_pool = driver_pool is None
+        self._lxml_cache = None  # (soup, lxml дерево) последней страницы
         self.session = requests.Session()
         
         # Маскируемся под реального пользователя
-        self.session.headers.update({
-            'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
-            'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
-            'Accept-Language': 'ru-RU,ru;q=0.9,en-US;q=0.8,en;q=0.7',
-            'Connection': 'keep-alive',
-        })
+        self.session.headers.update(DEFAULT_HEADERS)
     
     def load_from_url(self, url: str, retries=3, delay=1) -> Optional[BeautifulSoup]:
         """
@@ -36,134 +100,383 @@ class ParserEngine:
         if self.use_selenium:
             return self._load_with_selenium(url)
         
+        content = self.fetch_bytes(url, retries, delay)
+        if content is None:
+            return None
+        return self.load_from_bytes(content, url=url)
+    
+    def fetch_bytes(self, url: str, retries=3, delay=1) -> Optional[bytes]:
+        """
+        Скачать тело страницы (без разбора)
+        Если подключён кэш (self.cache) - сначала смотрим в него
+        """
+        cached, content = self._from_cache(url)
+        if content is not None or (self.cache is not None and self.cache.offline):
+            return content
+        
         for attempt in range(retries):
             try:
-                # Добавляем случайную задержку между запросами
-                time.sleep(random.uniform(delay, delay + 1))
+                # Добавляем случайную задержку между запросами (если нет адаптивного ограничителя)
+                if self.rate_limiter is None:
+                    time.sleep(random.uniform(delay, delay + 1))
+                
+                headers = self.cache.conditional_headers(cached) if self.cache is not None else None
+                with self.metrics.time("fetch"):
+                    response = self._get(url, headers)
+                
+                if response.status_code == 304 and cached is not None:
+                    self.cache.touch(url, response.headers)
+                    self.metrics.count("not_modified")
+                    print(f"📦 Страница не изменилась (кэш): {url}")
+                    return self._replay(url, cached, response.headers)
                 
-                response = self.session.get(url, timeout=10)
                 response.raise_for_status()
                 
-                # Определяем кодировку
-                content = response.content
+                if self.cache is not None:
+                    self.cache.put(url, response.content, response.headers)
+                self._remember_charset(url, response.headers)
+                self._count_download(response.content)
+                print(f"✅ Страница загружена (попытка {attempt + 1})")
+                return response.content
                 
-                # Пробуем найти кодировку в HTML
-                import re
-                charset_match = re.search(b'charset=([^"\'>\\s]+)', content[:5000])
-                if charset_match:
-                    encoding = charset_match.group(1).decode('ascii', 'ignore')
-                    try:
-                        text = content.decode(encoding)
-                        print(f"✅ Страница загружена (попытка {attempt + 1})")
-                        return BeautifulSoup(text, "html.parser")
-                    except:
-                        pass
+            except requests.exceptions.RequestException as e:
+                print(f"⚠️ Ошибка загрузки (попытка {attempt + 1}/{retries}): {e}")
+                if attempt < retries - 1:
+                    self.metrics.count("retries")
+                    # С ограничителем пауза уже назначена им (Retry-After / AIMD)
+                    if self.rate_limiter is None:
+                        time.sleep(delay * 2)
+                else:
+                    self.metrics.count("fetch_errors")
+                    print(f"❌ Не удалось загрузить {url} после {retries} попыток")
+                    return self._stale(url, cached, getattr(e.response, 'status_code', None))
+    
+    def _count_download(self, content: bytes):
+        """Страница скачана: счётчики страниц и байтов"""
+        self.metrics.count("pages_downloaded")
+        self.metrics.count("bytes_downloaded", len(content))
+    
+    def _get(self, url: str, headers=None):
+        """GET через общую сессию с учётом ограничителя скорости"""
+        if self.rate_limiter is None:
+            return self.session.get(url, timeout=10, headers=headers)
+        
+        self.rate_limiter.acquire(url)
+        started = time.monotonic()
+        response = None
+        try:
+            response = self.session.get(url, timeout=10, headers=headers)
+            return response
+        finally:
+            latency = time.monotonic() - started
+            if response is None:
+                self.rate_limiter.release(url, latency=latency, error=True)
+            else:
+                self.rate_limiter.release(url, response.status_code, latency,
+                                          response.headers.get('Retry-After'))
+    
+    def _from_cache(self, url: str):
+        """
+        Проверить кэш ответов
+        Возвращает (запись кэша или None, тело - если его можно использовать без запроса)
+        """
+        if self.cache is None:
+            return None, None
+        
+        cached = self.cache.get(url)
+        if cached is not None and (self.cache.offline or self.cache.is_fresh(cached)):
+            self.metrics.count("cache_hits")
+            print(f"📦 Из кэша: {url}")
+            return cached, self._replay(url, cached)
+        
+        if self.cache.offline:
+            print(f"❌ Нет в кэше (режим offline): {url}")
+        return cached, None
+    
+    def _stale(self, url: str, cached, status=None) -> Optional[bytes]:
+        """
+        Сайт недоступен (сеть, таймаут или ответ 5xx) - устаревший ответ из кэша, если он есть
+        На 4xx не отдаём: страница удалена или закрыта, а не временно недоступна
+        """
+        if cached is None or (status is not None and status < 500):
+            return None
+        self.metrics.count("stale_hits")
+        print(f"📦 Сайт недоступен, устаревшая копия из кэша: {url}")
+        return self._replay(url, cached)
+    
+    def _replay(self, url: str, cached, headers=None) -> bytes:
+        """
+        Тело из кэша (попадание или 304) - вместе с charset сохранённого Content-Type,
+        чтобы страница декодировалась так же, как при скачивании
+        """
+        content_type = (headers.get('Content-Type') if headers is not None else None) or cached.content_type
+        self._remember_charset(url, {'Content-Type': content_type})
+        return cached.content
+    
+    def load_from_bytes(self, content: bytes, use_filter=True, url: str = None,
+                        charset: str = None) -> BeautifulSoup:
+        """
+        Разобрать скачанное тело страницы
+        use_filter: применить parse_filter (False - полное дерево, например для проверки фильтра)
+        url: адрес страницы - для кодировки из заголовка ответа и кэша кодировок по сайтам
+        charset: кодировка из Content-Type, если известна заранее
+        """
+        text = self._decode_content(content, url, charset)
+        return self._make_soup(text, use_filter)
+    
+    def header_charset(self, url: str) -> Optional[str]:
+        """Забрать кодировку из заголовка ответа для url (если страницу будет разбирать другой процесс)"""
+        return self._header_charsets.pop(url, None)
+    
+    def _remember_charset(self, url: str, headers):
+        """Запомнить charset из Content-Type до разбора страницы"""
+        charset = charset_from_content_type(headers.get('Content-Type'))
+        if charset is None:
+            return
+        if len(self._header_charsets) >= _HEADER_CHARSETS_LIMIT:
+            # Страницы, которые так и не разобрали - выбрасываем самые старые
+            self._header_charsets.pop(next(iter(self._header_charsets)))
+        self._header_charsets[url] = charset
+    
+    def _decode_content(self, content: bytes, url: str = None, charset: str = None) -> str:
+        """
+        Декодировать тело ответа (один раз, если кодировка объявлена)
+        Порядок: Content-Type -> BOM -> <meta charset> -> кодировка сайта -> перебор
+        """
+        if charset is None and url is not None:
+            charset = self._header_charsets.pop(url, None)
+        
+        with self.metrics.time("decode"):
+            text, encoding, method = self.encoding_detector.decode(content, url, charset)
+        self.last_encoding = (encoding, method)
+        
+        if method == "guess":
+            print(f"   ↳ декодировано в кодировке {encoding}")
+        elif method == "ignore":
+            print("   ↳ декодировано с игнорированием ошибок")
+        return text
+    
+    def _make_soup(self, text: str, use_filter=True) -> BeautifulSoup:
+        """Построить дерево страницы выбранным движком разбора"""
+        with self.metrics.time("parse"):
+            strainer = None
+            if use_filter and self.parse_filter is not None:
+                text = self.parse_filter.prepare(text)
+                strainer = self.parse_filter.strainer()
+            
+            if self.parser_backend == "selectolax":
+                return SelectolaxDocument(text)
+            return BeautifulSoup(text, self.parser_backend, parse_only=strainer)
+    
+    async def aload_from_url(self, url: str, session=None, retries=3, delay=0,
+                             semaphore=None, host_semaphores=None) -> Optional[BeautifulSoup]:
+        """
+        Асинхронная загрузка страницы (требуется: pip3 install aiohttp)
+        session: общий aiohttp.ClientSession (пул соединений); если не указан - создаётся на один запрос
+        semaphore / host_semaphores: общие ограничения одновременных запросов (см. afetch_many)
+        """
+        content = await self.afetch_bytes(url, session, retries, delay, semaphore, host_semaphores)
+        if content is None:
+            return None
+        return self.load_from_bytes(content, url=url)
+    
+    async def afetch_bytes(self, url: str, session=None, retries=3, delay=0,
+                           semaphore=None, host_semaphores=None) -> Optional[bytes]:
+        """Асинхронно скачать тело страницы (без разбора)"""
+        import aiohttp
+        
+        if session is None:
+            async with aiohttp.ClientSession(headers=dict(self.session.headers)) as own_session:
+                return await self.afetch_bytes(url, own_session, retries, delay,
+                                               semaphore, host_semaphores)
+        
+        cached, content = self._from_cache(url)
+        if content is not None or (self.cache is not None and self.cache.offline):
+            return content
+        
+        host_semaphore = None
+        if host_semaphores is not None:
+            host = urlparse(url).netloc
+            host_semaphore = host_semaphores[host]
+        
+        for attempt in range(retries):
+            try:
+                if delay and self.rate_limiter is None:
+                    await asyncio.sleep(random.uniform(delay, delay + 1))
                 
-                # Пробуем основные кодировки
-                encodings_to_try = ['utf-8', 'windows-1251', 'koi8-r', 'cp866']
-                for enc in encodings_to_try:
-                    try:
-                        text = content.decode(enc)
-                        print(f"✅ Страница загружена (попытка {attempt + 1}) в кодировке {enc}")
-                        return BeautifulSoup(text, "html.parser")
-                    except UnicodeDecodeError:
-                        continue
+                headers = self.cache.conditional_headers(cached) if self.cache is not None else None
+                # Разрешение ограничителя - до семафоров: ожидание паузы сайта
+                # не занимает слоты, нужные запросам к другим сайтам
+                if self.rate_limiter is not None:
+                    await self.rate_limiter.aacquire(url)
+                started = None
+                status = retry_after = None
+                try:
+                    async with _optional(host_semaphore), _optional(semaphore):
+                        started = time.monotonic()
+                        fetch_started = time.perf_counter()
+                        try:
+                            async with session.get(url, headers=headers,
+                                                   timeout=aiohttp.ClientTimeout(total=10)) as response:
+                                status = response.status
+                                retry_after = response.headers.get('Retry-After')
+                                
+                                if response.status == 304 and cached is not None:
+                                    self.cache.touch(url, response.headers)
+                                    self.metrics.count("not_modified")
+                                    print(f"📦 Страница не изменилась (кэш): {url}")
+                                    return self._replay(url, cached, response.headers)
+                                
+                                response.raise_for_status()
+                                content = await response.read()
+                        finally:
+                            self.metrics.observe("fetch", time.perf_counter() - fetch_started)
+                finally:
+                    if self.rate_limiter is not None:
+                        # Отмена до отправки запроса - не ошибка сайта
+                        latency = time.monotonic() - started if started is not None else None
+                        self.rate_limiter.release(url, status, latency, retry_after,
+                                                  error=started is not None and status is None)
                 
-                # Если ничего не помогло, пробуем с ошибками
-                text = content.decode('utf-8', errors='ignore')
-                print(f"✅ Страница загружена (попытка {attempt + 1}) с игнорированием ошибок")
-                return BeautifulSoup(text, "html.parser")
+                if self.cache is not None:
+                    self.cache.put(url, content, response.headers)
+                self._remember_charset(url, response.headers)
+                self._count_download(content)
+                print(f"✅ Страница загружена (попытка {attempt + 1})")
+                return content
                 
-            except requests.exceptions.RequestException as e:
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
                 print(f"⚠️ Ошибка загрузки (попытка {attempt + 1}/{retries}): {e}")
                 if attempt < retries - 1:
-                    time.sleep(delay * 2)
+                    self.metrics.count("retries")
+                    if self.rate_limiter is None:
+                        await asyncio.sleep(max(delay, 1) * 2)
                 else:
+                    self.metrics.count("fetch_errors")
                     print(f"❌ Не удалось загрузить {url} после {retries} попыток")
-                    return None
+                    return self._stale(url, cached, getattr(e, 'status', None))
+    
+    @contextlib.asynccontextmanager
+    async def async_pool(self, concurrency=100, per_host=8):
+        """
+        Сессия aiohttp и семафоры для afetch_bytes / aload_from_url
+        Возвращает (сессия, общий семафор, семафоры по сайтам)
+        """
+        import aiohttp
+        
+        semaphore = asyncio.Semaphore(concurrency)
+        host_semaphores = defaultdict(lambda: asyncio.Semaphore(per_host))
+        connector = aiohttp.TCPConnector(limit=concurrency, limit_per_host=per_host)
+        
+        async with aiohttp.ClientSession(connector=connector,
+                                         headers=dict(self.session.headers)) as session:
+            yield session, semaphore, host_semaphores
+    
+    async def afetch_many(self, urls: List[str], concurrency=100, per_host=8,
+                          retries=3, delay=0, raw=False) -> List[Optional[BeautifulSoup]]:
+        """
+        Загрузить много страниц одновременно через один пул соединений
+        concurrency: сколько запросов всего в полёте
+        per_host: сколько запросов одновременно к одному сайту
+        raw: вернуть тела страниц (bytes) без разбора
+        Результаты возвращаются в порядке urls (None - если страница не загрузилась)
+        """
+        async with self.async_pool(concurrency, per_host) as (session, semaphore, host_semaphores):
+            load = self.afetch_bytes if raw else self.aload_from_url
+            tasks = [
+                load(url, session, retries, delay, semaphore, host_semaphores)
+                for url in urls
+            ]
+            return await asyncio.gather(*tasks)
+    
+    def fetch_many(self, urls: List[str], **kwargs) -> List[Optional[BeautifulSoup]]:
+        """Синхронная обёртка над afetch_many (для кода без asyncio)"""
+        return asyncio.run(self.afetch_many(urls, **kwargs))
     
     def _load_with_selenium(self, url: str, wait_for=None) -> Optional[BeautifulSoup]:
-        """Загрузка страницы с JavaScript через Selenium"""
+        """Загрузка страницы с JavaScript через Selenium (браузер берётся из пула)"""
         try:
-            from selenium import webdriver
-            from selenium.webdriver.chrome.options import Options
-            from selenium.webdriver.chrome.service import Service
             from selenium.webdriver.common.by import By
             from selenium.webdriver.support.ui import WebDriverWait
             from selenium.webdriver.support import expected_conditions as EC
-            from webdriver_manager.chrome import ChromeDriverManager
-            
-            options = Options()
-            if self.headless:
-                options.add_argument('--headless')
-            
-            # Маскируем Selenium
-            options.add_argument('--disable-blink-features=AutomationControlled')
-            options.add_experimental_option("excludeSwitches", ["enable-automation"])
-            options.add_experimental_option('useAutomationExtension', False)
-            
-            # Добавляем реальный user-agent
-            options.add_argument(f'user-agent={self.session.headers["User-Agent"]}')
-            
-            # Отключаем автоматизацию
-            options.add_argument('--disable-dev-shm-usage')
-            options.add_argument('--no-sandbox')
-            
-            print("🔄 Запускаем браузер...")
-            
-            # Запускаем браузер
-            service = Service(ChromeDriverManager().install())
-            self.driver = webdriver.Chrome(service=service, options=options)
-            
-            # Маскируем WebDriver
-            self.driver.execute_script("Object.defineProperty(navigator, 'webdriver', {get: () => undefined})")
-            
-            # Загружаем страницу
-            print(f"📱 Загружаем: {url}")
-            self.driver.get(url)
-            
-            # Ждём загрузки JavaScript
-            if wait_for:
-                try:
-                    WebDriverWait(self.driver, 10).until(
-                        EC.presence_of_element_located((By.CSS_SELECTOR, wait_for))
-                    )
-                    print(f"✅ Элемент '{wait_for}' загружен")
-                except Exception as e:
-                    print(f"⚠️ Таймаут ожидания элемента: {e}")
-            else:
-                time.sleep(3)
-            
-            # Прокручиваем страницу вниз
-            self.driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
-            time.sleep(1)
             
-            # Получаем HTML
-            html = self.driver.page_source
-            self.driver.quit()
+            with self.get_driver_pool().driver() as driver:
+                self.driver = driver
+                
+                # Загружаем страницу
+                print(f"📱 Загружаем: {url}")
+                with self.metrics.time("fetch"):
+                    driver.get(url)
+                
+                # Ждём загрузки JavaScript
+                if wait_for:
+                    try:
+                        WebDriverWait(driver, 10).until(
+                            EC.presence_of_element_located((By.CSS_SELECTOR, wait_for))
+                        )
+                        print(f"✅ Элемент '{wait_for}' загружен")
+                    except Exception as e:
+                        print(f"⚠️ Таймаут ожидания элемента: {e}")
+                else:
+                    time.sleep(3)
+                
+                # Прокручиваем страницу вниз
+                driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
+                time.sleep(1)
+                
+                # Получаем HTML
+                html = driver.page_source
             
             print("✅ Страница с JavaScript загружена")
-            return BeautifulSoup(html, "html.parser")
+            return self._make_soup(html)
             
         except Exception as e:
             print(f"❌ Ошибка Selenium: {e}")
-            if self.driver:
-                self.driver.quit()
             return None
+        finally:
+            self.driver = None
+    
+    def get_driver_pool(self) -> DriverPool:
+        """Пул браузеров (если не передан в конструктор - свой, на один браузер)"""
+        if self.driver_pool is None:
+            self.driver_pool = DriverPool(size=1, headless=self.headless,
+                                          user_agent=self.session.headers["User-Agent"])
+        return self.driver_pool
+    
+    def close(self):
+        """Закрыть браузеры и соединения"""
+        if self.driver_pool is not None and self._own_driver_pool:
+            self.driver_pool.close()
+        self.session.close()
     
     def load_from_html(self, html_content: str) -> BeautifulSoup:
         """Загрузить из HTML строки"""
-        return BeautifulSoup(html_content, "html.parser")
+        return self._make_soup(html_content)
     
-    def extract_css(self, soup: BeautifulSoup, selector: str, attribute: str = None) -> List[str]:
+    def extract_css(self, soup: BeautifulSoup, selector, attribute: str = None, limit: int = None) -> List[str]:
         """
         Извлечь данные по CSS селектору
+        selector: строка или скомпилированный селектор (soupsieve.compile)
         attribute: если указан, берём атрибут (например 'href' для ссылок)
+        limit: сколько элементов брать (поиск останавливается на limit-м)
         """
         if soup is None:
             return []
         
-        elements = soup.select(selector)
+        if isinstance(selector, str):
+            elements = soup.select(selector, limit=limit)
+        elif isinstance(soup, SelectolaxNode):
+            # selectolax не понимает soupsieve - используем исходную строку
+            elements = soup.select(selector.pattern, limit=limit)
+        else:
+            elements = selector.select(soup, limit=limit or 0)
+        return self.element_values(elements, attribute)
+    
+    def element_values(self, elements, attribute: str = None) -> List[str]:
+        """
+        Значения найденных элементов: текст или атрибут
+        (общая часть extract_css и SchemaEngine, где элементы ищет SelectorMatcher)
+        """
         result = []
         
         for el in elements:
@@ -178,19 +491,18 @@ class ParserEngine:
         
         return result
     
-    def extract_xpath(self, soup: BeautifulSoup, xpath: str, attribute: str = None) -> List[str]:
+    def extract_xpath(self, soup: BeautifulSoup, xpath: str, attribute: str = None, limit: int = None) -> List[str]:
         """
         Извлечь данные по XPath
         Требуется установка: pip3 install lxml
+        limit: сколько элементов брать
         """
         try:
-            from lxml import html
-            
-            # Преобразуем BeautifulSoup в lxml дерево
-            dom = html.fromstring(str(soup))
-            
-            # Извлекаем по XPath
-            elements = dom.xpath(xpath)
+            # Дерево строится один раз на страницу, XPath компилируется один раз на выражение
+            dom = self.get_lxml_tree(soup)
+            elements = _compile_xpath(xpath)(dom)
+            if limit and isinstance(elements, list):
+                elements = elements[:limit]
             result = []
             
             for el in elements:
@@ -209,6 +521,21 @@ class ParserEngine:
             print(f"⚠️ Ошибка XPath: {e}")
             return []
     
+    def get_lxml_tree(self, soup):
+        """
+        lxml дерево страницы для XPath
+        Строится из soup один раз и переиспользуется всеми XPath полями этой страницы
+        """
+        cached = self._lxml_cache
+        if cached is not None and cached[0] is soup:
+            return cached[1]
+        
+        from lxml import html
+        
+        dom = html.fromstring(str(soup))
+        self._lxml_cache = (soup, dom)
+        return dom
+    
     def extract_json_next_data(self, soup: BeautifulSoup) -> Optional[Dict]:
         """Извлечь JSON из __NEXT_DATA__ (React сайты)"""
         if soup is None:
@@ -244,42 +571,74 @@ class ParserEngine:
         
         return result
     
-    def extract_json_path(self, json_data: Union[Dict, List], path: str):
+    def extract_json_next_data_bytes(self, content: bytes) -> Optional[Dict]:
+        """
+        Извлечь JSON из __NEXT_DATA__ прямо из байтов ответа
+        Дерево страницы не строится, декодируется только сам блок
+        """
+        if not content:
+            return None
+        
+        match = _NEXT_DATA_RE.search(content)
+        if not match:
+            return None
+        
+        try:
+            return self._load_json_block(match.group(1), content)
+        except Exception as e:
+            print(f"⚠️ Ошибка парсинга __NEXT_DATA__: {e}")
+            return None
+    
+    def extract_json_ld_bytes(self, content: bytes) -> List[Dict]:
+        """Извлечь JSON-LD прямо из байтов ответа (без дерева страницы)"""
+        if not content:
+            return []
+        
+        result = []
+        for match in _JSON_LD_RE.finditer(content):
+            try:
+                result.append(self._load_json_block(match.group(1), content))
+            except:
+                pass
+        
+        return result
+    
+    def _load_json_block(self, block: bytes, content: bytes):
+        """Разобрать JSON из тела <script> в кодировке страницы"""
+        encoding, _ = self.encoding_detector.detect(content)
+        
+        if encoding in (None, "utf-8", "utf-8-sig"):
+            try:
+                # json.loads сам декодирует UTF-8
+                return json.loads(block)
+            except UnicodeDecodeError:
+                pass
+        else:
+            try:
+                return json.loads(block.decode(encoding))
+            except UnicodeDecodeError:
+                pass
+        
+        text, _, _ = self.encoding_detector.decode(block)
+        return json.loads(text)
+    
+    def extract_json_path(self, json_data: Union[Dict, List], path):
         """
         Извлечь данные из JSON по пути вида:
         props.pageProps.initialState.entities.recipes.0.title
-        Поддерживает массивы и фильтры
+        Поддерживает массивы (в т.ч. индексы с конца: recipes.-1),
+        * (все элементы) и фильтры [?ключ=значение]
+        path: строка, скомпилированный JsonPath или уже разбитый путь (кортеж частей)
         """
         if json_data is None:
             return None
         
         try:
-            parts = path.split(".")
-            current = json_data
-            
-            for part in parts:
-                if isinstance(current, list):
-                    try:
-                        idx = int(part)
-                        if 0 <= idx < len(current):
-                            current = current[idx]
-                        else:
-                            return None
-                    except ValueError:
-                        result = []
-                        for item in current:
-                            if isinstance(item, dict) and part in item:
-                                result.append(item[part])
-                        return result
-                        
-                elif isinstance(current, dict):
-                    current = current.get(part)
-                    if current is None:
-                        return None
-                else:
-                    return None
-            
-            return current
+            if isinstance(path, str):
+                path = compile_json_path(path)
+            elif not isinstance(path, JsonPath):
+                path = json_path_from_parts(path)
+            return path.evaluate(json_data)
             
         except Exception as e:
             print(f"⚠️ Ошибка извлечения JSON: {e}")
@@ -0,0 +1,256 @@
+# core/rate_limiter.py
+import asyncio
+import threading
+import time
+from dataclasses import dataclass
+from email.utils import parsedate_to_datetime
+from typing import Dict, Optional
+from urllib.parse import urlparse
+
+
+@dataclass
+class HostState:
+    """Состояние ограничителя для одного сайта"""
+    rate: float                     # запросов в секунду (пополнение корзины)
+    concurrency: float              # сколько запросов одновременно
+    tokens: float
+    updated: float
+    in_flight: int = 0
+    blocked_until: float = 0.0      # Retry-After / пауза после 429
+    latency: Optional[float] = None # сглаженное время ответа
+    crawl_delay: Optional[float] = None
+
+
+def _wake(waiter: asyncio.Future):
+    """Разбудить aacquire (вызывается в петле ждущего)"""
+    if not waiter.done():
+        waiter.set_result(None)
+
+
+class HostRateLimiter:
+    """
+    Адаптивное ограничение запросов по сайтам (общий на все потоки)
+
+    Для каждого сайта - корзина токенов (rate запросов в секунду) и
+    лимит одновременных запросов. Оба подстраиваются по AIMD:
+    успешные быстрые ответы понемногу увеличивают их, 429/503, ошибки и
+    медленные ответы - уменьшают вдвое. Retry-After и Crawl-delay из
+    robots.txt соблюдаются.
+    """
+
+    def __init__(self, rate=2.0, burst=2, min_rate=0.1, max_rate=20.0,
+                 concurrency=2, max_concurrency=16, target_latency=2.0,
+                 respect_robots=False, user_agent="*"):
+        """
+        rate: начальная скорость (запросов в секунду на сайт)
+        burst: сколько запросов можно сделать сразу подряд
+        min_rate / max_rate: границы скорости
+        concurrency / max_concurrency: начальный и предельный лимит одновременных запросов
+        target_latency: время ответа (сек), выше которого считаем сайт перегруженным
+        respect_robots: читать robots.txt и соблюдать Crawl-delay
+        """
+        self.initial_rate = rate
+        self.burst = max(1, burst)
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.initial_concurrency = concurrency
+        self.max_concurrency = max_concurrency
+        self.target_latency = target_latency
+        self.respect_robots = respect_robots
+        self.user_agent = user_agent
+
+        self._hosts: Dict[str, HostState] = {}
+        self._lock = threading.Condition()
+        # aacquire, ждущие release (в любом потоке): future -> его петля
+        self._async_waiters: Dict[asyncio.Future, asyncio.AbstractEventLoop] = {}
+
+    def acquire(self, url: str):
+        """Дождаться разрешения на запрос (блокирующе)"""
+        host = self._host(url)
+        with self._lock:
+            while True:
+                wait = self._try_acquire(host)
+                if wait is not None and wait <= 0:
+                    return
+                # None - все слоты заняты: ждём release (notify) без таймаута
+                self._lock.wait(wait)
+
+    async def aacquire(self, url: str):
+        """
+        Дождаться разрешения на запрос (для asyncio)
+        Спим ровно до следующего токена / конца паузы, а при занятых слотах - до release
+        """
+        host = await self._ahost(url)
+        while True:
+            waiter = None
+            with self._lock:
+                wait = self._try_acquire(host)
+                if wait is None:
+                    loop = asyncio.get_running_loop()
+                    waiter = loop.create_future()
+                    self._async_waiters[waiter] = loop
+            if waiter is None:
+                if wait <= 0:
+                    return
+                await asyncio.sleep(wait)
+                continue
+            try:
+                await waiter
+            finally:
+                with self._lock:
+                    self._async_waiters.pop(waiter, None)
+
+    def release(self, url: str, status: Optional[int] = None, latency: Optional[float] = None,
+                retry_after: Optional[str] = None, error: bool = False):
+        """
+        Сообщить результат запроса
+        status: HTTP код ответа; latency: время ответа (сек)
+        retry_after: значение заголовка Retry-After; error: запрос не удался (сеть/таймаут)
+        """
+        host = urlparse(url).netloc
+        with self._lock:
+            state = self._hosts.get(host)
+            if state is None:
+                return
+            state.in_flight = max(0, state.in_flight - 1)
+
+            if latency is not None:
+                state.latency = latency if state.latency is None else 0.8 * state.latency + 0.2 * latency
+
+            now = time.monotonic()
+            pause = self._parse_retry_after(retry_after)
+            overloaded = error or status in (429, 503)
+
+            if overloaded:
+                # Мультипликативное уменьшение
+                state.rate = max(self.min_rate, state.rate / 2)
+                state.concurrency = max(1.0, state.concurrency / 2)
+                if pause is None and status in (429, 503):
+                    pause = 1 / state.rate
+            elif state.latency is not None and state.latency > self.target_latency:
+                # Сайт отвечает медленно - слегка притормаживаем
+                state.rate = max(self.min_rate, state.rate * 0.9)
+                state.concurrency = max(1.0, state.concurrency * 0.9)
+            elif status is not None and status < 400:
+                # Аддитивное увеличение
+                state.rate = min(self._max_rate(state), state.rate + 0.1)
+                state.concurrency = min(self.max_concurrency, state.concurrency + 1 / state.concurrency)
+
+            if pause:
+                state.blocked_until = max(state.blocked_until, now + pause)
+                print(f"⏸️ {host}: пауза {pause:.1f} с")
+
+            self._lock.notify_all()
+            # Ждущие aacquire проверят слоты снова (release может прийти из другого потока)
+            for waiter, loop in self._async_waiters.items():
+                loop.call_soon_threadsafe(_wake, waiter)
+            self._async_waiters.clear()
+
+    def stats(self) -> Dict[str, Dict]:
+        """Текущие параметры по сайтам (для логов)"""
+        with self._lock:
+            return {
+                host: {
+                    "rate": round(state.rate, 2),
+                    "concurrency": round(state.concurrency, 2),
+                    "in_flight": state.in_flight,
+                    "latency": round(state.latency, 3) if state.latency is not None else None,
+                }
+                for host, state in self._hosts.items()
+            }
+
+    def _host(self, url: str) -> str:
+        """Имя сайта; при первом обращении создаём состояние (и читаем robots.txt)"""
+        parsed = urlparse(url)
+        host = parsed.netloc
+        with self._lock:
+            if host in self._hosts:
+                return host
+
+        # robots.txt читаем вне блокировки, чтобы не задерживать другие сайты
+        crawl_delay = self._read_crawl_delay(parsed) if self.respect_robots else None
+        self._add_host(host, crawl_delay)
+        return host
+
+    async def _ahost(self, url: str) -> str:
+        """_host для asyncio: robots.txt читается в отдельном потоке, петля не блокируется"""
+        parsed = urlparse(url)
+        host = parsed.netloc
+        with self._lock:
+            if host in self._hosts:
+                return host
+
+        crawl_delay = None
+        if self.respect_robots:
+            crawl_delay = await asyncio.to_thread(self._read_crawl_delay, parsed)
+        self._add_host(host, crawl_delay)
+        return host
+
+    def _add_host(self, host: str, crawl_delay: Optional[float]):
+        """Состояние нового сайта (если его ещё не создал другой поток)"""
+        with self._lock:
+            if host not in self._hosts:
+                rate = self.initial_rate
+                if crawl_delay:
+                    rate = min(rate, 1 / crawl_delay)
+                self._hosts[host] = HostState(
+                    rate=rate,
+                    concurrency=float(self.initial_concurrency),
+                    tokens=float(self.burst),
+                    updated=time.monotonic(),
+                    crawl_delay=crawl_delay
+                )
+
+    def _try_acquire(self, host: str) -> Optional[float]:
+        """
+        Занять слот, если можно (0); иначе вернуть, сколько ждать (вызывать под блокировкой)
+        None - все слоты сайта заняты, ждать до release
+        """
+        state = self._hosts[host]
+        now = time.monotonic()
+
+        if now < state.blocked_until:
+            return state.blocked_until - now
+
+        state.tokens = min(self.burst, state.tokens + (now - state.updated) * state.rate)
+        state.updated = now
+
+        if state.in_flight >= int(state.concurrency):
+            return None
+        if state.tokens < 1:
+            return (1 - state.tokens) / state.rate
+
+        state.tokens -= 1
+        state.in_flight += 1
+        return 0
+
+    def _max_rate(self, state: HostState) -> float:
+        if state.crawl_delay:
+            return min(self.max_rate, 1 / state.crawl_delay)
+        return self.max_rate
+
+    def _read_crawl_delay(self, parsed) -> Optional[float]:
+        from urllib.robotparser import RobotFileParser
+
+        robots = RobotFileParser(f"{parsed.scheme}://{parsed.netloc}/robots.txt")
+        try:
+            robots.read()
+            delay = robots.crawl_delay(self.user_agent)
+            return float(delay) if delay else None
+        except Exception as e:
+            print(f"⚠️ Не удалось прочитать robots.txt {parsed.netloc}: {e}")
+            return None
+
+    @staticmethod
+    def _parse_retry_after(value: Optional[str]) -> Optional[float]:
+        """Retry-After: число секунд или HTTP дата"""
+        if not value:
+            return None
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            pass
+        try:
+            return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+        except (TypeError, ValueError):
+            return None
@@ -1,27 +1,126 @@
 # core/schema_engine.py
+import threading
+import weakref
+
+from core.compiled_schema import CompiledSchema
+from core.formula_compiler import compile_formula
+from core.metrics import NULL_METRICS
 from core.transform_engine import TransformEngine
+from storage.fingerprint_store import content_hash
 
 class SchemaEngine:
     """Движок для применения схемы к странице"""
     
-    def __init__(self):
+    def __init__(self, metrics=None):
+        """metrics: core.metrics.Metrics - время и попадания каждого поля, время форматирования"""
+        self.metrics = metrics or NULL_METRICS
         self.transformer = TransformEngine()
+        self._compile_lock = threading.Lock()
+        self.unchanged = 0  # сколько страниц не изменились (результат из fingerprints, без разбора)
+        self._unchanged_lock = threading.Lock()
+    
+    def compile(self, schema):
+        """
+        Скомпилировать схему (результат кэшируется для этого объекта Schema)
+        Если схема изменена после компиляции - вызовите CompiledSchema.from_schema заново
+        Кэш хранится на самой схеме (SchemaEngine -> CompiledSchema, слабые ссылки на движки):
+        движок не держит в памяти все схемы, которые через него прошли
+        """
+        if isinstance(schema, CompiledSchema):
+            return schema
+        
+        cache = getattr(schema, "_compiled_by", None)
+        cached = cache.get(self) if cache is not None else None
+        if cached is not None:
+            return cached
+        
+        # Компилируем под блокировкой: потоки BatchEngine не компилируют одну схему дважды
+        with self._compile_lock:
+            cache = getattr(schema, "_compiled_by", None)
+            if cache is None:
+                cache = weakref.WeakKeyDictionary()
+                try:
+                    schema._compiled_by = cache
+                except AttributeError:
+                    # Объект без __dict__ - компилируем каждый раз
+                    return CompiledSchema.from_schema(schema, self.transformer)
+            compiled = cache.get(self)
+            if compiled is None:
+                compiled = cache[self] = CompiledSchema.from_schema(schema, self.transformer)
+        return compiled
     
-    def apply_schema(self, soup, schema, parser_engine):
+    def apply_to_bytes(self, content, schema, parser_engine, url=None, fingerprints=None,
+                       charset=None, verify_filter=False):
+        """
+        Применить схему к скачанному телу страницы (bytes)
+        Если все поля берутся из __NEXT_DATA__ / JSON-LD, дерево страницы
+        не строится вовсе - JSON блоки находятся прямо в байтах
+        url + fingerprints (storage.fingerprint_store.FingerprintStore): если тело
+        страницы и схема не изменились с прошлого раза - вернуть прошлый результат без разбора
+        charset: кодировка из заголовка ответа
+        verify_filter: разобрать страницу ещё и без parse_filter и сравнить результат
+                       (при расхождении берётся полный результат)
+        """
+        compiled = self.compile(schema)
+        
+        body_hash, previous = self.previous_result(content, compiled, url, fingerprints)
+        if previous is not None:
+            return previous
+        
+        soup = None
+        if compiled.needs_dom:
+            soup = parser_engine.load_from_bytes(content, url=url, charset=charset)
+        result = self.apply_schema(soup, compiled, parser_engine, content=content)
+        
+        if verify_filter and soup is not None and parser_engine.parse_filter is not None:
+            full_soup = parser_engine.load_from_bytes(content, use_filter=False, url=url, charset=charset)
+            full = self.apply_schema(full_soup, compiled, parser_engine, content=content)
+            if full != result:
+                changed = [name for name in full if full[name] != result.get(name)]
+                print(f"⚠️ Фильтр разбора изменил результат {url}: {', '.join(changed)}")
+                result = full
+        
+        self.remember_result(url, body_hash, compiled, result, fingerprints)
+        return result
+    
+    def previous_result(self, content, schema, url, fingerprints):
+        """
+        Прошлый результат, если тело страницы и схема не изменились
+        Возвращает (хэш тела или None - отпечатки не ведутся, результат или None)
+        """
+        if fingerprints is None or not url:
+            return None, None
+        body_hash = content_hash(content)
+        previous = fingerprints.get(url, body_hash, self.compile(schema).version)
+        if previous is not None:
+            with self._unchanged_lock:
+                self.unchanged += 1
+            self.metrics.count("unchanged")
+        return body_hash, previous
+    
+    def remember_result(self, url, body_hash, schema, result, fingerprints):
+        """Запомнить результат для этого тела страницы (результаты с ошибками не запоминаются)"""
+        if body_hash is not None and fingerprints is not None and '_errors' not in result:
+            fingerprints.put(url, body_hash, self.compile(schema).version, result)
+    
+    def apply_schema(self, soup, schema, parser_engine, content=None):
         """
         Применить схему к загруженной странице
-        soup - объект BeautifulSoup
-        schema - объект Schema
+        soup - объект BeautifulSoup (может быть None, если схема только из JSON и передан content)
+        schema - объект Schema или CompiledSchema
         parser_engine - объект ParserEngine
+        content - исходные байты страницы: JSON блоки ищутся в них, а не в дереве
         """
+        compiled = self.compile(schema)
+        metrics = self.metrics
         result = {}
         errors = []
         
-        # Пробуем извлечь JSON из страницы (если есть)
-        json_data = parser_engine.extract_json_next_data(soup)
-        json_ld = parser_engine.extract_json_ld(soup)
+        json_values, json_ld = self._page_json(compiled, soup, parser_engine, content)
+        with metrics.time("match"):
+            css_elements = self._page_css(compiled, soup)
         
-        for field_name, field in schema.fields.items():
+        for field_name, field in compiled.fields.items():
             try:
                 # Вычисляемые поля
                 if field.data_type == "computed":
@@ -29,48 +128,21 @@ class SchemaEngine:
                     continue
                 
                 # Обычные поля
-                raw_value = None
-                
-                if field.source is None:
+                if field.source_type is None:
                     if field.required:
                         errors.append(f"Поле {field_name}: не указан источник")
                     continue
                 
-                # Выбираем источник данных
-                if field.source.type == "css":
-                    raw_value = parser_engine.extract_css(
-                        soup,
-                        field.source.selector,
-                        field.source.attribute
-                    )
-                    
-                elif field.source.type == "xpath":
-                    raw_value = parser_engine.extract_xpath(
-                        soup,
-                        field.source.selector,
-                        field.source.attribute
-                    )
-                    
-                elif field.source.type == "json" and json_data:
-                    raw_value = parser_engine.extract_json_path(
-                        json_data,
-                        field.source.selector
-                    )
-                    
-                elif field.source.type == "json-ld" and json_ld:
-                    # Простейший доступ к JSON-LD
-                    if field.source.selector in json_ld[0]:
-                        raw_value = json_ld[0][field.source.selector]
+                raw_value = self._raw_value(field, soup, parser_engine, json_values, json_ld, css_elements)
+                metrics.field(field_name, raw_value not in (None, "", []))
                 
                 # Применяем форматирование
-                formatted = self.transformer.apply_format(
-                    raw_value,
-                    field.format
-                )
+                with metrics.time("transform"):
+                    formatted = field.transform(raw_value)
                 
                 # Если значение пустое, используем значение по умолчанию
-                if not formatted and field.format and field.format.default_value is not None:
-                    formatted = field.format.default_value
+                if not formatted and field.default_value is not None:
+                    formatted = field.default_value
                 
                 # Проверяем обязательные поля
                 if field.required and not formatted:
@@ -88,28 +160,91 @@ class SchemaEngine:
         
         return result
     
+    def extract_raw(self, soup, schema, parser_engine, content=None):
+        """
+        Сырые значения полей (до форматирования): {поле: список текстов / значение JSON}
+        Тот же разбор, что в apply_schema - для проверки полей в конструкторе
+        """
+        compiled = self.compile(schema)
+        json_values, json_ld = self._page_json(compiled, soup, parser_engine, content)
+        css_elements = self._page_css(compiled, soup)
+        return {
+            field_name: self._raw_value(field, soup, parser_engine, json_values, json_ld, css_elements)
+            for field_name, field in compiled.fields.items()
+            if field.source_type is not None and field.data_type != "computed"
+        }
+    
+    @staticmethod
+    def _page_json(compiled, soup, parser_engine, content=None):
+        """
+        JSON блоки страницы - только если их используют поля
+        Возвращает (значения JSON путей по полям, список JSON-LD)
+        """
+        source_types = compiled.source_types
+        json_data = None
+        json_ld = []
+        if "json" in source_types:
+            if content is not None:
+                json_data = parser_engine.extract_json_next_data_bytes(content)
+            else:
+                json_data = parser_engine.extract_json_next_data(soup)
+        
+        # Все JSON пути схемы - за один проход по общим началам путей
+        json_values = compiled.json_paths.evaluate(json_data) if json_data else {}
+        
+        if "json-ld" in source_types:
+            if content is not None:
+                json_ld = parser_engine.extract_json_ld_bytes(content)
+            else:
+                json_ld = parser_engine.extract_json_ld(soup)
+        
+        return json_values, json_ld
+    
+    @staticmethod
+    def _page_css(compiled, soup):
+        """
+        Элементы всех CSS полей за один обход дерева: {поле: [элементы]}
+        Пусто, если обход не нужен (меньше двух CSS полей) или не поддерживается
+        движком разбора - тогда каждое поле ищется своим select()
+        """
+        matcher = compiled.css_matcher
+        if len(matcher) < 2 or not matcher.supports(soup):
+            return {}
+        return matcher.match(soup)
+    
+    @staticmethod
+    def _raw_value(field, soup, parser_engine, json_values, json_ld, css_elements):
+        """Сырое значение одного поля из выбранного источника"""
+        if field.source_type == "css":
+            elements = css_elements.get(field.name)
+            if elements is not None:
+                return parser_engine.element_values(elements, field.attribute)
+            return parser_engine.extract_css(soup, field.css, field.attribute, field.limit)
+        
+        if field.source_type == "xpath":
+            return parser_engine.extract_xpath(soup, field.selector, field.attribute, field.limit)
+        
+        if field.source_type == "json":
+            return json_values.get(field.name)
+        
+        if field.source_type == "json-ld" and json_ld and isinstance(json_ld[0], dict):
+            # Простейший доступ к JSON-LD
+            return json_ld[0].get(field.selector)
+        
+        return None
+    
     def _evaluate_formula(self, formula, data):
-        """Вычислить значение по формуле (безопасная версия)"""
+        """
+        Вычислить значение по формуле (безопасная версия)
+        formula - CompiledFormula или строка (будет скомпилирована)
+        """
         if not formula:
             return None
         
         try:
-            # Создаём безопасное окружение
-            safe_dict = {
-                'int': int,
-                'float': float,
-                'str': str,
-                'len': len,
-                'sum': sum,
-                'round': round,
-                'abs': abs,
-                'max': max,
-                'min': min
-            }
-            # Добавляем данные
-            safe_dict.update(data)
-            
-            return eval(formula, {"__builtins__": {}}, safe_dict)
+            if isinstance(formula, str):
+                formula = compile_formula(formula)
+            return formula.evaluate(data)
         except Exception as e:
             print(f"⚠️ Ошибка вычисления формулы: {e}")
             return None
@@ -0,0 +1,188 @@
+# core/selector_matcher.py
+"""
+Все CSS селекторы схемы - за один проход по дереву
+
+soup.select() на каждое поле обходит всю страницу: 14 полей - 14 обходов.
+SelectorMatcher обходит дерево один раз и проверяет каждый элемент только
+теми селекторами, которые могут на нём сработать. Селекторы разложены по
+ключу правой (последней) части селектора:
+    #id       -> по id элемента
+    .class    -> по каждому классу элемента
+    [attr...] -> по именам атрибутов элемента
+    tag       -> по имени тега
+    остальное (*, :not(...), ...) проверяется на каждом элементе
+
+Проверка элемента - тот же soupsieve, что и в select(), поэтому результат
+(и порядок элементов) совпадает с отдельными soup.select() по каждому полю.
+Обход использует внутренние классы soupsieve (CSSMatch, разобранные селекторы);
+если в установленной версии их нет или они устроены иначе - каждое поле
+ищется обычным select().
+"""
+from typing import Any, Dict, List, Optional, Tuple
+
+from bs4 import Tag
+
+try:
+    # Не публичный API soupsieve - версия не закреплена, поэтому есть запасной путь
+    from soupsieve.css_match import CSSMatch
+except ImportError:
+    CSSMatch = None
+
+
+def _selector_key(selector) -> Optional[Tuple[str, str]]:
+    """
+    Ключ правой части одного селектора (soupsieve Selector): ('id', ...), ('class', ...),
+    ('attr', ...), ('tag', ...) или None - проверять на каждом элементе
+    """
+    if selector.ids:
+        return "id", selector.ids[0]
+    if selector.classes:
+        return "class", selector.classes[0]
+    for attribute in selector.attributes:
+        # Атрибуты с пространством имён ([xlink|href]) хранятся в дереве иначе
+        if not attribute.prefix:
+            return "attr", attribute.attribute.lower()
+    tag = selector.tag
+    if tag is not None and tag.name != "*" and tag.name == tag.name.lower() and not tag.prefix:
+        return "tag", tag.name
+    return None
+
+
+class SelectorMatcher:
+    """
+    Набор CSS селекторов (soupsieve.compile) для всех CSS полей схемы
+    match(soup) - элементы всех полей за один обход дерева
+    """
+
+    def __init__(self):
+        self.fields: List[str] = []
+        self.selectors: List[Any] = []
+        self.limits: List[Optional[int]] = []
+        # ключ правой части селектора -> номера полей
+        self._by_id: Dict[str, List[int]] = {}
+        self._by_class: Dict[str, List[int]] = {}
+        self._by_attr: Dict[str, List[int]] = {}
+        self._by_tag: Dict[str, List[int]] = {}
+        self._universal: List[int] = []
+        # есть поля из нескольких селекторов через запятую (на одном элементе могут сработать дважды)
+        self._overlap = False
+        # Внутренний API soupsieve не подошёл - ищем каждое поле через select()
+        self._fallback = CSSMatch is None
+
+    def add(self, name: str, selector, limit: Optional[int] = None):
+        """Добавить поле: selector - скомпилированный soupsieve селектор"""
+        index = len(self.fields)
+        self.fields.append(name)
+        self.selectors.append(selector)
+        self.limits.append(limit or None)
+
+        buckets = {
+            "id": self._by_id, "class": self._by_class, "attr": self._by_attr, "tag": self._by_tag
+        }
+        try:
+            keys = {_selector_key(item) for item in selector.selectors}
+        except (AttributeError, TypeError):
+            # Другое устройство разобранных селекторов - без сужения по ключу
+            keys = set()
+        if not keys or None in keys or ":scope" in selector.pattern:
+            # Нельзя сузить по ключу - проверяем на каждом элементе
+            self._universal.append(index)
+            return
+
+        self._overlap = self._overlap or len(keys) > 1
+        for kind, value in keys:
+            buckets[kind].setdefault(value, []).append(index)
+
+    def __len__(self):
+        return len(self.fields)
+
+    @staticmethod
+    def supports(soup) -> bool:
+        """Обход работает по дереву BeautifulSoup (у selectolax свой быстрый select)"""
+        return isinstance(soup, Tag)
+
+    def match(self, soup) -> Dict[str, List[Tag]]:
+        """Элементы всех полей: {имя поля: [элементы в порядке документа]}"""
+        if soup is None or not self.fields:
+            return {name: [] for name in self.fields}
+        if not self._fallback:
+            try:
+                return self._match_one_pass(soup)
+            except (AttributeError, TypeError) as e:
+                print(f"⚠️ Обход за один проход недоступен в этой версии soupsieve ({e}), поля ищутся через select()")
+                self._fallback = True
+        return self._select_each(soup)
+
+    def _select_each(self, soup) -> Dict[str, List[Tag]]:
+        """Запасной путь: select() на каждое поле"""
+        return {
+            name: selector.select(soup, limit=limit or 0)
+            for name, selector, limit in zip(self.fields, self.selectors, self.limits)
+        }
+
+    def _match_one_pass(self, soup) -> Dict[str, List[Tag]]:
+        result = {name: [] for name in self.fields}
+
+        # Один CSSMatch на селектор и страницу - как внутри soupsieve select()
+        checks = [
+            CSSMatch(selector.selectors, soup, selector.namespaces, selector.flags).match
+            for selector in self.selectors
+        ]
+        found = [result[name] for name in self.fields]
+        remaining = list(self.limits)
+        active = len(self.fields)
+
+        by_id, by_class, by_attr, by_tag = self._by_id, self._by_class, self._by_attr, self._by_tag
+        universal, overlap = self._universal, self._overlap
+
+        for el in soup.descendants:
+            if not isinstance(el, Tag):
+                continue
+
+            candidates = list(universal)
+            indexes = by_tag.get(el.name)
+            if indexes:
+                candidates.extend(indexes)
+
+            attrs = el.attrs
+            if attrs:
+                if by_attr:
+                    for attr_name in attrs:
+                        indexes = by_attr.get(attr_name)
+                        if indexes:
+                            candidates.extend(indexes)
+                if by_id:
+                    indexes = by_id.get(attrs.get("id"))
+                    if indexes:
+                        candidates.extend(indexes)
+                if by_class:
+                    classes = attrs.get("class")
+                    if classes:
+                        if isinstance(classes, str):
+                            classes = classes.split()
+                        if len(classes) > 1:
+                            classes = set(classes)
+                        for name in classes:
+                            indexes = by_class.get(name)
+                            if indexes:
+                                candidates.extend(indexes)
+
+            if not candidates:
+                continue
+            if overlap:
+                candidates = dict.fromkeys(candidates)
+
+            for index in candidates:
+                left = remaining[index]
+                if left == 0 or not checks[index](el):
+                    continue
+                found[index].append(el)
+                if left is not None:
+                    remaining[index] = left - 1
+                    if left == 1:
+                        active -= 1
+                        if not active:
+                            # Все поля набрали свой limit - дальше не идём
+                            return result
+
+        return result
@@ -0,0 +1,303 @@
+# core/selector_optimizer.py
+"""
+Анализ стоимости CSS селекторов шаблона и замена длинных позиционных цепочек
+
+Записанные конструктором селекторы выглядят так:
+    #__next > main > div > div > div > div.css-1509vkh > ... > div:nth-child(2)
+Они медленно проверяются soupsieve и ломаются, как только сайт меняет
+генерированные классы (css-*). SelectorAnalyzer на примерах страниц:
+    - замеряет время каждого селектора и отмечает дорогие
+    - предлагает замену: привязку к ближайшему id / itemprop, цепочку
+      без лишних предков, без генерированных классов
+Замена предлагается, только если на всех примерах она находит те же
+элементы и работает не медленнее исходного селектора.
+"""
+import re
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+import soupsieve
+
+from core.template_compiler import compile_field
+
+# Генерированные классы CSS-in-JS (emotion, styled-components, jss), метки компонентов
+# emotion ('ev25qvo0') и CSS модулей
+GENERATED_CLASS = re.compile(r"\.(?:css|sc|jss|emotion)-[\w-]+|\.e[a-z]*\d[0-9a-z]*\d(?![\w-])|\.[\w-]+__[\w-]{5,}")
+POSITIONAL = re.compile(r":(?:nth-child|nth-last-child|nth-of-type|nth-last-of-type|"
+                        r"first-child|last-child|first-of-type|last-of-type)\b")
+
+# Когда селектор считается дорогим
+MAX_MS = 1.0        # мс на страницу
+MAX_DEPTH = 6       # уровней в цепочке
+
+# Разброс замеров: замена не медленнее исходного селектора больше чем на столько
+NOISE = 0.1
+
+# Сколько примеров страниц нужно, чтобы записывать замены в шаблон
+MIN_SAMPLES = 2
+
+# id корня приложения (Next.js, Nuxt, React, Vue) - есть на любой странице сайта и ничего не привязывает
+ROOT_ID = re.compile(r"#(?:__next|__nuxt|__layout|root|app)(?![\w-])")
+ANCHOR = re.compile(r"#[\w-]|\[|\.[\w-]")
+
+
+def split_chain(selector: str) -> List[Tuple[Optional[str], str]]:
+    """
+    Разбить селектор на части: [(комбинатор перед частью, часть)]
+    '#a > div span' -> [(None, '#a'), ('>', 'div'), (' ', 'span')]
+    Скобки и кавычки учитываются; для списка через запятую - пустой список
+    """
+    chain = []
+    compound = []
+    combinator = None
+    depth = 0
+    quote = None
+
+    def close_compound():
+        if compound:
+            chain.append((combinator, "".join(compound)))
+            compound.clear()
+
+    for char in selector.strip():
+        if quote:
+            compound.append(char)
+            if char == quote:
+                quote = None
+            continue
+        if char in "\"'":
+            quote = char
+        elif char in "[(":
+            depth += 1
+        elif char in "])":
+            depth -= 1
+        elif depth == 0:
+            if char == ",":
+                return []
+            if char in ">+~" or char.isspace():
+                if compound:
+                    close_compound()
+                    combinator = " "
+                if not char.isspace():
+                    combinator = char
+                continue
+        compound.append(char)
+
+    close_compound()
+    return chain
+
+
+def join_chain(chain: List[Tuple[Optional[str], str]]) -> str:
+    """Собрать селектор из частей (комбинатор первой части отбрасывается)"""
+    parts = []
+    for index, (combinator, compound) in enumerate(chain):
+        if index:
+            parts.append(" " if combinator == " " else f" {combinator} ")
+        parts.append(compound)
+    return "".join(parts)
+
+
+def fragility(selector: str) -> int:
+    """Сколько в селекторе того, что ломается при изменении вёрстки"""
+    return len(GENERATED_CLASS.findall(selector)) + len(POSITIONAL.findall(selector))
+
+
+def _stable(compound: str) -> str:
+    """Часть селектора без генерированных классов ('div.css-1bpeio7' -> 'div')"""
+    return GENERATED_CLASS.sub("", compound) or "*"
+
+
+def _element_anchor(el) -> Optional[str]:
+    """Устойчивый селектор самого элемента: #id или [itemprop=...]"""
+    element_id = el.get("id")
+    if isinstance(element_id, str) and element_id and not ROOT_ID.fullmatch("#" + element_id):
+        return "#" + soupsieve.escape(element_id)
+    itemprop = el.get("itemprop")
+    if isinstance(itemprop, str) and itemprop:
+        return f'[itemprop="{itemprop}"]'
+    return None
+
+
+def anchored(selector: str) -> bool:
+    """
+    Есть ли в селекторе привязка: id (кроме корня приложения), атрибут (itemprop)
+    или негенерированный класс. Голые 'li', 'div:nth-child(3)' совпадают с примерами случайно
+    """
+    return bool(ANCHOR.search(ROOT_ID.sub("", GENERATED_CLASS.sub("", selector))))
+
+
+def _rank(selector: str) -> Tuple[int, int, int, int]:
+    """Чем меньше, тем лучше: устойчивость, привязка к id / атрибуту, длина цепочки и строки"""
+    return fragility(selector), int(not anchored(selector)), len(split_chain(selector)), len(selector)
+
+
+def _identity(matches: List[List]) -> List[List[int]]:
+    """Найденные элементы как объекты (Tag == сравнивает разметку, а нужен тот же элемент)"""
+    return [[id(el) for el in found] for found in matches]
+
+
+@dataclass
+class SelectorReport:
+    """Результат анализа селектора одного поля"""
+    field: str
+    selector: str
+    limit: Optional[int] = None
+    cost_ms: float = 0.0                 # среднее время на страницу
+    depth: int = 0
+    matches: int = 0                     # сколько элементов нашлось на всех примерах
+    reasons: List[str] = field(default_factory=list)
+    suggestion: Optional[str] = None
+    suggestion_cost_ms: Optional[float] = None
+
+    @property
+    def expensive(self) -> bool:
+        return bool(self.reasons)
+
+
+class SelectorAnalyzer:
+    """
+    Замер и упрощение CSS селекторов на примерах страниц
+    soups: разобранные страницы (BeautifulSoup)
+    """
+
+    def __init__(self, soups: List, repeat: int = 5, max_ms: float = MAX_MS, max_depth: int = MAX_DEPTH):
+        self.soups = list(soups)
+        self.repeat = max(1, repeat)
+        self.max_ms = max_ms
+        self.max_depth = max_depth
+
+    def analyze_template(self, template: Dict) -> List[SelectorReport]:
+        """Отчёты по всем полям шаблона конструктора"""
+        reports = []
+        for name, config in template.get('fields', {}).items():
+            schema_field = compile_field(name, config)
+            if schema_field is None:
+                continue
+            reports.append(self.analyze(name, schema_field.source.selector, schema_field.source.limit))
+        return reports
+
+    def analyze(self, name: str, selector: str, limit: Optional[int] = None) -> SelectorReport:
+        """Замерить селектор поля и подобрать замену"""
+        report = SelectorReport(field=name, selector=selector, limit=limit)
+        try:
+            compiled = soupsieve.compile(selector)
+        except Exception as e:
+            report.reasons.append(f"неверный селектор: {str(e).splitlines()[0]}")
+            return report
+
+        chain = split_chain(selector)
+        report.depth = len(chain)
+        report.cost_ms = self.cost(compiled, limit)
+        # Замена должна находить ровно те же элементы, а не только первый из них
+        expected = self.matches(compiled)
+        expected_ids = _identity(expected)
+        report.matches = sum(len(found) for found in expected)
+
+        if report.cost_ms >= self.max_ms:
+            report.reasons.append(f"медленный ({report.cost_ms:.2f} мс на страницу)")
+        if report.depth >= self.max_depth:
+            report.reasons.append(f"длинная цепочка ({report.depth} уровней)")
+        if GENERATED_CLASS.search(selector):
+            report.reasons.append("генерированные классы")
+        if POSITIONAL.search(selector):
+            report.reasons.append("позиционные псевдоклассы")
+        if not report.matches:
+            # Проверить замену не на чем
+            report.reasons.append("ничего не находит на примерах")
+            return report
+        if not report.expensive:
+            return report
+
+        equivalent = []
+        for candidate in self.candidates(chain, expected):
+            if candidate == selector or not anchored(candidate):
+                continue
+            try:
+                compiled_candidate = soupsieve.compile(candidate)
+            except Exception:
+                continue
+            if _identity(self.matches(compiled_candidate)) == expected_ids:
+                key = _rank(candidate)
+                equivalent.append((key, candidate, compiled_candidate))
+
+        # Самая устойчивая (с якорем) и короткая из тех, что не медленнее исходного селектора
+        original_key = _rank(selector)
+        for key, candidate, compiled_candidate in sorted(equivalent, key=lambda item: item[0]):
+            if key[:3] >= original_key[:3]:
+                # Дальше только не устойчивее и не короче исходного
+                break
+            cost = self.cost(compiled_candidate, limit)
+            if cost <= report.cost_ms * (1 + NOISE):
+                report.suggestion = candidate
+                report.suggestion_cost_ms = cost
+                break
+        return report
+
+    def candidates(self, chain, expected) -> List[str]:
+        """Варианты селектора (ещё не проверенные): короче, от якоря, без генерированных классов"""
+        if not chain:
+            return []
+        found = []
+        last = len(chain)
+
+        # Без лишних предков: хвосты цепочки
+        for start in range(1, last):
+            found.append(join_chain(chain[start:]))
+
+        # От якоря в цепочке (id, атрибут, первая часть) сразу к хвосту
+        for anchor in range(last - 1):
+            compound = chain[anchor][1]
+            if anchor and "#" not in compound and "[" not in compound:
+                continue
+            for start in range(anchor + 2, last):
+                found.append(f"{compound} {join_chain(chain[start:])}")
+
+        # От ближайшего id / itemprop над найденным элементом
+        elements = [found_list[0] for found_list in expected if found_list]
+        if elements:
+            el = elements[0]
+            own = _element_anchor(el)
+            if own:
+                found.append(own)
+                found.append(f"{el.name}{own}")
+            for parent in el.parents:
+                if parent.name in (None, "[document]"):
+                    break
+                anchor = _element_anchor(parent)
+                if anchor:
+                    for start in range(max(1, last - 3), last):
+                        found.append(f"{anchor} {join_chain(chain[start:])}")
+                    break
+
+        # Те же варианты (и исходная цепочка) без генерированных классов
+        found.append(join_chain(chain))
+        found += [join_chain([(comb, _stable(part)) for comb, part in split_chain(item)]) for item in found]
+        return list(dict.fromkeys(found))
+
+    def matches(self, compiled, limit: Optional[int] = None) -> List[List]:
+        """Найденные элементы на каждом примере (limit=None - все)"""
+        return [compiled.select(soup, limit=limit or 0) for soup in self.soups]
+
+    def cost(self, compiled, limit: Optional[int] = None) -> float:
+        """Время селектора на страницу (мс, лучший из repeat прогонов)"""
+        if not self.soups:
+            return 0.0
+        best = None
+        for _ in range(self.repeat):
+            started = time.perf_counter()
+            for soup in self.soups:
+                compiled.select(soup, limit=limit or 0)
+            elapsed = time.perf_counter() - started
+            best = elapsed if best is None else min(best, elapsed)
+        return best / len(self.soups) * 1000
+
+
+def apply_suggestions(template: Dict, reports: List[SelectorReport]) -> int:
+    """Заменить селекторы полей шаблона на предложенные; вернуть число замен"""
+    changed = 0
+    for report in reports:
+        config = template.get('fields', {}).get(report.field)
+        if report.suggestion and config and config.get('selector') == report.selector:
+            config['selector'] = report.suggestion
+            changed += 1
+    return changed
@@ -0,0 +1,311 @@
+# core/sinks.py
+"""
+Потоковая запись результата в CSV, JSON Lines и Parquet
+
+Формат выбирается по расширению файла (см. open_sink / MappingEngine.open_writer):
+    .csv, .csv.gz               - CsvSink
+    .jsonl, .ndjson, .jsonl.gz  - JsonlSink
+    .parquet, .pq               - ParquetSink (нужен pyarrow)
+    .xlsx                       - ExcelStreamWriter (core.mapping_engine)
+
+Все записи работают одинаково: строки копятся в буфере и сбрасываются
+порциями, память не растёт с числом строк.
+"""
+import csv
+import gzip
+import json
+import os
+from typing import Dict, List, Optional
+
+from core.metrics import NULL_METRICS
+
+CSV_EXTENSIONS = (".csv", ".csv.gz")
+JSONL_EXTENSIONS = (".jsonl", ".ndjson", ".jsonl.gz", ".ndjson.gz")
+PARQUET_EXTENSIONS = (".parquet", ".pq")
+
+# Фильтр для диалога сохранения файла (GUI)
+FILE_FILTER = ("Excel Files (*.xlsx);;CSV (*.csv *.csv.gz);;"
+               "JSON Lines (*.jsonl.gz *.jsonl);;Parquet (*.parquet)")
+
+
+def sink_format(filepath: str) -> str:
+    """Формат записи по расширению: 'csv', 'jsonl', 'parquet' или 'xlsx' (по умолчанию)"""
+    name = filepath.lower()
+    if name.endswith(CSV_EXTENSIONS):
+        return "csv"
+    if name.endswith(JSONL_EXTENSIONS):
+        return "jsonl"
+    if name.endswith(PARQUET_EXTENSIONS):
+        return "parquet"
+    # Всё остальное - Excel, как и раньше
+    return "xlsx"
+
+
+def open_sink(filepath: str, columns: List[str], buffer_size: Optional[int] = None, metrics=None,
+              types: Optional[Dict] = None):
+    """
+    Открыть запись в CSV / JSONL / Parquet по расширению файла
+    buffer_size: строк в порции (для Parquet - размер record batch)
+    types: типы колонок для Parquet ({колонка: 'string' / 'int64' / 'double' / pa.DataType})
+    """
+    sink_class = {"csv": CsvSink, "jsonl": JsonlSink, "parquet": ParquetSink}.get(sink_format(filepath))
+    if sink_class is None:
+        raise ValueError(f"{filepath}: Excel открывается через MappingEngine.open_writer")
+
+    options = {"metrics": metrics}
+    if buffer_size:
+        options["buffer_size"] = buffer_size
+    if types and sink_class is ParquetSink:
+        options["types"] = types
+    return sink_class(filepath, columns, **options)
+
+
+def _open_text(filepath: str, compress: bool, **kwargs):
+    if compress:
+        return gzip.open(filepath, "wt", **kwargs)
+    return open(filepath, "w", **kwargs)
+
+
+class Sink:
+    """Потоковая запись строк (словарь колонка -> значение) в файл"""
+
+    buffer_size = 1000
+
+    def __init__(self, filepath: str, columns: List[str], buffer_size: Optional[int] = None, metrics=None):
+        self.filepath = filepath
+        self.columns = list(columns)
+        if buffer_size:
+            self.buffer_size = max(1, buffer_size)
+        self.metrics = metrics or NULL_METRICS
+
+        self.files = []            # все созданные файлы (как у ExcelStreamWriter)
+        self.rows_written = 0
+        self._buffer = []
+        self._closed = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+    def write_row(self, data_dict: Dict):
+        """Добавить строку"""
+        self._buffer.append(self._prepare(data_dict))
+        if len(self._buffer) >= self.buffer_size:
+            self.flush()
+
+    def write_rows(self, rows):
+        """Добавить несколько строк"""
+        for row in rows:
+            self.write_row(row)
+
+    def flush(self):
+        """Сбросить накопленные строки в файл"""
+        if not self._buffer:
+            return
+        with self.metrics.time("write"):
+            self._write(self._buffer)
+        self.metrics.count("rows_written", len(self._buffer))
+        self.rows_written += len(self._buffer)
+        self._buffer = []
+
+    def close(self):
+        """Дописать остаток и закрыть файл"""
+        if self._closed:
+            return
+        self._closed = True
+        try:
+            self.flush()
+        finally:
+            # Даже после ошибки записи файл должен остаться целым (у Parquet - с footer)
+            with self.metrics.time("write"):
+                self._close()
+        self.files.append(self.filepath)
+        print(f"Сохранено строк: {self.rows_written} в {self.filepath}")
+
+    def _prepare(self, data_dict: Dict):
+        return [data_dict.get(col, "") for col in self.columns]
+
+    def _write(self, rows: List):
+        raise NotImplementedError
+
+    def _close(self):
+        raise NotImplementedError
+
+
+class CsvSink(Sink):
+    """CSV (.csv - в UTF-8 с BOM, чтобы Excel открывал кириллицу; .csv.gz - сжатый)"""
+
+    def __init__(self, filepath, columns, buffer_size=None, metrics=None, delimiter=","):
+        super().__init__(filepath, columns, buffer_size, metrics)
+        compress = filepath.lower().endswith(".gz")
+        self._file = _open_text(filepath, compress, newline="",
+                                encoding="utf-8" if compress else "utf-8-sig")
+        self._writer = csv.writer(self._file, delimiter=delimiter)
+        self._writer.writerow(self.columns)
+
+    def _prepare(self, data_dict):
+        row = []
+        for col in self.columns:
+            value = data_dict.get(col, "")
+            if isinstance(value, (list, tuple)):
+                value = " | ".join(str(v) for v in value)
+            row.append(value)
+        return row
+
+    def _write(self, rows):
+        self._writer.writerows(rows)
+
+    def _close(self):
+        self._file.close()
+
+
+class JsonlSink(Sink):
+    """JSON Lines: одна строка результата - один JSON объект (.gz - сжатый gzip)"""
+
+    def __init__(self, filepath, columns, buffer_size=None, metrics=None):
+        super().__init__(filepath, columns, buffer_size, metrics)
+        self._file = _open_text(filepath, filepath.lower().endswith(".gz"), encoding="utf-8")
+
+    def _prepare(self, data_dict):
+        row = {col: data_dict.get(col, "") for col in self.columns}
+        return json.dumps(row, ensure_ascii=False, default=str)
+
+    def _write(self, rows):
+        self._file.write("\n".join(rows))
+        self._file.write("\n")
+
+    def _close(self):
+        self._file.close()
+
+
+class ParquetSink(Sink):
+    """
+    Parquet (требуется: pip3 install pyarrow)
+    Каждые buffer_size строк записываются одним Arrow record batch
+    Типы колонок - из types, остальные берутся из первой порции; пустые колонки - строки
+    Значение, которое в следующей порции не подходит к типу колонки, приводится
+    к нему без потерь; если не выходит, колонка расширяется до string (уже
+    записанные порции переписываются), а для колонки из types - ValueError
+    """
+
+    buffer_size = 65536
+
+    def __init__(self, filepath, columns, buffer_size=None, metrics=None, compression="snappy", types=None):
+        import pyarrow  # noqa: F401 - ошибка сразу, а не после первой порции
+
+        super().__init__(filepath, columns, buffer_size, metrics)
+        self.compression = compression
+        self.types = dict(types or {})
+        self.schema = None
+        self._writer = None
+
+    def _write(self, rows):
+        import pyarrow as pa
+
+        columns = list(zip(*rows))
+        if self.schema is None:
+            self.schema = self._infer_schema(columns)
+            self._open_writer()
+
+        # _array может расширить колонку до string - схема берётся после
+        arrays = [self._array(values, index) for index, values in enumerate(columns)]
+        self._writer.write_batch(pa.RecordBatch.from_arrays(arrays, schema=self.schema))
+
+    def _close(self):
+        if self._writer is None:
+            # Пустой результат - файл только со схемой
+            self.schema = self._infer_schema([[] for _ in self.columns])
+            self._open_writer()
+        self._writer.close()
+
+    def _open_writer(self):
+        import pyarrow.parquet as pq
+
+        folder = os.path.dirname(os.path.abspath(self.filepath))
+        os.makedirs(folder, exist_ok=True)
+        self._writer = pq.ParquetWriter(self.filepath, self.schema, compression=self.compression)
+
+    def _infer_schema(self, columns):
+        import pyarrow as pa
+
+        fields = []
+        for name, values in zip(self.columns, columns):
+            if name in self.types:
+                arrow_type = self.types[name]
+                fields.append(pa.field(name, pa.type_for_alias(arrow_type) if isinstance(arrow_type, str)
+                                       else arrow_type))
+                continue
+            present = [v for v in values if v is not None and v != ""]
+            arrow_type = pa.array(present).type if present else pa.string()
+            if pa.types.is_null(arrow_type):
+                arrow_type = pa.string()
+            fields.append(pa.field(name, arrow_type))
+        return pa.schema(fields)
+
+    def _array(self, values, index):
+        import pyarrow as pa
+
+        field = self.schema.field(index)
+        if pa.types.is_string(field.type):
+            return self._string_array(values)
+        # Пустая строка в нестроковой колонке - пропуск (как '' от ненайденного селектора)
+        values = [None if v == "" else v for v in values]
+        try:
+            return pa.array(values, type=field.type)
+        except (pa.ArrowException, TypeError, ValueError, OverflowError):
+            pass
+        array = self._coerce(values, field)
+        if array is not None:
+            return array
+        if field.name in self.types:
+            raise ValueError(f"Parquet: колонка '{field.name}' - значения не подходят к типу {field.type}")
+        self._widen(index)
+        return self._string_array(values)
+
+    @staticmethod
+    def _string_array(values):
+        import pyarrow as pa
+
+        return pa.array([None if v is None else str(v) for v in values], type=pa.string())
+
+    @staticmethod
+    def _coerce(values, field):
+        """Привести значения порции к типу колонки по одному (3.0 -> 3); None - если хоть одно не подходит"""
+        import pyarrow as pa
+
+        result = []
+        for value in values:
+            if value is None:
+                result.append(None)
+                continue
+            try:
+                result.append(pa.array([value]).cast(field.type)[0].as_py())
+            except (pa.ArrowException, TypeError, ValueError, OverflowError):
+                return None
+        return pa.array(result, type=field.type)
+
+    def _widen(self, index):
+        """Сделать колонку строковой и переписать уже записанные порции (файл не держится в памяти)"""
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        field = self.schema.field(index)
+        print(f"⚠️ Parquet: колонка '{field.name}' не подходит к типу {field.type}, расширена до string")
+        self._writer.close()
+        old_path = self.filepath + ".widen"
+        os.replace(self.filepath, old_path)
+
+        self.schema = self.schema.set(index, pa.field(field.name, pa.string()))
+        self._open_writer()
+        old_file = pq.ParquetFile(old_path)
+        try:
+            for batch in old_file.iter_batches():
+                arrays = batch.columns
+                arrays[index] = self._string_array(arrays[index].to_pylist())
+                self._writer.write_batch(pa.RecordBatch.from_arrays(arrays, schema=self.schema))
+        finally:
+            old_file.close()
+        os.remove(old_path)
@@ -0,0 +1,60 @@
+# core/template_compiler.py
+"""
+Шаблон конструктора -> Schema
+
+Шаблон, который сохраняет конструктор (universal_parser.py):
+    {"url": ..., "fields": {"Калории": {"type": "number", "selector": "...", "separator": null}}}
+
+превращается в обычную Schema, поэтому конструктор, BatchEngine и SchemaEngine
+извлекают данные одним и тем же движком (SchemaEngine.apply_schema).
+Смысл типов - как в конструкторе:
+    text   - текст первого найденного элемента
+    number - первое целое число из текста первого элемента (или сам текст, если чисел нет)
+    list   - тексты всех элементов без пустых, через separator
+             (строка или 'numbered' / 'cyrillic' / 'latin')
+"""
+from typing import Dict, Optional
+
+from core.models import FieldSchema, FormatConfig, Schema, SourceConfig
+
+# Число в конструкторе - первая группа цифр
+NUMBER_PATTERN = r"\d+"
+
+
+def compile_field(name: str, config: Dict) -> Optional[FieldSchema]:
+    """Поле шаблона -> FieldSchema (None - у поля нет селектора)"""
+    selector = config.get('selector')
+    if not selector:
+        return None
+
+    data_type = config.get('type', 'text')
+    if data_type == 'list':
+        return FieldSchema(
+            name=name,
+            data_type='list',
+            source=SourceConfig(type='css', selector=selector),
+            format=FormatConfig(separator=config.get('separator'), skip_empty=True),
+            multiple=True
+        )
+
+    # text / number - только первый элемент, поиск останавливается на нём
+    return FieldSchema(
+        name=name,
+        data_type=data_type,
+        source=SourceConfig(type='css', selector=selector, limit=1),
+        format=FormatConfig(regex_pattern=NUMBER_PATTERN) if data_type == 'number' else None
+    )
+
+
+def compile_template(template: Dict, name: Optional[str] = None) -> Schema:
+    """
+    Шаблон конструктора -> Schema
+    Поля без селектора пропускаются (как и в результате конструктора)
+    """
+    schema = Schema(name=name or template.get('name') or template.get('url') or 'template',
+                    site=template.get('url'))
+    for field_name, config in template.get('fields', {}).items():
+        field = compile_field(field_name, config)
+        if field is not None:
+            schema.fields[field_name] = field
+    return schema
@@ -1,37 +1,78 @@
 # core/transform_engine.py
 import re
-from typing import Any, Optional
+from typing import Any, Callable, List, Optional, Pattern
+
+# Число в тексте (целое или с десятичной точкой)
+_NUMBER_RE = re.compile(r"(\d+\.?\d*)")
+
+CYRILLIC_LETTERS = "абвгдежзиклмнопрстуфхцчшщэюя"
+LATIN_LETTERS = "abcdefghijklmnopqrstuvwxyz"
+
+
+def join_values(values: List[Any], separator: Optional[str] = None) -> str:
+    """
+    Соединить значения списка так же, как в конструкторе
+    separator: обычная строка или 'numbered' / 'cyrillic' / 'latin'
+    """
+    separator = separator or ' | '
+
+    if separator == 'numbered':
+        return ' '.join(f"{i + 1}. {v}" for i, v in enumerate(values))
+    if separator in ('cyrillic', 'latin'):
+        letters = CYRILLIC_LETTERS if separator == 'cyrillic' else LATIN_LETTERS
+        # Если букв не хватило - продолжаем цифрами
+        return ' '.join(
+            f"{letters[i] if i < len(letters) else i + 1}. {v}" for i, v in enumerate(values)
+        )
+    return separator.join(str(v) for v in values)
+
 
 class TransformEngine:
     """Мощный движок для форматирования и очистки данных"""
     
-    def apply_format(self, value: Any, format_config) -> Any:
+    def compile_format(self, format_config) -> Callable[[Any], Any]:
+        """
+        Подготовить форматирование один раз (регулярка компилируется заранее)
+        Возвращает функцию value -> отформатированное значение
+        """
+        regex = None
+        if format_config is not None and format_config.regex_pattern:
+            try:
+                regex = re.compile(format_config.regex_pattern)
+            except re.error as e:
+                print(f"⚠️ Ошибка regex: {e}")
+        
+        def transform(value: Any) -> Any:
+            return self.apply_format(value, format_config, regex)
+        
+        return transform
+    
+    def apply_format(self, value: Any, format_config, regex: Optional[Pattern] = None) -> Any:
         """
         Применить форматирование к значению
         value - что форматируем
         format_config - настройки форматирования
+        regex - заранее скомпилированная format_config.regex_pattern (необязательно)
         """
         if value is None:
             return None
         
         # Если значение - список, применяем форматирование к каждому элементу
         if isinstance(value, list):
+            skip_empty = format_config is not None and format_config.skip_empty
             formatted_items = []
             for item in value:
-                formatted = self._format_single_value(item, format_config)
-                if formatted is not None:
+                formatted = self._format_single_value(item, format_config, regex)
+                if formatted is not None and not (skip_empty and formatted == ""):
                     formatted_items.append(formatted)
             
-            # Соединяем список
-            if format_config and format_config.separator:
-                return format_config.separator.join(str(v) for v in formatted_items)
-            else:
-                return " | ".join(str(v) for v in formatted_items)
+            # Соединяем список (разделитель или нумерация 'numbered' / 'cyrillic' / 'latin')
+            return join_values(formatted_items, format_config.separator if format_config else None)
         
         # Одиночное значение
-        return self._format_single_value(value, format_config)
+        return self._format_single_value(value, format_config, regex)
     
-    def _format_single_value(self, value: Any, format_config) -> Any:
+    def _format_single_value(self, value: Any, format_config, regex: Optional[Pattern] = None) -> Any:
         """Форматирование одного значения"""
         if value is None:
             return None
@@ -58,7 +99,10 @@ class TransformEngine:
         # 4. Применяем регулярные выражения
         if format_config.regex_pattern:
             try:
-                match = re.search(format_config.regex_pattern, str_value)
+                if regex is not None:
+                    match = regex.search(str_value)
+                else:
+                    match = re.search(format_config.regex_pattern, str_value)
                 if match:
                     if format_config.regex_group is not None:
                         str_value = match.group(format_config.regex_group)
@@ -98,7 +142,7 @@ class TransformEngine:
     def _extract_number(self, text: str) -> Optional[float]:
         """Извлечь число из текста"""
         # Ищем паттерн числа (целое или с десятичной точкой)
-        match = re.search(r"(\d+\.?\d*)", text.replace(',', '.'))
+        match = _NUMBER_RE.search(text.replace(',', '.'))
         if match:
             num_str = match.group(1)
             try:
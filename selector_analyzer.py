@@ -0,0 +1,113 @@
+# selector_analyzer.py
+"""
+Анализ CSS селекторов шаблона на примерах страниц
+
+Пример:
+    python selector_analyzer.py "templates/Рецепты с Рамблера.json" benchmarks/corpus/rambler
+    python selector_analyzer.py "templates/Рецепты с Рамблера.json" page1.html https://... --apply
+
+Для каждого поля - время на страницу, причины (медленный, длинная цепочка,
+генерированные классы, :nth-child) и для дорогих полей - более короткая и устойчивая замена
+с привязкой к id / itemprop, которая на всех примерах находит те же элементы.
+--apply записывает замены в шаблон (нужно хотя бы MIN_SAMPLES примеров).
+"""
+import argparse
+import json
+import os
+import sys
+
+from core.batch_engine import BatchEngine
+from core.parser_engine import ParserEngine
+from core.selector_optimizer import MAX_DEPTH, MAX_MS, MIN_SAMPLES, SelectorAnalyzer, apply_suggestions
+
+
+def build_arg_parser():
+    parser = argparse.ArgumentParser(description="Анализ и упрощение CSS селекторов шаблона")
+    parser.add_argument("template", help="JSON шаблон, сохранённый конструктором")
+    parser.add_argument("pages", nargs="+",
+                        help="Примеры страниц: .html файлы, папки с .html или ссылки")
+    parser.add_argument("--parser", default="lxml", choices=["lxml", "html.parser"],
+                        help="Движок разбора HTML")
+    parser.add_argument("--repeat", type=int, default=5, help="Повторов замера каждого селектора")
+    parser.add_argument("--max-ms", type=float, default=MAX_MS,
+                        help="Селектор дороже этого (мс на страницу) считается медленным")
+    parser.add_argument("--max-depth", type=int, default=MAX_DEPTH,
+                        help="Цепочка длиннее этого считается длинной")
+    parser.add_argument("--apply", action="store_true",
+                        help=f"Записать предложенные замены в шаблон (нужно от {MIN_SAMPLES} примеров страниц)")
+    parser.add_argument("-o", "--output", default=None,
+                        help="Куда записать шаблон с заменами (по умолчанию - в исходный файл)")
+    return parser
+
+
+def load_pages(sources, engine):
+    """Разобранные страницы из файлов, папок и ссылок"""
+    soups = []
+    for source in sources:
+        if source.startswith(("http://", "https://")):
+            content = engine.fetch_bytes(source)
+            if content is None:
+                continue
+            soups.append(engine.load_from_bytes(content, url=source))
+            continue
+
+        if os.path.isdir(source):
+            paths = [os.path.join(source, name) for name in sorted(os.listdir(source))
+                     if name.endswith((".html", ".htm"))]
+        else:
+            paths = [source]
+        for path in paths:
+            with open(path, "rb") as f:
+                soups.append(engine.load_from_bytes(f.read()))
+    return soups
+
+
+def print_report(report):
+    mark = "⚠️" if report.expensive else "✅"
+    print(f"{mark} {report.field}: {report.cost_ms:.3f} мс, {report.depth} уровней, найдено {report.matches}")
+    print(f"   {report.selector}")
+    for reason in report.reasons:
+        print(f"   - {reason}")
+    if report.suggestion:
+        gain = report.cost_ms / report.suggestion_cost_ms if report.suggestion_cost_ms else 0
+        print(f"   💡 {report.suggestion}  ({report.suggestion_cost_ms:.3f} мс, x{gain:.1f})")
+
+
+def main(argv=None):
+    args = build_arg_parser().parse_args(argv)
+
+    template = BatchEngine.load_template(args.template)
+    engine = ParserEngine(parser=args.parser)
+    soups = load_pages(args.pages, engine)
+    if not soups:
+        print("❌ Примеры страниц не найдены")
+        return 1
+
+    if args.apply and len(soups) < MIN_SAMPLES:
+        # На одной странице замена совпадает с исходным селектором случайно
+        print(f"❌ Для --apply нужно хотя бы {MIN_SAMPLES} примера страниц, найдено: {len(soups)}")
+        return 1
+
+    print(f"📄 Страниц для проверки: {len(soups)}")
+    analyzer = SelectorAnalyzer(soups, repeat=args.repeat, max_ms=args.max_ms, max_depth=args.max_depth)
+    reports = analyzer.analyze_template(template)
+    for report in reports:
+        print_report(report)
+
+    suggested = [report for report in reports if report.suggestion]
+    total = sum(report.cost_ms for report in reports)
+    optimized = sum(report.suggestion_cost_ms if report.suggestion else report.cost_ms for report in reports)
+    print(f"\nПолей: {len(reports)}, дорогих: {sum(r.expensive for r in reports)}, замен: {len(suggested)}")
+    print(f"Время всех селекторов: {total:.2f} -> {optimized:.2f} мс на страницу")
+
+    if args.apply and suggested:
+        changed = apply_suggestions(template, reports)
+        output = args.output or args.template
+        with open(output, "w", encoding="utf-8") as f:
+            json.dump(template, f, ensure_ascii=False, indent=2)
+        print(f"💾 Заменено селекторов: {changed}, шаблон сохранён: {output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,82 @@
+# storage/fingerprint_store.py
+import dataclasses
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from typing import Dict, Optional
+
+
+def content_hash(content: bytes) -> str:
+    """Отпечаток тела страницы"""
+    return hashlib.blake2b(content, digest_size=16).hexdigest()
+
+
+def schema_version(schema) -> str:
+    """
+    Версия схемы/шаблона: хэш от его содержимого
+    Любое изменение полей даёт новую версию - старые строки перестают подходить
+    """
+    if dataclasses.is_dataclass(schema):
+        schema = dataclasses.asdict(schema)
+    data = json.dumps(schema, ensure_ascii=False, sort_keys=True, default=str)
+    return hashlib.blake2b(data.encode("utf-8"), digest_size=8).hexdigest()
+
+
+class FingerprintStore:
+    """
+    Отпечатки уже обработанных страниц (SQLite, WAL)
+    url -> хэш тела + версия схемы + извлечённая строка
+    Если страница не изменилась, строка берётся отсюда без разбора
+    """
+
+    def __init__(self, path="fingerprints.sqlite"):
+        self.path = path
+        self._lock = threading.Lock()
+
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute("""
+            CREATE TABLE IF NOT EXISTS fingerprints (
+                url TEXT PRIMARY KEY,
+                body_hash TEXT NOT NULL,
+                schema_version TEXT NOT NULL,
+                row TEXT NOT NULL,
+                updated_at REAL NOT NULL
+            )
+        """)
+        self._db.commit()
+
+    def get(self, url: str, body_hash: str, version: str) -> Optional[Dict]:
+        """Прошлая строка, если тело и схема не изменились (иначе None)"""
+        with self._lock:
+            stored = self._db.execute(
+                "SELECT row FROM fingerprints WHERE url = ? AND body_hash = ? AND schema_version = ?",
+                (url, body_hash, version)
+            ).fetchone()
+        return json.loads(stored[0]) if stored else None
+
+    def put(self, url: str, body_hash: str, version: str, row: Dict):
+        """Запомнить строку для этого тела страницы"""
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO fingerprints (url, body_hash, schema_version, row, updated_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (url, body_hash, version, json.dumps(row, ensure_ascii=False, default=str), time.time())
+            )
+            self._db.commit()
+
+    def __len__(self):
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM fingerprints").fetchone()[0]
+
+    def clear(self):
+        with self._lock:
+            self._db.execute("DELETE FROM fingerprints")
+            self._db.commit()
+
+    def close(self):
+        with self._lock:
+            self._db.close()
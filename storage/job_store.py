@@ -0,0 +1,248 @@
+# storage/job_store.py
+import json
+import os
+import sqlite3
+import sys
+import threading
+import time
+import uuid
+from typing import Dict, Iterator, List, Optional, Tuple
+
+# Состояния URL в задании
+PENDING = "pending"
+DONE = "done"
+FAILED = "failed"
+
+# Сколько строк результата читается из базы за раз (rows)
+ROWS_PAGE = 500
+
+
+def default_path() -> str:
+    """
+    jobs.sqlite в папке данных пользователя - не зависит от текущей папки
+    (окно конструктора запускается откуда угодно)
+    """
+    if sys.platform == "win32":
+        base = os.environ.get("APPDATA") or os.path.expanduser("~")
+    elif sys.platform == "darwin":
+        base = os.path.expanduser("~/Library/Application Support")
+    else:
+        base = os.environ.get("XDG_DATA_HOME") or os.path.expanduser("~/.local/share")
+    folder = os.path.join(base, "UniversalParser")
+    os.makedirs(folder, exist_ok=True)
+    return os.path.join(folder, "jobs.sqlite")
+
+
+class JobStore:
+    """
+    Хранилище пакетных заданий (SQLite, WAL)
+    Для каждого URL помнит состояние, число попыток, ошибку и извлечённую строку,
+    поэтому прерванное задание можно продолжить с того же места
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        """path: файл базы (по умолчанию - default_path())"""
+        path = path or default_path()
+        self.path = path
+        self._lock = threading.Lock()
+
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute("""
+            CREATE TABLE IF NOT EXISTS jobs (
+                id TEXT PRIMARY KEY,
+                template TEXT NOT NULL,
+                source TEXT,
+                output TEXT NOT NULL,
+                sheet TEXT NOT NULL,
+                options TEXT,
+                created_at REAL NOT NULL,
+                updated_at REAL NOT NULL
+            )
+        """)
+        self._db.execute("""
+            CREATE TABLE IF NOT EXISTS job_urls (
+                job_id TEXT NOT NULL,
+                position INTEGER NOT NULL,
+                url TEXT NOT NULL,
+                state TEXT NOT NULL DEFAULT 'pending',
+                attempts INTEGER NOT NULL DEFAULT 0,
+                error TEXT,
+                row TEXT,
+                updated_at REAL,
+                PRIMARY KEY (job_id, position)
+            )
+        """)
+        self._db.execute("CREATE INDEX IF NOT EXISTS idx_job_state ON job_urls(job_id, state)")
+        self._db.commit()
+
+    def create_job(self, urls: List[str], template: Dict, output: str, sheet: str = "Рецепты",
+                   source: Optional[str] = None, options: Optional[Dict] = None) -> str:
+        """
+        Создать задание
+        output: файл результата; options: параметры запуска (для resume)
+        Возвращает id задания
+        """
+        job_id = uuid.uuid4().hex[:12]
+        now = time.time()
+        with self._lock:
+            self._db.execute(
+                "INSERT INTO jobs (id, template, source, output, sheet, options, created_at, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (job_id, json.dumps(template, ensure_ascii=False), source, output, sheet,
+                 json.dumps(options or {}, ensure_ascii=False), now, now)
+            )
+            self._db.executemany(
+                "INSERT INTO job_urls (job_id, position, url) VALUES (?, ?, ?)",
+                ((job_id, position, url) for position, url in enumerate(urls))
+            )
+            self._db.commit()
+        return job_id
+
+    def get_job(self, job_id: str) -> Optional[Dict]:
+        """Параметры задания (или None)"""
+        with self._lock:
+            row = self._db.execute(
+                "SELECT id, template, source, output, sheet, options, created_at, updated_at "
+                "FROM jobs WHERE id = ?", (job_id,)
+            ).fetchone()
+        if row is None:
+            return None
+        return {
+            'id': row[0],
+            'template': json.loads(row[1]),
+            'source': row[2],
+            'output': row[3],
+            'sheet': row[4],
+            'options': json.loads(row[5]) if row[5] else {},
+            'created_at': row[6],
+            'updated_at': row[7],
+        }
+
+    def find_unfinished(self, output: str, max_attempts: int = 3) -> Optional[str]:
+        """Последнее незавершённое задание с тем же файлом результата"""
+        with self._lock:
+            row = self._db.execute(
+                "SELECT j.id FROM jobs j JOIN job_urls u ON u.job_id = j.id "
+                "WHERE j.output = ? AND (u.state = ? OR (u.state = ? AND u.attempts < ?)) "
+                "GROUP BY j.id ORDER BY j.created_at DESC LIMIT 1",
+                (output, PENDING, FAILED, max_attempts)
+            ).fetchone()
+        return row[0] if row else None
+
+    def list_jobs(self, max_attempts: int = 3) -> List[Dict]:
+        """
+        Все задания (новые первыми) со счётчиками состояний
+        и числом оставшихся URL ('remaining', с учётом max_attempts) - одним запросом
+        """
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT j.id, j.source, j.output, j.created_at, j.updated_at, "
+                "COALESCE(SUM(u.state = ?), 0), COALESCE(SUM(u.state = ?), 0), COALESCE(SUM(u.state = ?), 0), "
+                "COALESCE(SUM(u.state = ? OR (u.state = ? AND u.attempts < ?)), 0) "
+                "FROM jobs j LEFT JOIN job_urls u ON u.job_id = j.id "
+                "GROUP BY j.id ORDER BY j.created_at DESC",
+                (PENDING, DONE, FAILED, PENDING, FAILED, max_attempts)
+            ).fetchall()
+        jobs = []
+        for job_id, source, output, created_at, updated_at, pending, done, failed, remaining in rows:
+            jobs.append({
+                'id': job_id,
+                'source': source,
+                'output': output,
+                'created_at': created_at,
+                'updated_at': updated_at,
+                PENDING: pending,
+                DONE: done,
+                FAILED: failed,
+                'total': pending + done + failed,
+                'remaining': remaining,
+            })
+        return jobs
+
+    def pending(self, job_id: str, max_attempts: int = 3) -> List[Tuple[int, str]]:
+        """
+        URL, которые ещё нужно обработать: не обработанные и упавшие,
+        у которых попыток меньше max_attempts
+        Возвращает [(позиция, url)] в исходном порядке
+        """
+        with self._lock:
+            return self._db.execute(
+                "SELECT position, url FROM job_urls WHERE job_id = ? "
+                "AND (state = ? OR (state = ? AND attempts < ?)) ORDER BY position",
+                (job_id, PENDING, FAILED, max_attempts)
+            ).fetchall()
+
+    def remaining(self, job_id: str, max_attempts: int = 3) -> int:
+        """Сколько URL осталось обработать"""
+        with self._lock:
+            return self._db.execute(
+                "SELECT COUNT(*) FROM job_urls WHERE job_id = ? "
+                "AND (state = ? OR (state = ? AND attempts < ?))",
+                (job_id, PENDING, FAILED, max_attempts)
+            ).fetchone()[0]
+
+    def mark_done(self, job_id: str, position: int, row: Dict):
+        """URL обработан, строка результата сохранена"""
+        self._update(
+            "UPDATE job_urls SET state = ?, attempts = attempts + 1, error = NULL, row = ?, updated_at = ? "
+            "WHERE job_id = ? AND position = ?",
+            (DONE, json.dumps(row, ensure_ascii=False), time.time(), job_id, position),
+            job_id
+        )
+
+    def mark_failed(self, job_id: str, position: int, error: str):
+        """URL не удалось обработать"""
+        self._update(
+            "UPDATE job_urls SET state = ?, attempts = attempts + 1, error = ?, updated_at = ? "
+            "WHERE job_id = ? AND position = ?",
+            (FAILED, error, time.time(), job_id, position),
+            job_id
+        )
+
+    def counts(self, job_id: str) -> Dict[str, int]:
+        """Сколько URL в каждом состоянии"""
+        counts = {PENDING: 0, DONE: 0, FAILED: 0}
+        with self._lock:
+            for state, count in self._db.execute(
+                    "SELECT state, COUNT(*) FROM job_urls WHERE job_id = ? GROUP BY state", (job_id,)):
+                counts[state] = count
+        counts['total'] = sum(counts.values())
+        return counts
+
+    def failures(self, job_id: str) -> List[Tuple[str, int, str]]:
+        """Упавшие URL: [(url, попыток, ошибка)]"""
+        with self._lock:
+            return self._db.execute(
+                "SELECT url, attempts, error FROM job_urls WHERE job_id = ? AND state = ? ORDER BY position",
+                (job_id, FAILED)
+            ).fetchall()
+
+    def rows(self, job_id: str, page_size: int = ROWS_PAGE) -> Iterator[Dict]:
+        """
+        Строки результата обработанных URL в исходном порядке
+        Читаются порциями по page_size (по позиции), в памяти не держится всё задание
+        """
+        position = -1
+        while True:
+            with self._lock:
+                page = self._db.execute(
+                    "SELECT position, row FROM job_urls WHERE job_id = ? AND state = ? AND position > ? "
+                    "ORDER BY position LIMIT ?",
+                    (job_id, DONE, position, page_size)
+                ).fetchall()
+            for position, row in page:
+                yield json.loads(row)
+            if len(page) < page_size:
+                return
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+    def _update(self, sql: str, params: Tuple, job_id: str):
+        with self._lock:
+            self._db.execute(sql, params)
+            self._db.execute("UPDATE jobs SET updated_at = ? WHERE id = ?", (time.time(), job_id))
+            self._db.commit()
@@ -0,0 +1,184 @@
+# storage/response_cache.py
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from dataclasses import dataclass
+from typing import Dict, Optional
+
+
+@dataclass
+class CachedResponse:
+    """Ответ из кэша"""
+    url: str
+    content: bytes
+    etag: Optional[str]
+    last_modified: Optional[str]
+    fetched_at: float
+    content_type: Optional[str] = None   # Content-Type ответа (charset для декодирования)
+
+
+class ResponseCache:
+    """
+    Кэш HTTP ответов на диске
+    Индекс - SQLite, тела страниц - сжатые zlib файлы в папке кэша
+    """
+
+    def __init__(self, folder="cache", ttl=24 * 3600, max_size=1024 ** 3, offline=False):
+        """
+        folder: папка кэша
+        ttl: сколько секунд ответ считается свежим (после - условный GET)
+        max_size: предельный размер тел на диске (байт), старые вытесняются (LRU)
+        offline: только кэш, в сеть не ходить
+        (если сайт недоступен, ParserEngine отдаёт устаревший ответ из кэша)
+        """
+        self.folder = folder
+        self.ttl = ttl
+        self.max_size = max_size
+        self.offline = offline
+        self._lock = threading.Lock()
+
+        os.makedirs(os.path.join(folder, "bodies"), exist_ok=True)
+        self._db = sqlite3.connect(os.path.join(folder, "index.sqlite"), check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("""
+            CREATE TABLE IF NOT EXISTS responses (
+                url TEXT PRIMARY KEY,
+                body TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                etag TEXT,
+                last_modified TEXT,
+                fetched_at REAL NOT NULL,
+                accessed_at REAL NOT NULL
+            )
+        """)
+        self._db.execute("CREATE INDEX IF NOT EXISTS idx_accessed ON responses(accessed_at)")
+        columns = {row[1] for row in self._db.execute("PRAGMA table_info(responses)")}
+        if "content_type" not in columns:
+            # Кэш, созданный до хранения Content-Type
+            self._db.execute("ALTER TABLE responses ADD COLUMN content_type TEXT")
+        self._db.commit()
+        # Размер тел считается один раз, дальше ведётся в памяти (put / _evict / clear)
+        self._total = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+
+    def get(self, url: str) -> Optional[CachedResponse]:
+        """Ответ из кэша (или None)"""
+        with self._lock:
+            row = self._db.execute(
+                "SELECT body, size, etag, last_modified, fetched_at, content_type FROM responses WHERE url = ?",
+                (url,)
+            ).fetchone()
+            if row is None:
+                return None
+
+            body, size, etag, last_modified, fetched_at, content_type = row
+            try:
+                with open(self._body_path(body), "rb") as f:
+                    content = zlib.decompress(f.read())
+            except (OSError, zlib.error):
+                # Тело пропало или повреждено - забываем запись
+                self._db.execute("DELETE FROM responses WHERE url = ?", (url,))
+                self._db.commit()
+                self._total -= size
+                return None
+
+            self._db.execute("UPDATE responses SET accessed_at = ? WHERE url = ?", (time.time(), url))
+            self._db.commit()
+
+        return CachedResponse(url, content, etag, last_modified, fetched_at, content_type)
+
+    def is_fresh(self, cached: CachedResponse) -> bool:
+        """Ответ ещё не устарел по TTL"""
+        return self.ttl is not None and time.time() - cached.fetched_at < self.ttl
+
+    @staticmethod
+    def conditional_headers(cached: Optional[CachedResponse]) -> Dict[str, str]:
+        """Заголовки для условного GET (If-None-Match / If-Modified-Since)"""
+        headers = {}
+        if cached is not None:
+            if cached.etag:
+                headers["If-None-Match"] = cached.etag
+            if cached.last_modified:
+                headers["If-Modified-Since"] = cached.last_modified
+        return headers
+
+    def put(self, url: str, content: bytes, headers=None):
+        """Сохранить ответ"""
+        headers = headers or {}
+        body = hashlib.sha1(url.encode("utf-8")).hexdigest()
+        data = zlib.compress(content, 6)
+
+        with self._lock:
+            with open(self._body_path(body), "wb") as f:
+                f.write(data)
+            previous = self._db.execute("SELECT size FROM responses WHERE url = ?", (url,)).fetchone()
+            now = time.time()
+            self._db.execute(
+                "INSERT OR REPLACE INTO responses "
+                "(url, body, size, etag, last_modified, fetched_at, accessed_at, content_type) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (url, body, len(data), headers.get("ETag"), headers.get("Last-Modified"), now, now,
+                 headers.get("Content-Type"))
+            )
+            self._db.commit()
+            self._total += len(data) - (previous[0] if previous else 0)
+            self._evict()
+
+    def touch(self, url: str, headers=None):
+        """Ответ подтверждён сервером (304) - снова свежий"""
+        headers = headers or {}
+        now = time.time()
+        with self._lock:
+            self._db.execute(
+                "UPDATE responses SET fetched_at = ?, accessed_at = ?, "
+                "etag = COALESCE(?, etag), last_modified = COALESCE(?, last_modified), "
+                "content_type = COALESCE(?, content_type) WHERE url = ?",
+                (now, now, headers.get("ETag"), headers.get("Last-Modified"), headers.get("Content-Type"), url)
+            )
+            self._db.commit()
+
+    def size(self) -> int:
+        """Размер сжатых тел в кэше (байт)"""
+        with self._lock:
+            return self._total
+
+    def clear(self):
+        """Очистить кэш"""
+        with self._lock:
+            for (body,) in self._db.execute("SELECT body FROM responses").fetchall():
+                self._remove_body(body)
+            self._db.execute("DELETE FROM responses")
+            self._db.commit()
+            self._total = 0
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+    def _evict(self):
+        """Вытеснить давно не использованные ответы, пока кэш больше max_size"""
+        if not self.max_size or self._total <= self.max_size:
+            return
+
+        removed = []
+        for url, body, size in self._db.execute(
+                "SELECT url, body, size FROM responses ORDER BY accessed_at"):
+            if self._total <= self.max_size:
+                break
+            self._remove_body(body)
+            removed.append((url,))
+            self._total -= size
+
+        self._db.executemany("DELETE FROM responses WHERE url = ?", removed)
+        self._db.commit()
+
+    def _body_path(self, body: str) -> str:
+        return os.path.join(self.folder, "bodies", body + ".z")
+
+    def _remove_body(self, body: str):
+        try:
+            os.remove(self._body_path(body))
+        except OSError:
+            pass
@@ -1,6 +1,8 @@
 # storage/schema_storage.py
 import json
 import os
+from core.compiled_schema import CompiledSchema
+from core.formula_compiler import compile_formula
 from core.models import Schema, FieldSchema, SourceConfig, FormatConfig
 
 class SchemaStorage:
@@ -80,6 +82,14 @@ class SchemaStorage:
                     separator=fmt.get("separator")
                 )
             
+            # Формулу проверяем сразу, а не на каждой странице
+            formula = field_data.get("formula")
+            if field_data["data_type"] == "computed" and formula:
+                try:
+                    compile_formula(formula)
+                except ValueError as e:
+                    raise ValueError(f"Поле {field_name}: {e}")
+            
             # Создаём поле
             schema.fields[field_name] = FieldSchema(
                 name=field_name,
@@ -91,6 +101,11 @@ class SchemaStorage:
         
         return schema
     
+    @staticmethod
+    def load_compiled_schema(filepath: str) -> CompiledSchema:
+        """Загрузить схему и сразу скомпилировать её для пакетной обработки"""
+        return CompiledSchema.from_schema(SchemaStorage.load_schema(filepath))
+    
     @staticmethod
     def list_schemas(folder: str):
         """Показать все схемы в папке"""
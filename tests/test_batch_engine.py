@@ -0,0 +1,98 @@
+# tests/test_batch_engine.py
+import csv
+import threading
+
+from core.batch_engine import BatchEngine
+from core.metrics import Metrics
+from core.rate_limiter import HostRateLimiter
+from storage.job_store import JobStore
+
+TEMPLATE = {'fields': {'title': {'type': 'text', 'selector': 'h1'}}}
+
+
+def fast_limiter():
+    """Ограничитель без пауз (вместо случайной задержки delay перед каждым запросом)"""
+    return HostRateLimiter(rate=1000, burst=100, max_rate=1000, concurrency=16, max_concurrency=16)
+
+
+def read_titles(path):
+    with open(path, encoding="utf-8-sig", newline="") as f:
+        return [row["title"] for row in csv.DictReader(f)]
+
+
+def test_load_urls(tmp_path):
+    text = tmp_path / "urls.txt"
+    text.write_text("http://a/1\n\n  http://a/2  \n", encoding="utf-8")
+    assert BatchEngine.load_urls(str(text)) == ["http://a/1", "http://a/2"]
+
+    table = tmp_path / "urls.csv"
+    table.write_text("id,link\n1,http://a/1\n2,\n3,http://a/3\n", encoding="utf-8")
+    assert BatchEngine.load_urls(str(table), column="link") == ["http://a/1", "http://a/3"]
+
+
+def test_run_keeps_order_and_reports_failures(tmp_path, site):
+    site.latency = 0.05
+    urls = [site.url(f"/page/{i}") for i in range(8)]
+    urls.insert(3, site.url("/missing"))
+    progress = []
+
+    engine = BatchEngine(TEMPLATE, workers=4, retries=1, rate_limiter=fast_limiter())
+    stats = engine.run(urls, str(tmp_path / "out.csv"), progress=lambda *args: progress.append(args))
+
+    assert (stats['total'], stats['success'], stats['failed']) == (9, 8, [site.url("/missing")])
+    assert read_titles(tmp_path / "out.csv") == [f"Страница {i}" for i in range(8)]
+    assert [done for done, *_ in progress] == list(range(1, 10))
+    # Страницы загружались параллельно
+    assert site.max_active > 1
+
+
+def test_run_job_saves_row_fetched_before_cancel(tmp_path, monkeypatch):
+    store = JobStore(str(tmp_path / "jobs.sqlite"))
+    urls = [f"http://a/{i}" for i in range(4)]
+    job_id = store.create_job(urls, TEMPLATE, str(tmp_path / "out.csv"))
+
+    engine = BatchEngine(TEMPLATE, workers=1)
+    cancel = threading.Event()
+
+    def rows(urls):
+        for url in urls:
+            # Остановку нажали, пока страница скачивалась
+            cancel.set()
+            yield {'title': url}
+
+    monkeypatch.setattr(engine, "_iter_rows", rows)
+    stats = engine.run_job(store, job_id, cancel=cancel)
+
+    assert stats['cancelled']
+    assert stats['success'] == 1
+    assert list(store.rows(job_id)) == [{'title': "http://a/0"}]
+    # Продолжение начинается со следующего URL
+    assert [url for _, url in store.pending(job_id)] == urls[1:]
+    store.close()
+
+
+def test_async_run_limits_requests_per_host(tmp_path, site):
+    site.latency = 0.05
+    urls = [site.url(f"/page/{i}") for i in range(10)] + [site.url("/missing")]
+
+    engine = BatchEngine(TEMPLATE, workers=8, retries=1, delay=0, use_async=True, per_host=2)
+    stats = engine.run(urls, str(tmp_path / "out.csv"))
+
+    assert (stats['success'], stats['failed']) == (10, [site.url("/missing")])
+    assert read_titles(tmp_path / "out.csv") == [f"Страница {i}" for i in range(10)]
+    assert site.max_active == 2
+
+
+def test_process_pool_parsing_matches_threads(tmp_path, site):
+    urls = [site.url(f"/page/{i}") for i in range(6)] + [site.url("/missing")]
+    metrics = Metrics()
+
+    engine = BatchEngine(TEMPLATE, workers=4, retries=1, processes=2, rate_limiter=fast_limiter(),
+                         metrics=metrics)
+    stats = engine.run(urls, str(tmp_path / "out.csv"))
+
+    assert (stats['success'], stats['failed']) == (6, [site.url("/missing")])
+    assert read_titles(tmp_path / "out.csv") == [f"Страница {i}" for i in range(6)]
+    # Замеры из процессов-разборщиков собраны в родителе
+    assert stats['metrics']['stages']['parse']['count'] == 6
+    assert stats['metrics']['fields']['title']['hits'] == 6
@@ -0,0 +1,50 @@
+# tests/test_benchmarks.py
+import json
+import os
+import sys
+
+import pytest
+
+BENCH_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "benchmarks")
+sys.path.insert(0, BENCH_DIR)
+
+import corpus  # noqa: E402
+import suite  # noqa: E402
+from core.batch_engine import BatchEngine  # noqa: E402
+from core.parser_engine import ParserEngine  # noqa: E402
+
+
+def test_corpus_matches_generator():
+    pages = corpus.load_corpus()
+    assert pages
+    # Сохранённые страницы - те же, что пересоздаёт corpus.py
+    assert [content for _, content in pages] == [corpus.rambler_page(n).encode("utf-8")
+                                                 for n in range(len(pages))]
+
+
+@pytest.mark.parametrize("name", sorted(suite.TEMPLATES))
+def test_extraction_matches_baseline_digest(name):
+    with open(suite.TEMPLATES[name], "r", encoding="utf-8") as f:
+        batch = BatchEngine(json.load(f), parser="lxml")
+    engine = ParserEngine(parser="lxml")
+    rows = [suite.pipeline(suite.Recorder(), name, engine, batch, content)[1]
+            for _, content in corpus.load_corpus()]
+
+    with open(suite.BASELINE, "r", encoding="utf-8") as f:
+        baseline = json.load(f)
+    assert all(row for row in rows)
+    assert suite.digest(rows) == baseline["results_digest"][name]
+
+
+def test_compare_flags_slowdowns_and_changed_results():
+    stage = {"p50_ms": 10.0}
+    baseline = {"meta": {"repeat": 1, "export_rows": 10}, "results_digest": {"a": "x"},
+                "stages": {"a.extract": stage, "a.decode": stage},
+                "pages_per_sec": {"a": 100}, "peak_memory_mb": {"a": 10}}
+    results = {"meta": {"repeat": 1, "export_rows": 10}, "results_digest": {"a": "y"},
+               "stages": {"a.extract": {"p50_ms": 12.0}, "a.decode": {"p50_ms": 11.0}},
+               "pages_per_sec": {"a": 80}, "peak_memory_mb": {"a": 10.5}}
+
+    problems = suite.compare(results, baseline, threshold=0.15)
+    assert problems == ["a: извлечённые данные отличаются от эталона", "a.extract: медленнее на 20%",
+                        "a: 80 стр/с вместо 100"]
@@ -0,0 +1,88 @@
+# tests/test_driver_pool.py
+import queue
+import threading
+import time
+
+import pytest
+
+from core.driver_pool import DriverPool
+
+
+class FakeDriver:
+    def __init__(self):
+        self.closed = False
+
+    def quit(self):
+        self.closed = True
+
+
+def make_pool(size=1, **kwargs):
+    pool = DriverPool(size=size, **kwargs)
+    pool._create_driver = FakeDriver
+    return pool
+
+
+def acquire_in_thread(pool, **kwargs):
+    result = {}
+
+    def target():
+        try:
+            result['driver'] = pool.acquire(**kwargs)
+        except Exception as e:
+            result['error'] = e
+
+    thread = threading.Thread(target=target)
+    thread.start()
+    return thread, result
+
+
+def test_waiter_gets_new_driver_when_busy_one_is_discarded():
+    pool = make_pool()
+    first = pool.acquire()
+    thread, result = acquire_in_thread(pool)
+    time.sleep(0.05)
+
+    started = time.monotonic()
+    pool.release(first, broken=True)
+    thread.join(5)
+
+    assert first.closed
+    assert isinstance(result.get('driver'), FakeDriver) and result['driver'] is not first
+    assert time.monotonic() - started < 0.5
+
+
+def test_waiter_gets_returned_driver():
+    pool = make_pool()
+    first = pool.acquire()
+    thread, result = acquire_in_thread(pool)
+    pool.release(first)
+    thread.join(5)
+    assert result['driver'] is first
+
+
+def test_acquire_times_out():
+    pool = make_pool()
+    pool.acquire()
+    with pytest.raises(queue.Empty):
+        pool.acquire(timeout=0.05)
+
+
+def test_close_wakes_waiter():
+    pool = make_pool()
+    pool.acquire()
+    thread, result = acquire_in_thread(pool)
+    time.sleep(0.05)
+    pool.close()
+    thread.join(5)
+    assert not thread.is_alive()
+    assert isinstance(result.get('error'), RuntimeError)
+
+
+def test_driver_restarts_after_max_pages():
+    pool = make_pool(max_pages=2)
+    driver = pool.acquire()
+    pool.release(driver)
+    assert pool.acquire() is driver
+    pool.release(driver)
+    assert driver.closed
+    assert pool.acquire() is not driver
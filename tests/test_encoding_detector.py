@@ -0,0 +1,63 @@
+# tests/test_encoding_detector.py
+import codecs
+
+from core.encoding_detector import EncodingDetector, charset_from_content_type
+
+TEXT = "Салат Цезарь с курицей"
+
+
+def test_charset_from_content_type():
+    assert charset_from_content_type("text/html; charset=Windows-1251") == "cp1251"
+    assert charset_from_content_type('text/html; charset="utf-8"') == "utf-8"
+    assert charset_from_content_type("text/html") is None
+    assert charset_from_content_type("text/html; charset=no-such") is None
+
+
+def test_detection_order():
+    detector = EncodingDetector()
+    body = f'<meta charset="koi8-r"><p>{TEXT}</p>'.encode("koi8-r")
+
+    # Заголовок важнее meta
+    assert detector.detect(body, header_charset="koi8-r") == ("koi8-r", "header")
+    assert detector.detect(body) == ("koi8-r", "meta")
+    assert detector.detect(codecs.BOM_UTF8 + b"<p>x</p>") == ("utf-8-sig", "bom")
+    assert detector.detect(b"<p>x</p>") == (None, "none")
+
+
+def test_decode_header_and_guess():
+    detector = EncodingDetector()
+    body = TEXT.encode("windows-1251")
+
+    text, encoding, method = detector.decode(body, header_charset="windows-1251")
+    assert (text, encoding, method) == (TEXT, "cp1251", "header")
+
+    text, encoding, method = detector.decode(body)
+    assert (text, method) == (TEXT, "guess")
+
+
+def test_declared_encoding_is_remembered_for_host():
+    detector = EncodingDetector()
+    detector.decode(TEXT.encode("windows-1251"), "http://site.ru/1", "windows-1251")
+    assert detector.host_encoding("http://site.ru/2") == "cp1251"
+
+    # Страница того же сайта без объявления - кодировка сайта
+    text, encoding, method = detector.decode(TEXT.encode("windows-1251"), "http://site.ru/2")
+    assert (text, method) == (TEXT, "host")
+
+
+def test_guess_is_not_remembered_for_host():
+    detector = EncodingDetector()
+    detector.decode(TEXT.encode("windows-1251"), "http://site.ru/1")
+    assert detector.host_encoding("http://site.ru/1") is None
+
+    text, encoding, method = detector.decode(TEXT.encode("utf-8"), "http://site.ru/2")
+    assert (text, encoding) == (TEXT, "utf-8")
+
+
+def test_utf8_page_on_cp1251_host():
+    detector = EncodingDetector()
+    detector.decode(b"<p>x</p>", "http://site.ru/1", "windows-1251")
+
+    # cp1251 декодировал бы эти байты без ошибки, но в кракозябры
+    text, encoding, _ = detector.decode(TEXT.encode("utf-8"), "http://site.ru/2")
+    assert (text, encoding) == (TEXT, "utf-8")
@@ -0,0 +1,67 @@
+# tests/test_fingerprint_store.py
+import csv
+
+from core.batch_engine import BatchEngine
+from core.parser_engine import ParserEngine
+from storage.fingerprint_store import FingerprintStore, content_hash, schema_version
+
+
+def test_round_trip(tmp_path):
+    store = FingerprintStore(str(tmp_path / "fingerprints.sqlite"))
+    body = "<h1>Борщ</h1>".encode("utf-8")
+    version = schema_version({'title': {'selector': 'h1'}})
+    store.put("http://a/1", content_hash(body), version, {'title': "Борщ"})
+
+    assert store.get("http://a/1", content_hash(body), version) == {'title': "Борщ"}
+    # Тело или схема изменились - строка не подходит
+    assert store.get("http://a/1", content_hash("<h1>Щи</h1>".encode("utf-8")), version) is None
+    assert store.get("http://a/1", content_hash(body), schema_version({'title': {'selector': 'h2'}})) is None
+    assert len(store) == 1
+    store.close()
+
+    store = FingerprintStore(str(tmp_path / "fingerprints.sqlite"))
+    assert store.get("http://a/1", content_hash(body), version) == {'title': "Борщ"}
+    store.clear()
+    assert len(store) == 0
+    store.close()
+
+
+def test_schema_version_ignores_key_order():
+    assert schema_version({'a': 1, 'b': 2}) == schema_version({'b': 2, 'a': 1})
+    assert schema_version({'a': 1}) != schema_version({'a': 2})
+
+
+def test_batch_engine_skips_unchanged_pages(tmp_path, monkeypatch):
+    pages = {"http://a/1": "<h1>Борщ</h1><h2>Суп</h2>", "http://a/2": "<h1>Плов</h1><h2>Второе</h2>"}
+    parsed = []
+    load_from_bytes = ParserEngine.load_from_bytes
+
+    def parse(self, content, *args, **kwargs):
+        parsed.append(content)
+        return load_from_bytes(self, content, *args, **kwargs)
+
+    monkeypatch.setattr(ParserEngine, "fetch_bytes", lambda self, url, **kwargs: pages[url].encode("utf-8"))
+    monkeypatch.setattr(ParserEngine, "header_charset", lambda self, url: "utf-8")
+    monkeypatch.setattr(ParserEngine, "load_from_bytes", parse)
+    store = FingerprintStore(str(tmp_path / "fingerprints.sqlite"))
+    urls = list(pages)
+
+    def run(template, name):
+        engine = BatchEngine(template, workers=1, fingerprints=store)
+        stats = engine.run(urls, str(tmp_path / name))
+        with open(tmp_path / name, encoding="utf-8-sig", newline="") as f:
+            return stats, [row["title"] for row in csv.DictReader(f)]
+
+    template = {'fields': {'title': {'type': 'text', 'selector': 'h1'}}}
+    stats, titles = run(template, "first.csv")
+    assert (stats['unchanged'], len(parsed), titles) == (0, 2, ["Борщ", "Плов"])
+
+    # Тела те же - строки из хранилища, дерево не строится
+    stats, titles = run(template, "second.csv")
+    assert (stats['unchanged'], len(parsed), titles) == (2, 2, ["Борщ", "Плов"])
+
+    # Шаблон изменился (другая версия схемы) - страницы разбираются заново
+    changed = {'fields': {'title': {'type': 'text', 'selector': 'h2'}}}
+    stats, titles = run(changed, "third.csv")
+    assert (stats['unchanged'], len(parsed), titles) == (0, 4, ["Суп", "Второе"])
+    store.close()
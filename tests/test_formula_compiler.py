@@ -0,0 +1,36 @@
+# tests/test_formula_compiler.py
+import pytest
+
+from core.formula_compiler import compile_formula
+
+
+def test_evaluate_and_fields():
+    formula = compile_formula("round(price * count, 2) if count else 0")
+    assert set(formula.fields) == {"price", "count"}
+    assert formula.evaluate({"price": 1.5, "count": 3, "other": 1}) == 4.5
+    assert formula.evaluate({"price": 1.5, "count": 0}) == 0
+
+
+def test_safe_functions_and_subscripts():
+    formula = compile_formula("len(items) + max(items[0], int(extra))")
+    assert set(formula.fields) == {"items", "extra"}
+    assert formula.evaluate({"items": [4, 1], "extra": "7"}) == 9
+
+
+def test_missing_field_raises_name_error():
+    with pytest.raises(NameError):
+        compile_formula("a + b").evaluate({"a": 1})
+
+
+@pytest.mark.parametrize("source", [
+    "__import__('os')",
+    "open('x')",
+    "a.__class__",
+    "[x for x in a]",
+    "lambda: 1",
+    "(a := 1)",
+    "a +",
+])
+def test_rejected(source):
+    with pytest.raises(ValueError):
+        compile_formula(source)
@@ -0,0 +1,53 @@
+# tests/test_html_backends.py
+import pytest
+
+from core import html_backends
+from core.html_backends import PARSER_BACKENDS, available_backends, detect_parser_backend
+from core.parser_engine import ParserEngine
+
+PAGE = """<html><body>
+<h1 class="title main">Борщ</h1>
+<ul><li>Свёкла</li><li>Капуста</li></ul>
+<a href="/recipe/1" rel="next">Дальше</a>
+<div id="steps"><p>Варить <b>2 часа</b></p><script>var x = 1;</script></div>
+</body></html>"""
+
+
+def test_auto_prefers_lxml():
+    expected = "lxml" if "lxml" in available_backends() else "html.parser"
+    assert detect_parser_backend() == expected
+    assert detect_parser_backend("auto") == expected
+    assert detect_parser_backend("") == expected
+
+
+@pytest.mark.parametrize("name", PARSER_BACKENDS)
+def test_explicit_backend(name):
+    if name not in available_backends():
+        pytest.skip(f"{name} не установлен")
+    assert detect_parser_backend(name) == name
+
+
+def test_unknown_backend_raises():
+    with pytest.raises(ValueError):
+        detect_parser_backend("html5lib")
+
+
+def test_missing_backend_falls_back(monkeypatch):
+    monkeypatch.setattr(html_backends, "is_backend_available", lambda name: name == "html.parser")
+    assert detect_parser_backend("selectolax") == "html.parser"
+    assert detect_parser_backend("auto") == "html.parser"
+
+
+@pytest.mark.parametrize("name", available_backends())
+def test_backends_extract_the_same(name):
+    engine = ParserEngine(parser=name)
+    soup = engine.load_from_bytes(PAGE.encode("utf-8"))
+
+    assert engine.extract_css(soup, "h1") == ["Борщ"]
+    assert engine.extract_css(soup, "li", limit=1) == ["Свёкла"]
+    assert engine.extract_css(soup, "a", attribute="href") == ["/recipe/1"]
+    # Текст script не попадает в результат (как в BeautifulSoup)
+    assert engine.extract_css(soup, "#steps") == ["Варить2 часа"]
+    assert soup.find("h1").get("class") == ["title", "main"]
+    assert [li.get_text() for li in soup.find_all("li")] == ["Свёкла", "Капуста"]
+    assert soup.find("a", rel="next").get_text() == "Дальше"
@@ -0,0 +1,82 @@
+# tests/test_job_store.py
+import os
+
+from storage import job_store
+from storage.job_store import JobStore
+
+TEMPLATE = {'fields': {'title': {'type': 'text', 'selector': 'h1'}}}
+
+
+def test_round_trip(tmp_path):
+    store = JobStore(str(tmp_path / "jobs.sqlite"))
+    urls = ["http://a/1", "http://a/2", "http://a/3"]
+    job_id = store.create_job(urls, TEMPLATE, "out.xlsx", source="in.xlsx", options={'workers': 4})
+
+    job = store.get_job(job_id)
+    assert job['template'] == TEMPLATE
+    assert (job['output'], job['sheet'], job['options']) == ("out.xlsx", "Рецепты", {'workers': 4})
+
+    store.mark_done(job_id, 2, {'title': "Борщ"})
+    store.mark_failed(job_id, 0, "таймаут")
+    assert store.counts(job_id) == {'pending': 1, 'done': 1, 'failed': 1, 'total': 3}
+    assert store.failures(job_id) == [("http://a/1", 1, "таймаут")]
+    assert store.pending(job_id) == [(0, "http://a/1"), (1, "http://a/2")]
+    assert store.pending(job_id, max_attempts=1) == [(1, "http://a/2")]
+    assert store.find_unfinished("out.xlsx") == job_id
+    store.close()
+
+    # Задание переживает перезапуск
+    store = JobStore(str(tmp_path / "jobs.sqlite"))
+    assert list(store.rows(job_id)) == [{'title': "Борщ"}]
+    store.close()
+
+
+def test_rows_are_read_in_pages_in_order(tmp_path):
+    store = JobStore(str(tmp_path / "jobs.sqlite"))
+    job_id = store.create_job([f"http://a/{i}" for i in range(10)], TEMPLATE, "out.csv")
+    for position in (9, 0, 4, 5, 7, 2, 3):
+        store.mark_done(job_id, position, {'n': position})
+
+    expected = [{'n': n} for n in (0, 2, 3, 4, 5, 7, 9)]
+    assert list(store.rows(job_id, page_size=3)) == expected
+    assert list(store.rows(job_id, page_size=7)) == expected
+    store.close()
+
+
+def test_default_path_does_not_depend_on_cwd(tmp_path, monkeypatch):
+    monkeypatch.setattr(job_store.sys, "platform", "linux")
+    monkeypatch.setenv("XDG_DATA_HOME", str(tmp_path / "data"))
+    monkeypatch.chdir(tmp_path)
+
+    store = JobStore()
+    assert store.path == str(tmp_path / "data" / "UniversalParser" / "jobs.sqlite")
+    assert os.path.exists(store.path)
+    store.close()
+
+
+def test_find_unfinished_and_list_jobs(tmp_path):
+    store = JobStore(str(tmp_path / "jobs.sqlite"))
+    old = store.create_job(["http://a/1"], TEMPLATE, "out.xlsx")
+    new = store.create_job(["http://a/1", "http://a/2"], TEMPLATE, "out.xlsx")
+    other = store.create_job(["http://a/1"], TEMPLATE, "other.xlsx")
+    store._db.execute("UPDATE jobs SET created_at = created_at - 10 WHERE id = ?", (old,))
+    store._db.commit()
+
+    # Самое новое незавершённое с тем же файлом
+    assert store.find_unfinished("out.xlsx") == new
+    store.mark_done(new, 0, {'title': "Борщ"})
+    store.mark_failed(new, 1, "таймаут")
+    assert store.find_unfinished("out.xlsx") == new
+    assert store.find_unfinished("out.xlsx", max_attempts=1) == old
+    store.mark_done(old, 0, {'title': "Щи"})
+    assert store.find_unfinished("out.xlsx", max_attempts=1) is None
+    assert store.find_unfinished("none.xlsx") is None
+
+    jobs = {job['id']: job for job in store.list_jobs(max_attempts=1)}
+    assert [job['id'] for job in store.list_jobs()][-1] == old
+    assert {key: jobs[new][key] for key in ('pending', 'done', 'failed', 'total', 'remaining')} == \
+        {'pending': 0, 'done': 1, 'failed': 1, 'total': 2, 'remaining': 0}
+    assert jobs[other]['remaining'] == 1
+    # С тремя попытками упавший URL ещё остаётся
+    assert {job['id']: job['remaining'] for job in store.list_jobs()}[new] == 1
+    store.close()
@@ -0,0 +1,53 @@
+# tests/test_json_path.py
+import pytest
+
+from core.json_path import JsonPathTrie, compile_json_path, json_path_from_parts
+
+DATA = {
+    "props": {"pageProps": {
+        "recipe": {"title": "Борщ", "time": 90, "tags": ["суп", "обед"]},
+        "steps": [
+            {"type": "main", "text": "Сварить"},
+            {"type": "extra", "text": "Подать"},
+            {"type": "main", "text": "Остудить"},
+        ],
+        "byId": {"7": {"name": "свёкла"}, "8": {"name": "капуста"}},
+    }}
+}
+
+CASES = [
+    ("props.pageProps.recipe.title", "Борщ"),
+    ("props.pageProps.recipe.tags.0", "суп"),
+    ("props.pageProps.recipe.tags[-1]", "обед"),
+    ("props.pageProps.recipe.tags[5]", None),
+    ("props.pageProps.steps.text", ["Сварить", "Подать", "Остудить"]),
+    ("props.pageProps.steps.*.text", ["Сварить", "Подать", "Остудить"]),
+    ("props.pageProps.steps[?type=main].text", ["Сварить", "Остудить"]),
+    ("props.pageProps.byId.7.name", "свёкла"),
+    ("props.pageProps.byId.*.name", ["свёкла", "капуста"]),
+    ("props.pageProps.missing.title", None),
+    ("props.pageProps.steps[?type=none].text", []),
+]
+
+
+@pytest.mark.parametrize("path, expected", CASES)
+def test_evaluate(path, expected):
+    assert compile_json_path(path).evaluate(DATA) == expected
+
+
+def test_parts_match_parsed_path():
+    assert json_path_from_parts(["props", "pageProps", "recipe", "title"]).steps == \
+        compile_json_path("props.pageProps.recipe.title").steps
+
+
+@pytest.mark.parametrize("path", ["", "   ", "a[?b]", "a]b"])
+def test_invalid_path(path):
+    with pytest.raises(ValueError):
+        compile_json_path(path)
+
+
+def test_trie_matches_single_paths():
+    trie = JsonPathTrie({f"f{i}": path for i, (path, _) in enumerate(CASES)})
+    assert len(trie) == len(CASES)
+    assert trie.evaluate(DATA) == {f"f{i}": expected for i, (_, expected) in enumerate(CASES)}
+    assert trie.evaluate(None) == {f"f{i}": None for i in range(len(CASES))}
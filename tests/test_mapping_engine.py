@@ -0,0 +1,20 @@
+# tests/test_mapping_engine.py
+from openpyxl import load_workbook
+
+from core.mapping_engine import EXCEL_MAX_SHEET_NAME, ExcelStreamWriter
+
+
+def test_long_sheet_name_keeps_number_suffix(tmp_path):
+    path = str(tmp_path / "out.xlsx")
+    name = "Рецепты с очень длинным названием листа"
+    writer = ExcelStreamWriter(path, name, ["a"], buffer_size=1, rows_per_sheet=2)
+    for i in range(25):
+        writer.write_row({"a": i})
+    writer.close()
+
+    titles = load_workbook(path, read_only=True).sheetnames
+    assert len(titles) == 13
+    assert len(set(titles)) == len(titles)
+    assert all(len(title) <= EXCEL_MAX_SHEET_NAME for title in titles)
+    assert titles[0] == name[:EXCEL_MAX_SHEET_NAME]
+    assert titles[1].endswith("_2") and titles[12].endswith("_13")
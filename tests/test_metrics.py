@@ -0,0 +1,20 @@
+# tests/test_metrics.py
+from core.metrics import Metrics, prometheus_text
+
+
+def test_fields_count_hits_without_timing():
+    metrics = Metrics()
+    metrics.field("Название", True)
+    metrics.field("Название", False)
+
+    other = Metrics()
+    other.field("Название", True)
+    metrics.merge(other.drain())
+
+    summary = metrics.summary()
+    assert summary["fields"] == {"Название": {"hits": 2, "misses": 1, "hit_rate": 0.6667}}
+    assert "field" not in summary["stages"]
+
+    text = prometheus_text(summary)
+    assert 'parser_field_hits_total{field="Название"} 2' in text
+    assert "field_seconds" not in text
@@ -0,0 +1,70 @@
+# tests/test_parse_filter.py
+import pytest
+
+from core.parse_filter import ParseFilter, RootRule, root_rule
+from core.parser_engine import ParserEngine
+
+HTML = """
+<html><head><script type="Application/LD+JSON">{"name": "x"}</script></head>
+<body>
+  <div id="main" class="card   big" data-x="1" rel="a  b"><p>один</p><span>два</span></div>
+  <ul class="list"><li itemprop="recipeIngredient">Соль</li><li>Перец</li></ul>
+  <footer><p>подвал</p></footer>
+</body></html>
+"""
+
+
+def test_root_rule_parts():
+    rule = root_rule('div#main.card[data-x="1"] > p')
+    assert rule == RootRule(tag="div", id="main", classes=("card",), attrs=[("data-x", "=", "1")])
+    assert root_rule("[DATA-X] p").attrs == [("data-x", None, None)]
+
+
+@pytest.mark.parametrize("selector", [
+    "*", "p + span", "li ~ li", ":root p", "a\\.b", "[lang|=en] p", "div:not(.x) p", "[data-x=1 i] p",
+])
+def test_root_rule_refuses_unprunable(selector):
+    assert root_rule(selector) is None
+
+
+def test_root_rule_matches_raw_attrs():
+    assert root_rule("[DATA-X] p").matches("div", {"data-x": "1"})
+    assert root_rule('[class="card big"] p').matches("div", {"class": "card   big"})
+    assert root_rule('[rel~=b]').matches("a", {"rel": "a  b"})
+    assert root_rule('script[type="application/ld+json"]').matches("script", {"type": "Application/LD+JSON"})
+    assert not root_rule('div.card.small').matches("div", {"class": "card big"})
+    assert not root_rule('[data-x^=""]').matches("div", {"data-x": "1"})
+
+
+@pytest.mark.parametrize("selector", [
+    "[DATA-X] p",
+    '[class="card big"] span',
+    "div#main.card > p",
+    "[itemprop=recipeIngredient]",
+    "ul.list li",
+    '[class~=big] p',
+])
+@pytest.mark.parametrize("parser", ["lxml", "html.parser"])
+def test_pruned_tree_gives_same_matches(selector, parser):
+    full = ParserEngine(parser=parser).load_from_html(HTML)
+    parse_filter = ParseFilter([selector])
+    assert parse_filter.prunes_tree
+
+    pruned = ParserEngine(parser=parser, parse_filter=parse_filter).load_from_html(HTML)
+    expected = [el.get_text() for el in full.select(selector)]
+    assert expected
+    assert [el.get_text() for el in pruned.select(selector)] == expected
+    assert "подвал" not in pruned.get_text()
+
+
+def test_keep_json_scripts():
+    parse_filter = ParseFilter(["ul li"], keep_json=True)
+    prepared = parse_filter.prepare(HTML)
+    assert '{"name": "x"}' in prepared
+
+    pruned = ParserEngine(parser="lxml", parse_filter=parse_filter).load_from_html(HTML)
+    assert pruned.select('script[type="application/ld+json"]')
+
+
+def test_xpath_fields_disable_pruning():
+    assert not ParseFilter(["p"], xpaths=["//p"]).prunes_tree
@@ -0,0 +1,42 @@
+# tests/test_parser_engine.py
+from lxml import html
+
+from core.parser_engine import ParserEngine
+
+PAGE = """<html><body>
+<h1>Борщ</h1>
+<ul><li>Свёкла</li><li>Капуста</li></ul>
+<a href="/recipe/1">Дальше</a>
+</body></html>"""
+
+
+def test_xpath_fields_share_one_lxml_tree(monkeypatch):
+    built = []
+    fromstring = html.fromstring
+
+    def counting(text, *args, **kwargs):
+        built.append(text)
+        return fromstring(text, *args, **kwargs)
+
+    monkeypatch.setattr(html, "fromstring", counting)
+    engine = ParserEngine(parser="lxml")
+    soup = engine.load_from_html(PAGE)
+
+    assert engine.extract_xpath(soup, "//h1") == ["Борщ"]
+    assert engine.extract_xpath(soup, "//li", limit=1) == ["Свёкла"]
+    assert engine.extract_xpath(soup, "//a", attribute="href") == ["/recipe/1"]
+    assert engine.extract_xpath(soup, "//li/text()") == ["Свёкла", "Капуста"]
+    assert len(built) == 1
+
+    # Новая страница - новое дерево
+    other = engine.load_from_html("<h1>Щи</h1>")
+    assert engine.extract_xpath(other, "//h1") == ["Щи"]
+    assert len(built) == 2
+
+
+def test_fetch_many_keeps_order(site):
+    urls = [site.url(f"/page/{i}") for i in range(5)] + [site.url("/missing")]
+    pages = ParserEngine().fetch_many(urls, concurrency=4, per_host=4, retries=1)
+
+    assert [page.h1.get_text() for page in pages[:5]] == [f"Страница {i}" for i in range(5)]
+    assert pages[5] is None
@@ -0,0 +1,106 @@
+# tests/test_rate_limiter.py
+import asyncio
+import threading
+import time
+
+from core.rate_limiter import HostRateLimiter
+
+
+def test_robots_read_does_not_block_event_loop(monkeypatch):
+    limiter = HostRateLimiter(respect_robots=True)
+
+    def slow_robots(parsed):
+        time.sleep(0.3)
+        return 2.0
+
+    monkeypatch.setattr(limiter, "_read_crawl_delay", slow_robots)
+
+    async def main():
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.01)
+                ticks += 1
+
+        task = asyncio.create_task(ticker())
+        await limiter.aacquire("http://a.example/1")
+        task.cancel()
+        return ticks
+
+    # Пока robots.txt читается, петля продолжает работать
+    assert asyncio.run(main()) >= 5
+    # Crawl-delay учтён
+    assert limiter.stats()["a.example"]["rate"] == 0.5
+
+
+def test_acquire_and_release_track_in_flight():
+    limiter = HostRateLimiter(rate=100, burst=5, concurrency=2)
+    limiter.acquire("http://a.example/1")
+    limiter.acquire("http://a.example/2")
+    assert limiter.stats()["a.example"]["in_flight"] == 2
+
+    limiter.release("http://a.example/1", status=200, latency=0.1)
+    assert limiter.stats()["a.example"]["in_flight"] == 1
+
+
+def test_aacquire_wakes_on_release_instead_of_polling():
+    limiter = HostRateLimiter(rate=100, burst=5, concurrency=1)
+
+    async def main():
+        await limiter.aacquire("http://a.example/1")
+        # Слот освобождает другой поток через 0.1 с
+        threading.Timer(0.1, limiter.release, ("http://a.example/1", 200, 0.1)).start()
+        started = time.monotonic()
+        await limiter.aacquire("http://a.example/2")
+        return time.monotonic() - started
+
+    waited = asyncio.run(main())
+    assert 0.08 <= waited < 0.5
+    assert limiter._async_waiters == {}
+
+
+def test_aacquire_sleeps_until_next_token(monkeypatch):
+    limiter = HostRateLimiter(rate=5, burst=1, max_rate=5, concurrency=4)
+    calls = []
+    sleep = asyncio.sleep
+
+    async def recording_sleep(delay):
+        calls.append(delay)
+        await sleep(delay)
+
+    monkeypatch.setattr(asyncio, "sleep", recording_sleep)
+
+    async def main():
+        await limiter.aacquire("http://a.example/1")
+        await limiter.aacquire("http://a.example/2")
+
+    asyncio.run(main())
+    # Одна пауза до следующего токена (1 / rate), без опроса
+    assert len(calls) == 1 and 0.15 < calls[0] <= 0.2
+
+
+def test_cancelled_aacquire_leaves_no_waiter():
+    limiter = HostRateLimiter(rate=100, burst=5, concurrency=1)
+
+    async def main():
+        await limiter.aacquire("http://a.example/1")
+        task = asyncio.create_task(limiter.aacquire("http://a.example/2"))
+        await asyncio.sleep(0.05)
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+
+    asyncio.run(main())
+    assert limiter._async_waiters == {}
+    assert limiter.stats()["a.example"]["in_flight"] == 1
+
+
+def test_acquire_waits_for_release():
+    limiter = HostRateLimiter(rate=100, burst=5, concurrency=1)
+    limiter.acquire("http://a.example/1")
+    threading.Timer(0.1, limiter.release, ("http://a.example/1", 200, 0.1)).start()
+
+    started = time.monotonic()
+    limiter.acquire("http://a.example/2")
+    assert 0.08 <= time.monotonic() - started < 0.5
@@ -0,0 +1,98 @@
+# tests/test_response_cache.py
+import sqlite3
+
+from core.parser_engine import ParserEngine
+from storage.response_cache import ResponseCache
+
+# Страница в windows-1251 без <meta charset> - кодировка известна только из заголовка
+PAGE = "<html><body><h1>Салат Цезарь</h1></body></html>".encode("windows-1251")
+HEADERS = {"Content-Type": "text/html; charset=windows-1251", "ETag": '"v1"'}
+
+
+def test_round_trip_keeps_headers(tmp_path):
+    cache = ResponseCache(str(tmp_path))
+    cache.put("http://a/1", PAGE, HEADERS)
+
+    cached = cache.get("http://a/1")
+    assert cached.content == PAGE
+    assert cached.etag == '"v1"'
+    assert cached.content_type == HEADERS["Content-Type"]
+    assert ResponseCache.conditional_headers(cached) == {"If-None-Match": '"v1"'}
+
+    # 304 без Content-Type не стирает сохранённый
+    cache.touch("http://a/1", {"ETag": '"v2"'})
+    cached = cache.get("http://a/1")
+    assert (cached.etag, cached.content_type) == ('"v2"', HEADERS["Content-Type"])
+    cache.close()
+
+
+def test_old_cache_without_content_type_column(tmp_path):
+    db = sqlite3.connect(str(tmp_path / "index.sqlite"))
+    db.execute("CREATE TABLE responses (url TEXT PRIMARY KEY, body TEXT NOT NULL, size INTEGER NOT NULL, "
+               "etag TEXT, last_modified TEXT, fetched_at REAL NOT NULL, accessed_at REAL NOT NULL)")
+    db.commit()
+    db.close()
+
+    cache = ResponseCache(str(tmp_path))
+    cache.put("http://a/1", PAGE, HEADERS)
+    assert cache.get("http://a/1").content_type == HEADERS["Content-Type"]
+    cache.close()
+
+
+def test_cache_hit_decodes_with_stored_charset(tmp_path):
+    cache = ResponseCache(str(tmp_path))
+    cache.put("http://a/1", PAGE, HEADERS)
+
+    engine = ParserEngine(parser="html.parser", cache=cache)
+    content = engine.fetch_bytes("http://a/1")
+    soup = engine.load_from_bytes(content, url="http://a/1")
+
+    assert soup.h1.get_text() == "Салат Цезарь"
+    assert engine.last_encoding == ("cp1251", "header")
+    cache.close()
+
+
+def test_size_is_tracked_across_put_evict_and_clear(tmp_path):
+    cache = ResponseCache(str(tmp_path), max_size=None)
+
+    def stored():
+        db = sqlite3.connect(str(tmp_path / "index.sqlite"))
+        try:
+            return db.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        finally:
+            db.close()
+
+    cache.put("http://a/1", PAGE, HEADERS)
+    cache.put("http://a/2", PAGE * 50, HEADERS)
+    cache.put("http://a/1", PAGE * 100, HEADERS)  # замена записи
+    assert cache.size() == stored() > 0
+    cache.close()
+
+    # Новый экземпляр начинает с того же размера, вытеснение держит предел
+    cache = ResponseCache(str(tmp_path), max_size=stored() - 1)
+    assert cache.size() == stored()
+    cache.put("http://a/3", PAGE, HEADERS)
+    assert cache.size() == stored() <= cache.max_size
+    assert cache.get("http://a/2") is None
+
+    cache.clear()
+    assert cache.size() == stored() == 0
+    cache.close()
+
+
+def test_stale_copy_served_when_site_is_down(tmp_path, site):
+    cache = ResponseCache(str(tmp_path), ttl=0)
+    down_url = site.url("/page/1")
+    missing_url = site.url("/missing")
+    cache.put(down_url, PAGE, HEADERS)
+    cache.put(missing_url, PAGE, HEADERS)
+
+    engine = ParserEngine(parser="html.parser", cache=cache)
+    # Сайт отвечает: 404 - страницы больше нет, устаревшую копию не отдаём
+    assert engine.fetch_bytes(missing_url, retries=1, delay=0) is None
+
+    site.close()
+    content = engine.fetch_bytes(down_url, retries=1, delay=0)
+    assert content == PAGE
+    assert engine.load_from_bytes(content, url=down_url).h1.get_text() == "Салат Цезарь"
+    cache.close()
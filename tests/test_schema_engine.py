@@ -0,0 +1,115 @@
+# tests/test_schema_engine.py
+import gc
+import threading
+import weakref
+
+from bs4 import BeautifulSoup
+
+from core import schema_engine as schema_engine_module
+from core.parser_engine import ParserEngine
+from core.schema_engine import SchemaEngine
+from core.template_compiler import compile_template
+
+TEMPLATE = {'fields': {
+    'title': {'type': 'text', 'selector': 'h1'},
+    'items': {'type': 'list', 'selector': 'li', 'separator': ', '},
+}}
+
+
+def test_compile_is_cached_per_schema_and_engine():
+    engine, other = SchemaEngine(), SchemaEngine()
+    schema = compile_template(TEMPLATE)
+
+    compiled = engine.compile(schema)
+    assert engine.compile(schema) is compiled
+    assert engine.compile(compiled) is compiled
+    assert other.compile(schema) is not compiled
+    assert engine.compile(compile_template(TEMPLATE)) is not compiled
+
+    soup = BeautifulSoup("<h1>Борщ</h1><ul><li>a</li><li>b</li></ul>", "lxml")
+    row = engine.apply_schema(soup, schema, ParserEngine())
+    assert (row['title'], row['items']) == ("Борщ", "a, b")
+
+
+def test_engine_does_not_keep_schemas_alive():
+    engine = SchemaEngine()
+    schema = compile_template(TEMPLATE)
+    engine.compile(schema)
+    ref = weakref.ref(schema)
+
+    del schema
+    gc.collect()
+    assert ref() is None
+
+
+def test_concurrent_compile_builds_once(monkeypatch):
+    engine = SchemaEngine()
+    schema = compile_template(TEMPLATE)
+    calls = []
+    original = schema_engine_module.CompiledSchema.from_schema
+
+    def counting(*args, **kwargs):
+        calls.append(1)
+        return original(*args, **kwargs)
+
+    monkeypatch.setattr(schema_engine_module.CompiledSchema, "from_schema", counting)
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(engine.compile(schema))) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(calls) == 1
+    assert all(result is results[0] for result in results)
+
+
+# Страница в windows-1251: данные и в __NEXT_DATA__, и в JSON-LD
+JSON_PAGE = (
+    '<html><head><meta charset="windows-1251">'
+    '<script type="application/ld+json">{"@type": "Recipe", "name": "Борщ", "recipeYield": "4"}</script>'
+    '</head><body><h1>Борщ</h1>'
+    '<script id="__NEXT_DATA__" type="application/json">'
+    '{"props": {"pageProps": {"recipe": {"title": "Борщ", "time": 90}}}}</script>'
+    '</body></html>'
+).encode("windows-1251")
+
+
+def json_schema():
+    from core.models import FieldSchema, Schema, SourceConfig
+    return Schema(name="json", fields={
+        'title': FieldSchema('title', 'text', SourceConfig('json', 'props.pageProps.recipe.title')),
+        'time': FieldSchema('time', 'number', SourceConfig('json', 'props.pageProps.recipe.time')),
+        'name': FieldSchema('name', 'text', SourceConfig('json-ld', 'name')),
+    })
+
+
+def test_json_only_schema_builds_no_tree(monkeypatch):
+    engine = SchemaEngine()
+    schema = json_schema()
+    parser = ParserEngine()
+    expected = engine.apply_schema(parser.load_from_bytes(JSON_PAGE), schema, parser)
+    assert expected['title'] == "Борщ" and expected['name'] == "Борщ"
+
+    def no_tree(*args, **kwargs):
+        raise AssertionError("дерево страницы не должно строиться")
+
+    monkeypatch.setattr(ParserEngine, "load_from_bytes", no_tree)
+    assert not engine.compile(schema).needs_dom
+    assert engine.apply_to_bytes(JSON_PAGE, schema, ParserEngine()) == expected
+
+
+def test_apply_to_bytes_reuses_fingerprints(tmp_path, monkeypatch):
+    from storage.fingerprint_store import FingerprintStore
+
+    store = FingerprintStore(str(tmp_path / "fingerprints.sqlite"))
+    engine = SchemaEngine()
+    schema = compile_template(TEMPLATE)
+    page = "<h1>Борщ</h1><ul><li>a</li></ul>".encode("utf-8")
+
+    first = engine.apply_to_bytes(page, schema, ParserEngine(), url="http://a/1", fingerprints=store)
+    monkeypatch.setattr(ParserEngine, "load_from_bytes",
+                        lambda *args, **kwargs: (_ for _ in ()).throw(AssertionError("повторный разбор")))
+    assert engine.apply_to_bytes(page, schema, ParserEngine(), url="http://a/1", fingerprints=store) == first
+    assert engine.unchanged == 1
+    store.close()
@@ -0,0 +1,60 @@
+# tests/test_selector_matcher.py
+import soupsieve
+from bs4 import BeautifulSoup
+
+from core import selector_matcher
+from core.selector_matcher import SelectorMatcher
+
+HTML = """
+<div id="main" class="card big">
+  <h1 itemprop="name">Борщ</h1>
+  <ul class="ingredients"><li>Свёкла</li><li>Капуста</li><li>Картофель</li></ul>
+  <p><span>x</span><a href="/a">ссылка</a></p>
+</div>
+"""
+
+FIELDS = [
+    ("title", '[itemprop="name"]', None),
+    ("first", "ul.ingredients > li", 1),
+    ("items", "li", None),
+    ("main", "#main", None),
+    ("links", "p > a, p > span", None),
+    ("not_p", "div > :not(p)", None),
+]
+
+
+def make_matcher():
+    matcher = SelectorMatcher()
+    for name, selector, limit in FIELDS:
+        matcher.add(name, soupsieve.compile(selector), limit)
+    return matcher
+
+
+def expected(soup):
+    return {name: soup.select(selector, limit=limit or 0) for name, selector, limit in FIELDS}
+
+
+def as_ids(found):
+    return {name: [id(el) for el in elements] for name, elements in found.items()}
+
+
+def test_one_pass_matches_select():
+    soup = BeautifulSoup(HTML, "lxml")
+    assert as_ids(make_matcher().match(soup)) == as_ids(expected(soup))
+
+
+def test_falls_back_without_css_match(monkeypatch):
+    monkeypatch.setattr(selector_matcher, "CSSMatch", None)
+    soup = BeautifulSoup(HTML, "lxml")
+    assert as_ids(make_matcher().match(soup)) == as_ids(expected(soup))
+
+
+def test_falls_back_when_css_match_changed(monkeypatch):
+    def changed_signature(*args):
+        raise TypeError("unexpected arguments")
+
+    monkeypatch.setattr(selector_matcher, "CSSMatch", changed_signature)
+    soup = BeautifulSoup(HTML, "lxml")
+    matcher = make_matcher()
+    assert as_ids(matcher.match(soup)) == as_ids(expected(soup))
+    assert matcher._fallback
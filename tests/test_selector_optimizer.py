@@ -0,0 +1,59 @@
+# tests/test_selector_optimizer.py
+from bs4 import BeautifulSoup
+
+from core.selector_optimizer import SelectorAnalyzer, anchored, apply_suggestions, join_chain, split_chain
+
+
+def page(title):
+    return BeautifulSoup(f"""
+        <div id="__next"><main>
+          <div class="css-1ab2cd"><div><ul><li>Один</li><li>Два</li></ul></div></div>
+          <div class="css-9zz9zz"><div itemprop="recipe"><div><span>x</span><h2>{title}</h2></div></div></div>
+        </main></div>
+    """, "lxml")
+
+
+SOUPS = [page("Борщ"), page("Щи")]
+
+
+def test_split_chain():
+    assert split_chain("#a > div span") == [(None, "#a"), (">", "div"), (" ", "span")]
+    assert split_chain('a[title="x > y"] + b:not(.c, .d)') == [
+        (None, 'a[title="x > y"]'), ("+", "b:not(.c, .d)")]
+    assert split_chain("a, b") == []
+    assert join_chain(split_chain("#a>div  ~ span")) == "#a > div ~ span"
+
+
+def test_anchored():
+    assert anchored('[itemprop="name"]')
+    assert anchored("#recipe li")
+    assert anchored("ul.ingredients > li")
+    assert not anchored("body > ul > li")
+    assert not anchored("#__next div:nth-child(3)")
+    assert not anchored("div.css-1ab2cd > div.ev25qvo0 li")
+
+
+def test_bare_type_selector_is_not_suggested():
+    analyzer = SelectorAnalyzer(SOUPS, repeat=1, max_depth=3)
+    report = analyzer.analyze("Список", "#__next > main > div > div > ul > li")
+    assert report.expensive
+    assert report.suggestion is None
+
+
+def test_suggestion_is_anchored_to_itemprop():
+    analyzer = SelectorAnalyzer(SOUPS, repeat=20, max_depth=3)
+    selector = "#__next > main > div.css-9zz9zz > div > div > h2"
+    report = analyzer.analyze("Название", selector)
+    assert report.suggestion is not None and "[itemprop=" in report.suggestion
+    assert [el.get_text() for soup in SOUPS for el in soup.select(report.suggestion)] == ["Борщ", "Щи"]
+
+    template = {'fields': {'Название': {'type': 'text', 'selector': selector}}}
+    assert apply_suggestions(template, [report]) == 1
+    assert template['fields']['Название']['selector'] == report.suggestion
+
+
+def test_cheap_field_gets_no_suggestion():
+    analyzer = SelectorAnalyzer(SOUPS, repeat=1, max_ms=1000)
+    report = analyzer.analyze("Название", "main div > div > h2")
+    assert not report.expensive
+    assert report.suggestion is None
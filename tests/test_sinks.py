@@ -0,0 +1,122 @@
+# tests/test_sinks.py
+import csv
+import gzip
+import json
+
+import pytest
+
+from core.sinks import CsvSink, JsonlSink, open_sink, sink_format
+
+
+def test_sink_format_by_extension():
+    assert sink_format("a.CSV") == "csv"
+    assert sink_format("a.csv.gz") == "csv"
+    assert sink_format("a.ndjson") == "jsonl"
+    assert sink_format("a.parquet") == "parquet"
+    assert sink_format("a.xlsx") == "xlsx"
+    assert sink_format("a.txt") == "xlsx"
+
+
+def test_csv_sink_output(tmp_path):
+    path = str(tmp_path / "out.csv")
+    with CsvSink(path, ["Название", "Шаги"], buffer_size=2) as sink:
+        sink.write_rows([{"Название": "Борщ", "Шаги": ["a", "b"]}, {"Название": "Плов"}, {"Шаги": "x"}])
+    assert sink.rows_written == 3
+
+    with open(path, encoding="utf-8-sig", newline="") as f:
+        rows = list(csv.reader(f))
+    assert rows == [["Название", "Шаги"], ["Борщ", "a | b"], ["Плов", ""], ["", "x"]]
+
+
+def test_csv_gz_and_jsonl_gz(tmp_path):
+    csv_path = str(tmp_path / "out.csv.gz")
+    with open_sink(csv_path, ["a"]) as sink:
+        sink.write_row({"a": "1"})
+    with gzip.open(csv_path, "rt", encoding="utf-8") as f:
+        assert f.read().splitlines() == ["a", "1"]
+
+    jsonl_path = str(tmp_path / "out.jsonl.gz")
+    with open_sink(jsonl_path, ["a", "b"]) as sink:
+        sink.write_rows([{"a": "Цезарь", "b": 2}, {"a": None}])
+    assert isinstance(sink, JsonlSink)
+    with gzip.open(jsonl_path, "rt", encoding="utf-8") as f:
+        assert [json.loads(line) for line in f] == [{"a": "Цезарь", "b": 2}, {"a": None, "b": ""}]
+
+
+def test_parquet_sink_output(tmp_path):
+    pq = pytest.importorskip("pyarrow.parquet")
+    path = str(tmp_path / "out.parquet")
+    with open_sink(path, ["name", "kcal"], buffer_size=2) as sink:
+        sink.write_rows([{"name": "a", "kcal": 100}, {"name": "b", "kcal": ""}, {"name": "c", "kcal": 300}])
+
+    table = pq.read_table(path)
+    assert table.column_names == ["name", "kcal"]
+    assert table.to_pydict() == {"name": ["a", "b", "c"], "kcal": [100, None, 300]}
+
+
+def test_parquet_lossless_cast_in_later_batch(tmp_path):
+    pq = pytest.importorskip("pyarrow.parquet")
+    path = str(tmp_path / "cast.parquet")
+    with open_sink(path, ["kcal"], buffer_size=2) as sink:
+        sink.write_rows([{"kcal": 1}, {"kcal": 2}, {"kcal": 3.0}, {"kcal": ""}])
+
+    assert pq.read_table(path).to_pydict() == {"kcal": [1, 2, 3, None]}
+
+
+def test_parquet_type_drift_widens_to_string(tmp_path):
+    pq = pytest.importorskip("pyarrow.parquet")
+    path = str(tmp_path / "drift.parquet")
+    with open_sink(path, ["name", "kcal"], buffer_size=2) as sink:
+        # Первые порции - целые, потом текст: колонка становится строковой, ничего не теряется
+        sink.write_rows([{"name": "a", "kcal": 1}, {"name": "b", "kcal": ""},
+                         {"name": "c", "kcal": 3}, {"name": "d", "kcal": 4},
+                         {"name": "e", "kcal": "нет данных"}])
+
+    table = pq.read_table(path)
+    assert str(table.schema.field("kcal").type) == "string"
+    assert table.to_pydict() == {"name": ["a", "b", "c", "d", "e"],
+                                 "kcal": ["1", None, "3", "4", "нет данных"]}
+    assert not (tmp_path / "drift.parquet.widen").exists()
+
+
+def test_parquet_declared_type_mismatch_raises(tmp_path):
+    pytest.importorskip("pyarrow")
+    path = str(tmp_path / "typed_int.parquet")
+    with pytest.raises(ValueError):
+        with open_sink(path, ["kcal"], buffer_size=1, types={"kcal": "int64"}) as sink:
+            sink.write_rows([{"kcal": 250}, {"kcal": "нет"}])
+
+
+def test_parquet_declared_types(tmp_path):
+    pq = pytest.importorskip("pyarrow.parquet")
+    path = str(tmp_path / "typed.parquet")
+    with open_sink(path, ["kcal"], buffer_size=1, types={"kcal": "string"}) as sink:
+        sink.write_rows([{"kcal": 250}, {"kcal": "нет"}])
+
+    assert pq.read_table(path).to_pydict() == {"kcal": ["250", "нет"]}
+
+
+def test_parquet_file_readable_after_write_error(tmp_path):
+    pq = pytest.importorskip("pyarrow.parquet")
+    path = str(tmp_path / "broken.parquet")
+    sink = open_sink(path, ["a"], buffer_size=1)
+    sink.write_row({"a": 1})
+
+    def fail(rows):
+        raise RuntimeError("disk full")
+
+    sink._write = fail
+    with pytest.raises(RuntimeError):
+        with sink:
+            sink.write_row({"a": 2})
+
+    # Файл закрыт с footer и читается (первая порция на месте)
+    assert pq.read_table(path).to_pydict() == {"a": [1]}
+
+
+def test_parquet_empty_result(tmp_path):
+    pq = pytest.importorskip("pyarrow.parquet")
+    path = str(tmp_path / "empty.parquet")
+    with open_sink(path, ["a", "b"]):
+        pass
+    assert pq.read_table(path).column_names == ["a", "b"]
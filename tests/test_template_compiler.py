@@ -0,0 +1,59 @@
+# tests/test_template_compiler.py
+from core.parser_engine import ParserEngine
+from core.schema_engine import SchemaEngine
+from core.selector_matcher import SelectorMatcher
+from core.template_compiler import compile_template
+
+TEMPLATE = {'url': "https://eda.rambler.ru", 'fields': {
+    'Название': {'type': 'text', 'selector': 'h1'},
+    'Калории': {'type': 'number', 'selector': '.kcal'},
+    'Белки': {'type': 'number', 'selector': '.protein'},
+    'Шаги': {'type': 'list', 'selector': 'li', 'separator': 'numbered'},
+    'Ингредиенты': {'type': 'list', 'selector': 'li', 'separator': '; '},
+    'Без селектора': {'type': 'text', 'selector': ''},
+}}
+
+PAGE = """<h1> Борщ </h1><h1>Второй заголовок</h1>
+<span class="kcal">Калории: 350 ккал, 12 г</span><span class="kcal">1</span>
+<ul><li>Свёкла</li><li> </li><li>Капуста</li></ul>"""
+
+
+def test_compile_template_fields():
+    schema = compile_template(TEMPLATE)
+    assert schema.name == schema.site == "https://eda.rambler.ru"
+    # Поля без селектора пропускаются
+    assert list(schema.fields) == ['Название', 'Калории', 'Белки', 'Шаги', 'Ингредиенты']
+    assert schema.fields['Название'].source.limit == 1
+    assert schema.fields['Шаги'].multiple
+
+
+def test_template_semantics_match_constructor():
+    engine = ParserEngine()
+    row = SchemaEngine().apply_schema(engine.load_from_html(PAGE), compile_template(TEMPLATE), engine)
+
+    assert row == {
+        'Название': "Борщ",               # первый элемент
+        'Калории': "350",                 # первое число из первого элемента
+        'Белки': "",                      # не найдено
+        'Шаги': "1. Свёкла 2. Капуста",   # пустые элементы пропущены
+        'Ингредиенты': "Свёкла; Капуста",
+    }
+
+
+def test_template_fields_matched_in_one_pass(monkeypatch):
+    calls = []
+    match = SelectorMatcher.match
+
+    def counting(self, soup):
+        calls.append(soup)
+        return match(self, soup)
+
+    monkeypatch.setattr(SelectorMatcher, "match", counting)
+    engine = ParserEngine(parser="lxml")
+    schema_engine = SchemaEngine()
+    schema = schema_engine.compile(compile_template(TEMPLATE))
+    for _ in range(3):
+        schema_engine.apply_schema(engine.load_from_html(PAGE), schema, engine)
+
+    # Один обход дерева на страницу для всех CSS полей
+    assert len(calls) == 3
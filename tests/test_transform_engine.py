@@ -0,0 +1,48 @@
+# tests/test_transform_engine.py
+import pytest
+
+from core.models import FormatConfig
+from core.transform_engine import TransformEngine, join_values
+
+
+FORMATS = [
+    None,
+    FormatConfig(normalize_whitespace=True),
+    FormatConfig(remove_text=["ккал", " г"], convert_to_number=True),
+    FormatConfig(convert_to_number=True, round_to=2),
+    FormatConfig(convert_to_number=True, multiply_by=3, round_to=1),
+    FormatConfig(convert_to_number=True, divide_by=7),
+    FormatConfig(regex_pattern=r"(\d+)", regex_group=1, convert_to_number=True),
+    FormatConfig(regex_pattern=r"(", convert_to_number=True),      # неверная регулярка
+]
+
+VALUES = [
+    "  2.675  ", "0.125", "1.005", "2.5", "3.5",                  # половинки при round
+    "12345678901234567890", str(2 ** 53 + 1),                     # целые больше 2^53
+    "  Калории:   250 ккал ", "1,5 г", "без чисел", "", 42, 2.675,
+    ["  a  ", "", "b"],
+]
+
+
+@pytest.mark.parametrize("config", FORMATS)
+def test_compile_format_matches_apply_format(config):
+    engine = TransformEngine()
+    transform = engine.compile_format(config)
+
+    result = [transform(value) for value in VALUES]
+    expected = [engine.apply_format(value, config) for value in VALUES]
+    assert result == expected
+    # Тип тоже должен совпадать: 2.67, а не 2.68; int, а не float
+    assert [type(v) for v in result] == [type(v) for v in expected]
+
+
+def test_round_half_and_large_ints():
+    transform = TransformEngine().compile_format(FormatConfig(convert_to_number=True, round_to=2))
+    assert [transform(v) for v in ["2.675", str(2 ** 53 + 1)]] == [round(2.675, 2), 2 ** 53 + 1]
+
+
+def test_join_values_separators():
+    assert join_values(["a", "b"]) == "a | b"
+    assert join_values(["a", "b"], "numbered") == "1. a 2. b"
+    assert join_values(["a", "b"], "cyrillic") == "а. a б. b"
+    assert join_values(list("x" * 27), "latin").endswith("27. x")
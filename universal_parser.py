@@ -4,6 +4,7 @@ import os
 import json
 import webbrowser
 import re
+import threading
 from datetime import datetime
 
 import pandas as pd
@@ -11,7 +12,77 @@ from PySide6.QtWidgets import *
 from PySide6.QtCore import *
 from PySide6.QtGui import QFont
 
+from core.compiled_schema import CompiledSchema
 from core.parser_engine import ParserEngine
+from core.schema_engine import SchemaEngine
+from core.sinks import FILE_FILTER
+from core.template_compiler import NUMBER_PATTERN, compile_template
+from core.transform_engine import join_values
+
+
+# Сколько страниц пакет загружает одновременно (BatchEngine workers)
+BATCH_WORKERS = 4
+
+
+def compile_schema(template):
+    """Шаблон конструктора -> CompiledSchema (ValueError - неверный селектор)"""
+    return CompiledSchema.from_schema(compile_template(template))
+
+
+def load_page(worker, url):
+    """
+    Загрузить страницу (в фоновом потоке, свой ParserEngine)
+    Возвращает (страница, soup): страница - (url, тело, кодировка из заголовка),
+    из неё фоновые задачи строят своё дерево; или None
+    """
+    parser = ParserEngine(use_selenium=False)
+    content = parser.fetch_bytes(url)
+    if content is None:
+        return None
+    charset = parser.header_charset(url)
+    return (url, content, charset), parser.load_from_bytes(content, url=url, charset=charset)
+
+
+class WorkerSignals(QObject):
+    """Сигналы фоновой задачи (приходят в поток интерфейса)"""
+    progress = Signal(int, int, str, bool)  # готово, всего, url, успех
+    result = Signal(object)
+    error = Signal(str)
+    cancelled = Signal()
+    finished = Signal()
+
+
+class Worker(QRunnable):
+    """
+    Фоновая задача для QThreadPool: fn(worker, *args)
+    fn может проверять worker.cancel_event и сообщать прогресс через worker.signals.progress
+    Результат отменённой задачи не передаётся (приходит сигнал cancelled)
+    """
+
+    def __init__(self, fn, *args):
+        super().__init__()
+        self.fn = fn
+        self.args = args
+        self.signals = WorkerSignals()
+        self.cancel_event = threading.Event()
+
+    def cancel(self):
+        self.cancel_event.set()
+
+    @Slot()
+    def run(self):
+        try:
+            result = self.fn(self, *self.args)
+        except Exception as e:
+            if not self.cancel_event.is_set():
+                self.signals.error.emit(str(e))
+        else:
+            if self.cancel_event.is_set():
+                self.signals.cancelled.emit()
+            else:
+                self.signals.result.emit(result)
+        finally:
+            self.signals.finished.emit()
 
 
 class Field:
@@ -178,7 +249,12 @@ class ConstructorWindow(QMainWindow):
         super().__init__()
         self.fields = []
         self.current_soup = None
+        self.current_page = None  # (url, тело, кодировка) - фоновые задачи разбирают страницу сами
+        # Только для потока интерфейса: у каждой фоновой задачи свои движки
         self.parser = ParserEngine(use_selenium=False)
+        self.schema_engine = SchemaEngine()
+        self.thread_pool = QThreadPool()
+        self.workers = set()  # запущенные Worker (ссылки, чтобы их не собрал GC)
         self.init_ui()
 
     def init_ui(self):
@@ -288,6 +364,11 @@ class ConstructorWindow(QMainWindow):
         self.setStatusBar(self.status_bar)
         self.status_bar.showMessage("Готов к работе")
 
+        self.cancel_btn = QPushButton("⛔ Остановить")
+        self.cancel_btn.clicked.connect(self.cancel_workers)
+        self.cancel_btn.setEnabled(False)
+        self.status_bar.addPermanentWidget(self.cancel_btn)
+
         # Поля по умолчанию
         self.add_field("Название", "text")
         self.add_field("Ингредиенты", "list")
@@ -412,54 +493,99 @@ class ConstructorWindow(QMainWindow):
                 type_map = {'Текст': 'text', 'Число': 'number', 'Список': 'list'}
                 self.add_field(name, type_map[type_name])
 
+    def start_worker(self, fn, *args, on_result=None, on_progress=None, button=None):
+        """
+        Запустить fn(worker, *args) в пуле потоков
+        on_result / on_progress вызываются в потоке интерфейса;
+        button блокируется, пока задача выполняется
+        """
+        worker = Worker(fn, *args)
+        if on_result is not None:
+            worker.signals.result.connect(on_result)
+        if on_progress is not None:
+            worker.signals.progress.connect(on_progress)
+        worker.signals.error.connect(self.on_worker_error)
+        worker.signals.cancelled.connect(lambda: self.status_bar.showMessage("⛔ Остановлено"))
+        worker.signals.finished.connect(lambda: self.on_worker_finished(worker, button))
+
+        if button is not None:
+            button.setEnabled(False)
+        self.workers.add(worker)
+        self.cancel_btn.setEnabled(True)
+        self.thread_pool.start(worker)
+        return worker
+
+    def on_worker_finished(self, worker, button):
+        self.workers.discard(worker)
+        if button is not None:
+            button.setEnabled(True)
+        self.cancel_btn.setEnabled(bool(self.workers))
+
+    def on_worker_error(self, message):
+        self.status_bar.showMessage(f"❌ Ошибка: {message}")
+        QMessageBox.warning(self, "Ошибка", message)
+
+    def cancel_workers(self):
+        """Остановить все фоновые задачи (пакет останавливается после текущих страниц)"""
+        for worker in self.workers:
+            worker.cancel()
+        self.status_bar.showMessage("⛔ Останавливаю...")
+
+    def closeEvent(self, event):
+        self.cancel_workers()
+        self.thread_pool.waitForDone(5000)
+        super().closeEvent(event)
+
     def load_url(self):
         url = self.url_input.text()
         if url:
             self.status_bar.showMessage(f"Загружаю {url}...")
-            self.current_soup = self.parser.load_from_url(url)
-            if self.current_soup:
-                self.status_bar.showMessage(f"✅ Страница загружена: {url}")
-                QMessageBox.information(self, "Успех", "Страница загружена в парсер!\nМожно тестировать поля.")
-            else:
-                self.status_bar.showMessage("❌ Ошибка загрузки")
-                QMessageBox.warning(self, "Ошибка", "Не удалось загрузить страницу")
+            self.start_worker(load_page, url,
+                              on_result=lambda loaded: self.on_page_loaded(url, loaded),
+                              button=self.load_btn)
+
+    def on_page_loaded(self, url, loaded):
+        self.current_page, self.current_soup = loaded or (None, None)
+        if self.current_soup:
+            self.status_bar.showMessage(f"✅ Страница загружена: {url}")
+            QMessageBox.information(self, "Успех", "Страница загружена в парсер!\nМожно тестировать поля.")
+        else:
+            self.status_bar.showMessage("❌ Ошибка загрузки")
+            QMessageBox.warning(self, "Ошибка", "Не удалось загрузить страницу")
 
     def test_single_field(self, widget):
         if not self.current_soup:
             QMessageBox.warning(self, "Ошибка", "Сначала загрузите страницу!")
             return
 
-        selector = widget.field.selector
-        field_type = widget.field.data_type
+        field = widget.field
+        template = {'fields': {field.name: {'type': field.data_type, 'selector': field.selector,
+                                            'separator': field.separator}}}
+        try:
+            schema = compile_schema(template)
+        except ValueError as e:
+            widget.update_test_result(f"❌ Неверный селектор: {e}", False)
+            return
 
-        elements = self.current_soup.select(selector)
+        # Тот же движок, что при экспорте и пакетной обработке
+        values = self.schema_engine.extract_raw(self.current_soup, schema, self.parser)[field.name]
 
-        if not elements:
+        if not values:
             widget.update_test_result("❌ Элемент не найден", False)
             return
 
-        if field_type == 'list':
-            values = [el.get_text(strip=True) for el in elements if el.get_text(strip=True)]
+        if field.data_type == 'list':
+            values = [v for v in values if v]
             if values:
                 preview = "\n".join([f"  {i + 1}. {v[:50]}" for i, v in enumerate(values[:3])])
                 if len(values) > 3:
                     preview += f"\n  ... и ещё {len(values) - 3}"
 
-                separator = widget.field.separator or ' | '
-
-                if separator == 'numbered':
-                    excel_preview = ' '.join([f"{i + 1}. {v}" for i, v in enumerate(values[:3])])
-                elif separator == 'cyrillic':
-                    cyrillic = ['а.', 'б.', 'в.', 'г.', 'д.', 'е.']
-                    excel_preview = ' '.join([f"{cyrillic[i]} {v}" for i, v in enumerate(values[:3])])
-                elif separator == 'latin':
-                    latin = ['a.', 'b.', 'c.', 'd.', 'e.', 'f.']
-                    excel_preview = ' '.join([f"{latin[i]} {v}" for i, v in enumerate(values[:3])])
-                else:
-                    excel_preview = separator.join(values[:3])
-
+                separator = field.separator or ' | '
+                excel_preview = join_values(values[:3], separator)
                 if len(values) > 3:
-                    excel_preview += f"{separator}..."
+                    numbered = separator in ('numbered', 'cyrillic', 'latin')
+                    excel_preview += " ..." if numbered else f"{separator}..."
 
                 widget.update_test_result(
                     f"✅ Найдено {len(values)} элементов:\n{preview}\n\n📊 В Excel: {excel_preview}",
@@ -468,82 +594,96 @@ class ConstructorWindow(QMainWindow):
             else:
                 widget.update_test_result("❌ Элементы найдены, но текст пуст", False)
 
-        elif field_type == 'number':
-            text = elements[0].get_text(strip=True)
-            nums = re.findall(r'\d+', text)
-            if nums:
-                widget.update_test_result(f"✅ Число: {nums[0]} (из текста: {text})", True)
+        elif field.data_type == 'number':
+            text = values[0]
+            number = schema.fields[field.name].transform(values)
+            if re.search(NUMBER_PATTERN, text):
+                widget.update_test_result(f"✅ Число: {number} (из текста: {text})", True)
             else:
                 widget.update_test_result(f"⚠️ Текст: {text[:50]} (не число)", False)
 
         else:  # text
-            text = elements[0].get_text(strip=True)
-            widget.update_test_result(f"✅ Текст: {text[:100]}", True)
+            widget.update_test_result(f"✅ Текст: {values[0][:100]}", True)
 
     def test_all_fields(self):
         if not self.current_soup:
             QMessageBox.warning(self, "Ошибка", "Сначала загрузите страницу!")
             return
 
+        # Шаблон копируется: пока идёт проверка, поля можно редактировать
+        template = self.current_template()
+        self.status_bar.showMessage("🧪 Проверяю поля...")
+        self.start_worker(self._check_fields, self.current_page, template,
+                          on_result=self.on_fields_checked, button=self.test_all_btn)
+
+    @staticmethod
+    def _check_fields(worker, page, template):
+        """Проверка полей (в фоновом потоке): (строки результата, сколько работает, всего)"""
+        schema = compile_schema(template)
+        # Своё дерево и движки: дерево окна в это время читает поток интерфейса
+        url, content, charset = page
+        parser = ParserEngine(use_selenium=False)
+        soup = parser.load_from_bytes(content, url=url, charset=charset)
+        raw = SchemaEngine().extract_raw(soup, schema, parser)
         results = []
         success_count = 0
-        total_with_selector = 0
 
-        for field in self.fields:
-            if field.selector:
-                total_with_selector += 1
-                elements = self.current_soup.select(field.selector)
-                if elements:
-                    if field.data_type == 'list':
-                        count = len([e for e in elements if e.get_text(strip=True)])
-                        results.append(f"✅ {field.name}: {count} эл.")
-                        success_count += 1
-                    else:
-                        text = elements[0].get_text(strip=True)[:50]
-                        results.append(f"✅ {field.name}: {text}")
-                        success_count += 1
+        for name, values in raw.items():
+            if worker.cancel_event.is_set():
+                break
+            if values:
+                if schema.fields[name].data_type == 'list':
+                    count = len([v for v in values if v])
+                    results.append(f"✅ {name}: {count} эл.")
                 else:
-                    results.append(f"❌ {field.name}: не найдено")
+                    results.append(f"✅ {name}: {values[0][:50]}")
+                success_count += 1
+            else:
+                results.append(f"❌ {name}: не найдено")
+
+        return results, success_count, len(raw)
+
+    def on_fields_checked(self, checked):
+        results, success_count, total_with_selector = checked
 
         msg = "📊 Результаты проверки:\n\n" + "\n".join(results)
         msg += f"\n\n✅ Работает: {success_count} из {total_with_selector}"
 
+        self.status_bar.showMessage(f"🧪 Работает {success_count} из {total_with_selector} полей")
         QMessageBox.information(self, "Результаты теста", msg)
 
     def export_to_excel(self):
-        """Экспорт всех полей в Excel"""
+        """Экспорт всех полей загруженной страницы (Excel, CSV, JSON Lines или Parquet)"""
         if not self.current_soup:
             QMessageBox.warning(self, "Ошибка", "Сначала загрузите страницу!")
             return
 
+        # Формат - по расширению файла (Excel, CSV, JSON Lines или Parquet)
+        filename, _ = QFileDialog.getSaveFileName(self, "Сохранить результат", "", FILE_FILTER)
+        if filename:
+            self.status_bar.showMessage(f"📊 Сохраняю {filename}...")
+            self.start_worker(self._export_page, self.current_page, self.current_template(), filename,
+                              on_result=self.on_exported, button=self.export_btn)
+
+    @staticmethod
+    def _export_page(worker, page, template, filename):
+        """Извлечь строку по шаблону и записать её (в фоновом потоке)"""
+        from core.batch_engine import BatchEngine
         from core.mapping_engine import MappingEngine
 
-        data = {}
-        for field in self.fields:
-            if field.selector:
-                elements = self.current_soup.select(field.selector)
-                if elements:
-                    if field.data_type == 'list':
-                        values = [el.get_text(strip=True) for el in elements if el.get_text(strip=True)]
-                        data[field.name] = ' | '.join(values)
-                    elif field.data_type == 'number':
-                        text = elements[0].get_text(strip=True)
-                        nums = re.findall(r'\d+', text)
-                        data[field.name] = nums[0] if nums else text
-                    else:
-                        data[field.name] = elements[0].get_text(strip=True)
-                else:
-                    data[field.name] = ''
+        url, content, charset = page
+        engine = BatchEngine(template)
+        with MappingEngine().open_writer(filename, "Рецепты", engine.columns,
+                                              types=engine.column_types) as writer:
+            writer.write_row(engine.parse_row(content, url, charset))
+        return filename
 
-        filename, _ = QFileDialog.getSaveFileName(self, "Сохранить как Excel", "", "Excel Files (*.xlsx)")
-        if filename:
-            mapping = MappingEngine()
-            mapping.create_excel(filename, "Рецепты", list(data.keys()))
-            mapping.append_row(filename, "Рецепты", data)
-            QMessageBox.information(self, "Успех", f"Данные сохранены в {filename}")
+    def on_exported(self, filename):
+        self.status_bar.showMessage(f"✅ Данные сохранены в {filename}")
+        QMessageBox.information(self, "Успех", f"Данные сохранены в {filename}")
 
     def batch_from_excel(self):
-        """Парсинг списка URL из Excel"""
+        """Парсинг списка URL из Excel (в фоне; поля можно редактировать во время обработки)"""
         filename, _ = QFileDialog.getOpenFileName(self, "Выберите Excel с URL", "", "Excel Files (*.xlsx)")
         if not filename:
             return
@@ -555,49 +695,85 @@ class ConstructorWindow(QMainWindow):
         if not ok:
             return
 
-        urls = df[col].tolist()
+        urls = [str(url).strip() for url in df[col].tolist() if isinstance(url, str) and url.strip()]
 
-        result_file, _ = QFileDialog.getSaveFileName(self, "Сохранить результат", "", "Excel Files (*.xlsx)")
+        result_file, _ = QFileDialog.getSaveFileName(self, "Сохранить результат", "", FILE_FILTER)
         if not result_file:
             return
 
-        from core.mapping_engine import MappingEngine
-        parser = ParserEngine(use_selenium=False)
-        mapping = MappingEngine()
-
-        columns = [f.name for f in self.fields if f.selector]
-        mapping.create_excel(result_file, "Рецепты", columns)
-
-        success = 0
-        for i, url in enumerate(urls):
-            self.status_bar.showMessage(f"Обрабатываю {i + 1}/{len(urls)}: {url[:50]}...")
-            QApplication.processEvents()
-
-            soup = parser.load_from_url(url)
-            if soup:
-                data = {}
-                for field in self.fields:
-                    if field.selector:
-                        elements = soup.select(field.selector)
-                        if elements:
-                            if field.data_type == 'list':
-                                values = [el.get_text(strip=True) for el in elements if el.get_text(strip=True)]
-                                data[field.name] = ' | '.join(values)
-                            elif field.data_type == 'number':
-                                text = elements[0].get_text(strip=True)
-                                nums = re.findall(r'\d+', text)
-                                data[field.name] = nums[0] if nums else text
-                            else:
-                                data[field.name] = elements[0].get_text(strip=True)
-                        else:
-                            data[field.name] = ''
-
-                mapping.append_row(result_file, "Рецепты", data)
-                success += 1
-
-        self.status_bar.showMessage(f"Готово! Обработано {success} из {len(urls)}")
+        from storage.job_store import JobStore
+        template = self.current_template()
+
+        # Прогресс по каждому URL хранится в jobs.sqlite (в папке данных пользователя) -
+        # прерванную обработку можно продолжить
+        store = JobStore()
+        try:
+            job_id = store.find_unfinished(result_file)
+            if job_id:
+                counts = store.counts(job_id)
+                reply = QMessageBox.question(self, "Незавершённая обработка",
+                                             f"Для {result_file} есть незавершённая обработка:\n"
+                                             f"готово {counts['done']} из {counts['total']}.\n"
+                                             f"Продолжить с места остановки?",
+                                             QMessageBox.Yes | QMessageBox.No)
+                if reply != QMessageBox.Yes:
+                    job_id = None
+            if job_id is None:
+                job_id = store.create_job(urls, template, result_file, "Рецепты", source=filename)
+            else:
+                # Продолжаем с тем шаблоном, с которым задание начиналось
+                template = store.get_job(job_id)['template']
+        finally:
+            store.close()
+
+        self.status_bar.showMessage(f"📦 Задание {job_id}: начинаю обработку...")
+        worker = self.start_worker(self._run_batch_job, template, job_id,
+                                   on_result=self.on_batch_finished, on_progress=self.on_batch_progress,
+                                   button=self.batch_btn)
+        worker.signals.cancelled.connect(lambda: self.status_bar.showMessage(
+            f"⛔ Задание {job_id} остановлено - выберите тот же файл результата, чтобы продолжить"))
+
+    @staticmethod
+    def _run_batch_job(worker, template, job_id):
+        """Пакетная обработка задания (в фоновом потоке, несколько страниц одновременно)"""
+        from core.batch_engine import BatchEngine
+        from storage.job_store import JobStore
+
+        store = JobStore()
+        try:
+            engine = BatchEngine(template, workers=BATCH_WORKERS)
+            stats = engine.run_job(store, job_id, progress=worker.signals.progress.emit,
+                                   cancel=worker.cancel_event)
+            job = store.get_job(job_id)
+            return {'output': job['output'], 'cancelled': stats['cancelled'], **stats['job']}
+        finally:
+            store.close()
+
+    def on_batch_progress(self, done, total, url, ok):
+        mark = "✅" if ok else "❌"
+        self.status_bar.showMessage(f"{mark} Обработано {done}/{total}: {url[:50]}")
+
+    def on_batch_finished(self, result):
+        self.status_bar.showMessage(f"Готово! Обработано {result['done']} из {result['total']}")
         QMessageBox.information(self, "Успех",
-                                f"Обработано {success} из {len(urls)} рецептов\nРезультат в {result_file}")
+                                f"Обработано {result['done']} из {result['total']} рецептов\n"
+                                f"Результат в {result['output']}")
+
+    def current_template(self):
+        """Текущие поля в формате шаблона (как сохраняется в JSON)"""
+        template = {
+            'url': self.url_input.text(),
+            'fields': {}
+        }
+
+        for field in self.fields:
+            if field.selector:
+                template['fields'][field.name] = {
+                    'type': field.data_type,
+                    'selector': field.selector,
+                    'separator': field.separator if field.data_type == 'list' else None
+                }
+        return template
 
     def save_template(self):
         """Сохранить шаблон в JSON"""
@@ -611,18 +787,7 @@ class ConstructorWindow(QMainWindow):
         filename, _ = QFileDialog.getSaveFileName(self, "Сохранить шаблон",
                                                   default_path, "JSON Files (*.json)")
         if filename:
-            template = {
-                'url': self.url_input.text(),
-                'fields': {}
-            }
-
-            for field in self.fields:
-                if field.selector:
-                    template['fields'][field.name] = {
-                        'type': field.data_type,
-                        'selector': field.selector,
-                        'separator': field.separator if field.data_type == 'list' else None
-                    }
+            template = self.current_template()
 
             with open(filename, 'w', encoding='utf-8') as f:
                 json.dump(template, f, ensure_ascii=False, indent=2)